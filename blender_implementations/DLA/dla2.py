@@ -29,6 +29,11 @@
 import numpy as np 
 import bpy
 import os
+import sys
+
+# spatial hash is shared with dla_offlattice package (no bpy), next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from dla_offlattice import SpatialHash
 
 class Particle:
 
@@ -68,6 +73,10 @@ class DLA:
         self.aggregate = []
         self.aggregate.append(Particle(area["center"], jump_amp, size))
 
+        # aggregate particles by position for proximity test
+        self.aggregate_hash = SpatialHash(prox_thresh)
+        self.aggregate_hash.insert(self.aggregate[0].position, self.aggregate[0])
+
 
     def ini_particle(self):
         phi = np.random.rand() * 2 * np.pi
@@ -76,11 +85,7 @@ class DLA:
         return Particle([x,y,0], self.jump_amp, self.size)
 
     def is_close(self, particle):
-        for a_particle in self.aggregate:
-            if np.linalg.norm(a_particle.position - particle.position) < self.prox_thresh:
-                return True
-            else:
-                return False
+        return self.aggregate_hash.any_within(particle.position, self.prox_thresh)
 
     def too_far(self, particle):
         if np.linalg.norm(particle.position - np.array(self.area["center"])) > self.kill_dist:
@@ -114,6 +119,7 @@ class DLA:
                     if self.is_close(f_particle):
 
                         self.aggregate.append(f_particle)
+                        self.aggregate_hash.insert(f_particle.position, f_particle)
 
                         f_particle.stuck = True
 
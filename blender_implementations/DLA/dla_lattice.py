@@ -29,11 +29,21 @@
 import numpy as np 
 import bpy
 import os
+import sys
 import bmesh
 from colorsys import hsv_to_rgb
 
+# sparse plate and occupancy pyramid live in blender_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from plate import new_plate
+from occupancy_pyramid import OccupancyPyramid
+
 class LatticeDLA:
 
+    """
+    plate_size: [x_max, y_max] or None for sparse unbounded plate
+    """
+
     def __init__(
         self,
         plate_size,
@@ -52,8 +62,11 @@ class LatticeDLA:
         self.plate_size = plate_size
         self.starter = starter
 
-        self.plate = np.zeros(plate_size)
-        self.plate[starter[0]][starter[1]] = 1
+        self.plate = new_plate(plate_size)
+        self.plate[starter[0], starter[1]] = 1
+
+        self.pyramid = OccupancyPyramid()
+        self.pyramid.add(starter)
 
         self.tree = []
 
@@ -97,20 +110,27 @@ class LatticeDLA:
 
         while not self.is_close(particle):
 
+            # far from aggregate: jump on largest circle which can not touch it
+            jump = self.pyramid.give_safe_radius(particle)
+
+            if jump > 0:
+                particle = self.spawn_particle_on_circle(particle, jump)
+
             # random move
-            rand_dir = np.random.rand()
+            else:
+                rand_dir = np.random.rand()
 
-            if rand_dir < 0.25:
-                particle[0] += 1
+                if rand_dir < 0.25:
+                    particle[0] += 1
 
-            if rand_dir > 0.25 and rand_dir < 0.5:
-                particle[0] -= 1
+                if rand_dir > 0.25 and rand_dir < 0.5:
+                    particle[0] -= 1
 
-            if rand_dir > 0.5 and rand_dir < 0.75:
-                particle[1] += 1
+                if rand_dir > 0.5 and rand_dir < 0.75:
+                    particle[1] += 1
 
-            if rand_dir > 0.75:
-                particle[1] -= 1
+                if rand_dir > 0.75:
+                    particle[1] -= 1
 
             # dist from starter
             dist = np.linalg.norm(self.starter - particle)
@@ -129,10 +149,13 @@ class LatticeDLA:
 
     def display1(self):
 
-        for i in range(self.plate_size[0]):
-            for j in range(self.plate_size[1]):
-                if self.plate[i][j] == 1:
-                    bpy.ops.mesh.primitive_uv_sphere_add(size=0.2, location=[(i-self.starter[0]) / 5, (j-self.starter[1]) / 5,0])
+        # dense array of sparse plate starts at its bounds
+        cells = np.argwhere(np.asarray(self.plate) == 1)
+        if self.plate_size is None:
+            cells += self.plate.give_bounds()[:2]
+
+        for i, j in cells:
+            bpy.ops.mesh.primitive_uv_sphere_add(size=0.2, location=[(i-self.starter[0]) / 5, (j-self.starter[1]) / 5,0])
 
     def interpolate(self, v1, v2, n_interp, amp, bm):
 
@@ -208,7 +231,8 @@ class LatticeDLA:
 
             print(str(particle+1) + '/' + str(self.n_particles))
 
-            self.plate[found_cell[0]][found_cell[1]] = 1
+            self.plate[found_cell[0], found_cell[1]] = 1
+            self.pyramid.add(found_cell)
 
         self.display2()
         
@@ -51,7 +51,7 @@ class LatticeDLA:
         self.plate_size = plate_size
         self.starter = starter
 
-        self.plate = np.zeros(plate_size)
+        self.plate = np.zeros(plate_size, dtype=np.uint8)
         for i in range(100):
             ini = self.spawn_particle_on_circle(self.starter, self.radius_spawn)
             print(ini)
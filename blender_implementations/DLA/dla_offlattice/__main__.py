@@ -0,0 +1,107 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+"""
+Grow DLA tree headless and write it to file:
+python -m dla_offlattice -out tree.npz
+Output format is chosen by extension: .npz, .ply, .obj
+Import .npz in Blender with BlenderSink().write(*load_npz(path))
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from .tree import Tree
+from .sinks import NpzSink, PlySink, ObjSink
+
+SINKS = {".npz": NpzSink, ".ply": PlySink, ".obj": ObjSink}
+
+def main():
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-out",
+                        help="output file (.npz, .ply, .obj)",
+                        type=str,
+                        required=True)
+
+    parser.add_argument("-radius-spawn",
+                        help="radius of circle where walkers are spawned",
+                        type=float,
+                        default=6)
+
+    parser.add_argument("-ini-radius",
+                        help="radius of initial circle of nodes",
+                        type=float,
+                        default=1)
+
+    parser.add_argument("-stick-dist",
+                        help="distance where walker sticks to tree",
+                        type=float,
+                        default=0.3)
+
+    parser.add_argument("-n-walkers",
+                        help="number of walkers",
+                        type=int,
+                        default=100)
+
+    parser.add_argument("-walk-dist",
+                        help="length of one walker step",
+                        type=float,
+                        default=0.2)
+
+    parser.add_argument("-seed",
+                        help="seed for random generator",
+                        type=int,
+                        default=None)
+
+    args = parser.parse_args()
+
+    # check output before growing, growth can take long
+    extension = os.path.splitext(args.out)[1].lower()
+    if extension not in SINKS:
+        parser.error("-out must be one of " + ", ".join(SINKS) + ", got: " + args.out)
+
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    tree = Tree(radius_spawn=args.radius_spawn,
+                ini_radius=args.ini_radius,
+                center=np.array([0,0,0]),
+                stick_dist=args.stick_dist,
+                n_walkers=args.n_walkers,
+                walker_walk_dist=args.walk_dist)
+    tree.grow()
+
+    sink = SINKS[extension](args.out)
+    sink.write(*tree.give_arrays())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import numpy as np
+
+"""
+Sinks take grown tree as arrays (see Tree.give_arrays):
+positions (N, 3) and parents (N,), parent index -1 for initial nodes.
+Every node except initial ones gives edge (parent, node).
+"""
+
+def give_edges(parents):
+
+    nodes = np.flatnonzero(parents >= 0)
+
+    return np.stack((parents[nodes], nodes), axis=1)
+
+"""
+read tree written by NpzSink
+"""
+def load_npz(path):
+
+    data = np.load(path)
+
+    return data["positions"], data["parents"]
+
+class NpzSink:
+
+    def __init__(self, path):
+
+        self.path = path
+
+    def write(self, positions, parents):
+
+        np.savez(self.path, positions=positions, parents=parents)
+
+class PlySink:
+
+    """
+    ascii PLY with vertices and edges
+    """
+    def __init__(self, path):
+
+        self.path = path
+
+    def write(self, positions, parents):
+
+        edges = give_edges(parents)
+
+        with open(self.path, "w") as out:
+
+            out.write("ply\n")
+            out.write("format ascii 1.0\n")
+            out.write("element vertex " + str(len(positions)) + "\n")
+            out.write("property float x\n")
+            out.write("property float y\n")
+            out.write("property float z\n")
+            out.write("element edge " + str(len(edges)) + "\n")
+            out.write("property int vertex1\n")
+            out.write("property int vertex2\n")
+            out.write("end_header\n")
+
+            np.savetxt(out, positions, fmt="%.6f")
+            np.savetxt(out, edges, fmt="%d")
+
+class ObjSink:
+
+    """
+    OBJ with vertices and line elements
+    """
+    def __init__(self, path):
+
+        self.path = path
+
+    def write(self, positions, parents):
+
+        edges = give_edges(parents)
+
+        with open(self.path, "w") as out:
+
+            np.savetxt(out, positions, fmt="v %.6f %.6f %.6f")
+
+            # OBJ indices start from 1
+            np.savetxt(out, edges + 1, fmt="l %d %d")
+
+class BlenderSink:
+
+    """
+    mesh object with one vertex per node and one edge per branch.
+    bpy is imported on write, so module can be used outside of Blender
+    """
+    def __init__(self, name="dla_mesh"):
+
+        self.name = name
+
+    def write(self, positions, parents):
+
+        import bpy
+        import bmesh
+
+        # create bmesh
+        bm = bmesh.new()
+        verts = [bm.verts.new(position) for position in positions]
+        for parent, node in give_edges(parents):
+            bm.edges.new((verts[parent], verts[node]))
+
+        # create mesh object using bmesh data
+        mesh_data = bpy.data.meshes.new(self.name + "_data")
+        mesh_obj = bpy.data.objects.new(self.name + "_obj", mesh_data)
+        bm.to_mesh(mesh_data)
+        bm.free()
+
+        # add mesh object to the scene
+        scene = bpy.context.scene
+        scene.objects.link(mesh_obj)
+
+        return mesh_obj
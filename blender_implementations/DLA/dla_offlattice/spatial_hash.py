@@ -0,0 +1,124 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import numpy as np
+
+class SpatialHash:
+
+    """
+    Uniform grid over xy plane. Cell size equals stick distance, so every
+    node closer than stick distance lies in 3x3 cells around the walker.
+    cell_size: scalar
+    """
+    def __init__(self, cell_size):
+
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def key(self, position):
+
+        return (int(np.floor(position[0] / self.cell_size)),
+                int(np.floor(position[1] / self.cell_size)))
+
+    """
+    add item at position
+    """
+    def insert(self, position, item):
+
+        key = self.key(position)
+
+        if key not in self.cells:
+            self.cells[key] = []
+
+        self.cells[key].append((np.array(position), item))
+
+    """
+    closest item not further than dist (dist <= cell_size), None if there is none
+    """
+    def find_within(self, position, dist):
+
+        i, j = self.key(position)
+
+        found = None
+        found_dist = dist
+
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for node_position, item in self.cells.get((i+di, j+dj), ()):
+
+                    node_dist = np.linalg.norm(node_position - position)
+
+                    if node_dist <= found_dist:
+                        found = item
+                        found_dist = node_dist
+
+        return found
+
+    """
+    True if any item is closer than dist (dist <= cell_size), stops at
+    first one (no search for closest)
+    """
+    def any_within(self, position, dist):
+
+        i, j = self.key(position)
+
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for node_position, item in self.cells.get((i+di, j+dj), ()):
+                    if np.linalg.norm(node_position - position) < dist:
+                        return True
+
+        return False
+
+    """
+    lower bound of distance to nearest item, searching max_rings rings of
+    cells around position. Returns max_rings * cell_size if nothing is found
+    """
+    def give_free_radius(self, position, max_rings):
+
+        i, j = self.key(position)
+
+        nearest = np.inf
+
+        for ring in range(max_rings + 1):
+
+            for di in range(-ring, ring + 1):
+                for dj in range(-ring, ring + 1):
+
+                    # visit only border of ring
+                    if abs(di) != ring and abs(dj) != ring:
+                        continue
+
+                    for node_position, item in self.cells.get((i+di, j+dj), ()):
+                        nearest = min(nearest, np.linalg.norm(node_position - position))
+
+            # items in unvisited rings are at least ring * cell_size away
+            if nearest <= ring * self.cell_size:
+                return nearest
+
+        return min(nearest, max_rings * self.cell_size)
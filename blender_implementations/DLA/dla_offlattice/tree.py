@@ -0,0 +1,239 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+import numpy as np
+
+from .spatial_hash import SpatialHash
+
+class Walker:
+
+    """
+    center_spawn_circle: np.array([x, y, z])
+    r_spawn_circle: scalar
+    r_walk: scalar
+    """
+    def __init__(self, 
+                center_spawn_circle,
+                r_spawn_circle, 
+                r_walk_dist):
+
+        self.center_spawn_circle = center_spawn_circle
+        self.r_spawn_circle = r_spawn_circle
+        self.r_walk_dist = r_walk_dist
+
+        self.position = self.__init_position__()
+        self.found = False
+
+    """
+    Spawn walker on random position on circle defined by center_spawn_circle
+    and r_spawn_circle
+    """
+    def __init_position__(self):
+
+        density = 100
+        samples = np.linspace(0, np.pi * 2, density)
+        random_sample_idx = np.random.randint(0, density, 1)[0]
+        random_sample = samples[random_sample_idx]
+
+        x = self.center_spawn_circle[0] + self.r_spawn_circle * np.cos(random_sample)
+        y = self.center_spawn_circle[1] + self.r_spawn_circle * np.sin(random_sample)
+        z = 0
+
+        return np.array([x,y,z])
+
+    """
+    random movement
+    """
+    def walk(self):
+
+        """
+        from current position move randomly.
+        Next step is random point on circle with current position as
+        center and r_walk_dist as radius
+        """
+        x = self.position[0] + self.r_walk_dist * np.sin(np.random.rand() * np.pi * 2)
+        y = self.position[1] + self.r_walk_dist * np.cos(np.random.rand() * np.pi * 2)
+        z = 0
+
+        self.position = np.array([x,y,z])
+
+        """
+        if walker goes outside of certain radius, reset its position
+        as random point on starting circle
+        """
+        dist = np.linalg.norm(self.center_spawn_circle - self.position)
+
+        if dist > self.r_spawn_circle + 10:
+            self.position = self.__init_position__()
+
+    """
+    move to random point on circle of radius jump_dist around current
+    position (used when walker is far from tree)
+    """
+    def jump(self, jump_dist):
+
+        phi = np.random.rand() * np.pi * 2
+
+        x = self.position[0] + jump_dist * np.cos(phi)
+        y = self.position[1] + jump_dist * np.sin(phi)
+        z = 0
+
+        self.position = np.array([x,y,z])
+
+        dist = np.linalg.norm(self.center_spawn_circle - self.position)
+
+        if dist > self.r_spawn_circle + 10:
+            self.position = self.__init_position__()
+
+class Tree:
+
+    def __init__(self, 
+                 radius_spawn,
+                 ini_radius,
+                 center,
+                 stick_dist,
+                 n_walkers,
+                 walker_walk_dist
+                ):
+
+        self.radius_spawn = radius_spawn
+        self.ini_radius = ini_radius
+        self.center = center
+        self.stick_dist = stick_dist
+        self.n_walkers = n_walkers
+        self.walker_walk_dist = walker_walk_dist
+
+
+        # create initial walker
+        init_walker = Walker(self.center,
+                             self.radius_spawn,
+                             self.walker_walk_dist)
+
+        init_walker.position = [0,0,0]
+
+        self.tree = []
+        #self.tree.append([None, init_walker])
+
+        # tree nodes by position: stick test and distance to tree
+        self.nodes = SpatialHash(self.stick_dist)
+        self.tree_radius = 0
+
+        self.__init_tree__()
+
+    "add walker to tree, attached to parent"
+    def attach(self, parent, walker):
+
+        self.tree.append([parent, walker])
+        self.nodes.insert(walker.position, walker)
+
+        dist = np.linalg.norm(walker.position - self.center)
+        self.tree_radius = max(self.tree_radius, dist)
+
+    "define where walkers will be stuck"
+    def __init_tree__(self):
+
+        sample_density = 20
+        circle_samples = np.linspace(0, np.pi * 2, sample_density)
+
+        # NOTE: use noise so circle is bit wavy
+        for circle_sample in circle_samples:
+
+            init_walker = Walker(self.center,
+                                 self.radius_spawn,
+                                 self.walker_walk_dist)
+
+            x = self.center[0] + self.ini_radius * np.cos(circle_sample)
+            y = self.center[1] + self.ini_radius * np.sin(circle_sample)
+            init_walker.position = np.array([x,y,0])
+
+            self.attach(None, init_walker)
+
+    def grow(self):
+
+        walkers_stuck = 0
+
+        walkers = []
+
+        # initialise walkers
+        for i in range(0, self.n_walkers):
+
+            walker = Walker(self.center,
+                            self.radius_spawn,
+                            self.walker_walk_dist)
+
+            walkers.append(walker)
+
+        # perform random walk for every walker until stuck
+        while walkers_stuck < self.n_walkers:
+
+            # for every walker
+            for walker in walkers:
+
+                # check if current walker is stuck
+                if not walker.found:
+
+                    # only nodes in 3x3 hash cells can be close enough
+                    walker_tree_rel = self.nodes.find_within(walker.position, self.stick_dist)
+
+                    if walker_tree_rel is not None:
+                        self.attach(walker_tree_rel, walker)
+                        walkers_stuck += 1
+                        print(walkers_stuck)
+                        walker.found = True
+                        continue
+
+                    # far from tree walker can jump without passing by any node
+                    free_radius = max(self.nodes.give_free_radius(walker.position, 3),
+                                      np.linalg.norm(walker.position - self.center) - self.tree_radius)
+                    jump_dist = free_radius - self.stick_dist
+
+                    if jump_dist > self.walker_walk_dist:
+                        walker.jump(jump_dist)
+
+                    else:
+                        walker.walk()
+
+    """
+    tree as arrays: positions (N, 3) float64 and parents (N,) int64,
+    parent index is -1 for initial nodes
+    """
+    def give_arrays(self):
+
+        index = {}
+        positions = np.zeros((len(self.tree), 3))
+        parents = np.full(len(self.tree), -1, dtype=np.int64)
+
+        for k, (parent, walker) in enumerate(self.tree):
+
+            index[id(walker)] = k
+            positions[k] = walker.position
+
+            if parent is not None:
+                parents[k] = index[id(parent)]
+
+        return positions, parents
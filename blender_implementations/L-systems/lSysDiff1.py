@@ -29,6 +29,12 @@
 import bpy
 import numpy as np
 import os
+import sys
+
+# frame rendering and sphere mesh live in blender_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from render_queue import give_renderer
+from sphere_cloud import SphereCloud
 
 class Cell:
 
@@ -37,13 +43,6 @@ class Cell:
         self.center = np.array(center)
         self.radius = radius
 
-        bpy.ops.mesh.primitive_uv_sphere_add(
-            location=self.center,
-            size=self.radius)
-            
-        bpy.context.object.select = False
-        self.sobject = bpy.context.object
-
 
 class Organism:
 
@@ -52,13 +51,16 @@ class Organism:
         cell_radius,
         n_cells_per_diff,
         n_iter,
-        out):
+        renderer):
 
         self.n_cells_per_diff = n_cells_per_diff
         self.n_iter = n_iter
-        self.out = out
+        self.renderer = renderer
         self.cell_radius = cell_radius
 
+        # all cells are one mesh object
+        self.spheres = SphereCloud("lsys")
+
         self.active_cells = []
         self.active_cells.append(Cell(center=[0,0,0], radius=cell_radius))
 
@@ -79,10 +81,6 @@ class Organism:
 
             new_cells.append(Cell(center=center, radius=cell.radius))
 
-        # remove parent cell
-        cell.sobject.select = True
-        bpy.ops.object.delete(use_global=False)
-        
         return new_cells
 
     def differentiation_locations(self):
@@ -117,7 +115,6 @@ class Organism:
                     if new_cell.center[2] < self.cell_radius * 2:
                         print("!!")
                         new_cell.center[2] += self.cell_radius * np.random.rand()
-                        new_cell.sobject.location = new_cell.center
 
 
             dx /= len(self.active_cells)
@@ -125,7 +122,6 @@ class Organism:
             z = new_cell.center[2]
             new_cell.center += k * (np.array([dx,dy,0]) - new_cell.center)
             new_cell.center[2] = z
-            new_cell.sobject.location = new_cell.center
 
             
 
@@ -133,6 +129,14 @@ class Organism:
 
 
 
+    def update_spheres(self, cells):
+
+        centers = [cell.center for cell in cells]
+        radii = [cell.radius for cell in cells]
+
+        self.spheres.update(centers, radii)
+
+
     def grow(self):
 
         render_iter = 0
@@ -141,7 +145,7 @@ class Organism:
 
             updated_active_cells = []
 
-            for cell in self.active_cells:
+            for i, cell in enumerate(self.active_cells):
 
                 diff_loc = self.differentiation_locations()
 
@@ -151,18 +155,20 @@ class Organism:
 
                 updated_active_cells.extend(new_cells)
 
-                bpy.context.scene.render.filepath = os.path.join(self.out, str(render_iter))
-                bpy.ops.render.render(write_still=True)
+                # parent cells which are differentiated are not shown
+                self.update_spheres(updated_active_cells + self.active_cells[i+1:])
+                self.renderer.render(render_iter)
                 render_iter += 1
 
             self.active_cells = updated_active_cells
 
 def main():
 
-    out = '/home/lovro/Documents/FER/diplomski/growth_models_results/blender_impl/lsys/tmp/'
+    # queue is closed also if growth fails
+    with give_renderer("lsys") as renderer:
 
-    org = Organism(cell_radius=0.5, n_cells_per_diff=4, n_iter=7, out=out)
-    org.grow()
+        org = Organism(cell_radius=0.5, n_cells_per_diff=4, n_iter=7, renderer=renderer)
+        org.grow()
 
 
 main()
@@ -26,11 +26,16 @@
 # THE SOFTWARE.
 #
 
-#import bpy
+import os
+import sys
 import numpy as np 
-import copy
 import bpy
 
+# reaction-diffusion lives in gray_scott package (no bpy), next to this script
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from gray_scott import GrayScott
+from gray_scott.sinks import BlenderImageSink
+
 #####################################################
 # print grid
 def print_grid(grid):
@@ -54,16 +59,13 @@ def get_pixel(img, x, y, width):
     color = []
     offset = (x + y * width) * 4
     for i in range(4):
-        color.append(img.pixels[offset+1])
+        color.append(img.pixels[offset+i])
     return color
 
-# set pixels in grid
-def set_pixels_by_grid(img, width, grid):
+# set pixels in grid (one bulk upload, pixel [i, j] as set_pixel)
+def set_pixels_by_grid(img, width, rd):
 
-    for i in range(len(grid)):
-        for j in range(len(grid[0])):
-            color = [grid[i][j][0], grid[i][j][1], 0.0, 1.0]
-            set_pixel(img, i, j, width, color)
+    BlenderImageSink(img).write(rd.A, rd.B)
 
 
 
@@ -84,7 +86,7 @@ height = img.size[1] # rows
 #height = 128
 rows = width
 cols = height
-generations = 2
+generations = 20
 
 # rd params
 dA = 1
@@ -92,81 +94,16 @@ dB = 0.5
 feed = 0.055
 kill = 0.062
 
-# ini grid and next grid
-grid = []
-next_grid = []
-for i in range(rows):
-    row = []
-    row_next = []
-    for j in range(cols):
-        row.append(np.array([1.0, 0.0]))
-        row_next.append(np.array([1.0,0.0]))
-    grid.append(row)
-    next_grid.append(row_next)
-
-for i in range(30, 40):
-    for j in range(50,60):   
-        grid[i][j][1] = 1.0
-
-# conv
-def laplaceA(x,y,grid):
-
-    sum = 0
-
-    sum += grid[x][y][0] * -1
-
-    sum += grid[x-1, y][0] * 0.2
-    sum += grid[x, y-1][0] * 0.2
-    sum += grid[x+1, y][0] * 0.2
-    sum += grid[x, y+1][0] * 0.2
-
-    sum += grid[x+1, y+1][0] * 0.05
-    sum += grid[x-1, y-1][0] * 0.05
-    sum += grid[x+1, y-1][0] * 0.05
-    sum += grid[x-1, y+1][0] * 0.05
-
-    return sum
-
-def laplaceB(x,y,grid):
-
-    sum = 0
-
-    sum += grid[x][y][1] * -1
-
-    sum += grid[x-1, y][1] * 0.2
-    sum += grid[x, y-1][1] * 0.2
-    sum += grid[x+1, y][1] * 0.2
-    sum += grid[x, y+1][1] * 0.2
-
-    sum += grid[x+1, y+1][1] * 0.05
-    sum += grid[x-1, y-1][1] * 0.05
-    sum += grid[x+1, y-1][1] * 0.05
-    sum += grid[x-1, y+1][1] * 0.05
-
-    return sum
-
-
+# ini grid
+rd = GrayScott([rows, cols], dA=dA, dB=dB, feed=feed, kill=kill)
+rd.seed(slice(30, 40), slice(50, 60))
 
 # perform r-d
-for g in range(20):
+for g in range(generations):
     print(g)
 
-    for i in range(1, rows-1):
-        for j in range(1, cols-1):
-
-            a = grid[i][j][0]
-            b = grid[i][j][1]
-
-            next_grid[i][j][0] = a + (dA * laplaceA(i,j,grid) - a * b * b + feed * (1-a) ) 
-
-            next_grid[i][j][1] = b + (dB * laplaceB(i,j,grid) + a * b *b - (kill+feed) * b) 
-            
-            temp = copy.copy(grid)
-            grid = next_grid
-            next_grid = grid # not needed?
-
-
+    rd.step()
                              
-    set_pixels_by_grid(img, width, next_grid)
+    set_pixels_by_grid(img, width, rd)
 
     
@@ -0,0 +1,158 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+"""
+Run Gray-Scott reaction-diffusion headless and write fields to file:
+python -m gray_scott -size 512 512 -steps 5000 -out rd.npz
+Large grids on all cores: -size 4096 4096 -tiles 8
+Output holds arrays A and B, -image writes .png or .exr texture
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from .engine import GrayScott, BOUNDARIES, METHODS, run_until_steady
+from .tiled import TiledGrayScott
+from .sinks import give_image_sink
+
+def main():
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("-out",
+                        help="output .npz file with fields A and B",
+                        type=str)
+
+    parser.add_argument("-image",
+                        help="output texture (.png, .exr), A in red and B in green",
+                        type=str)
+
+    parser.add_argument("-size",
+                        help="rows and cols of grid",
+                        type=int,
+                        nargs=2,
+                        default=[512, 512])
+
+    parser.add_argument("-steps",
+                        help="number of timesteps",
+                        type=int,
+                        default=5000)
+
+    parser.add_argument("-dA",
+                        help="diffusion rate of A",
+                        type=float,
+                        default=1.0)
+
+    parser.add_argument("-dB",
+                        help="diffusion rate of B",
+                        type=float,
+                        default=0.5)
+
+    parser.add_argument("-feed",
+                        help="feed rate of A",
+                        type=float,
+                        default=0.055)
+
+    parser.add_argument("-kill",
+                        help="kill rate of B",
+                        type=float,
+                        default=0.062)
+
+    parser.add_argument("-boundary",
+                        help="boundary condition",
+                        choices=BOUNDARIES,
+                        default="dirichlet")
+
+    parser.add_argument("-dt",
+                        help="timestep, largest stable explicit timestep if not given",
+                        type=float,
+                        default=None)
+
+    parser.add_argument("-method",
+                        help="time stepping (spectral needs periodic boundary)",
+                        choices=METHODS,
+                        default="explicit")
+
+    parser.add_argument("-tol",
+                        help="stop when rms change of one step drops below tol",
+                        type=float,
+                        default=None)
+
+    parser.add_argument("-tiles",
+                        help="number of strips solved in parallel (1: no tiling)",
+                        type=int,
+                        default=1)
+
+    parser.add_argument("-halo",
+                        help="halo rows of strip, timesteps between halo exchanges",
+                        type=int,
+                        default=8)
+
+    args = parser.parse_args()
+
+    # strips are not periodic, spectral method needs whole grid
+    if args.tiles > 1 and args.method != "explicit":
+        parser.error("-method " + args.method + " needs -tiles 1")
+
+    params = {"dA": args.dA,
+              "dB": args.dB,
+              "feed": args.feed,
+              "kill": args.kill,
+              "dt": args.dt,
+              "boundary": args.boundary}
+
+    if args.tiles > 1:
+        rd = TiledGrayScott(args.size, n_tiles=args.tiles, halo=args.halo, **params)
+    else:
+        rd = GrayScott(args.size, method=args.method, **params)
+
+    # seed square of B in the middle
+    rows, cols = rd.shape
+    rd.seed(slice(rows // 2 - 5, rows // 2 + 5), slice(cols // 2 - 5, cols // 2 + 5))
+
+    start = time.time()
+    if args.tol is None:
+        rd.step(args.steps)
+        n_steps, n_saved = args.steps, 0
+    else:
+        n_steps, n_saved = run_until_steady(rd, args.steps, args.tol)
+    print("steps:", n_steps, "saved:", n_saved, "time:", time.time() - start)
+
+    if args.tiles > 1:
+        rd.close()
+
+    if args.out is not None:
+        np.savez(args.out, A=rd.A, B=rd.B)
+
+    if args.image is not None:
+        give_image_sink(args.image).write(rd.A, rd.B)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+import numpy as np
+
+BOUNDARIES = ("dirichlet", "neumann", "periodic")
+METHODS = ("explicit", "spectral")
+
+# largest magnitude of eigenvalues of 3x3 stencil (checkerboard mode)
+STENCIL_MAX_EIGENVALUE = 1.6
+
+# stiffness of explicit reaction A * B * B in growing patterns, fitted so that
+# spectral limit 2 / (stiffness - feed) stays below measured blow up dt
+# (1.49 - 1.62 for feed 0.018 - 0.07, kill 0.051 - 0.065, 128x128 periodic
+# grid with seeded squares)
+REACTION_STIFFNESS = 1.4
+
+class GrayScott:
+
+    """
+    Gray-Scott reaction-diffusion on 2D grid:
+        A' = A + dt * (dA * lap(A) - A * B * B + feed * (1 - A))
+        B' = B + dt * (dB * lap(B) + A * B * B - (kill + feed) * B)
+    lap is 3x3 stencil: center -1, edges 0.2, corners 0.05
+
+    A and B are float32 arrays with one ghost cell on every side.
+    Current and next buffers are swapped after every step and stencil
+    temporaries are preallocated, so stepping does not allocate.
+
+    shape: [rows, cols]
+    dt: timestep, largest stable explicit timestep if None
+    boundary: what lies outside grid
+        "dirichlet": fixed A = 1, B = 0 (empty medium)
+        "neumann": copy of border cells (zero flux)
+        "periodic": opposite border (torus)
+    method: time stepping
+        "explicit": forward Euler, dt is limited by give_stable_dt
+        "spectral": diffusion and decay solved implicitly with FFT, reaction
+                    explicitly, only for periodic boundary. dt is not limited
+                    by diffusion but by reaction (give_spectral_dt), so with
+                    default parameters it allows about 1.5 against 1.21 of
+                    explicit method: no large dt speedup, steps cost more
+                    (FFTs). Allocates FFT buffers every step. Raises
+                    ValueError if fields stop being finite.
+    max_dt: largest dt of spectral method, give_spectral_dt if None
+    """
+    def __init__(self,
+                 shape,
+                 dA=1.0,
+                 dB=0.5,
+                 feed=0.055,
+                 kill=0.062,
+                 dt=1.0,
+                 boundary="dirichlet",
+                 method="explicit",
+                 max_dt=None):
+
+        if boundary not in BOUNDARIES:
+            raise ValueError("boundary must be one of " + ", ".join(BOUNDARIES))
+
+        if method not in METHODS:
+            raise ValueError("method must be one of " + ", ".join(METHODS))
+
+        if method == "spectral" and boundary != "periodic":
+            raise ValueError("spectral method needs periodic boundary")
+
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.dA = dA
+        self.dB = dB
+        self.feed = feed
+        self.kill = kill
+        self.boundary = boundary
+        self.method = method
+
+        self.dt = self.give_stable_dt() if dt is None else dt
+        if method == "explicit" and self.dt > self.give_stable_dt(safety=1.0):
+            raise ValueError("dt " + str(self.dt) + " is unstable for explicit method, "
+                             "largest stable dt is " + str(self.give_stable_dt(safety=1.0)) +
+                             ", use dt=None or method='spectral'")
+
+        self.max_dt = self.give_spectral_dt() if max_dt is None else max_dt
+        if method == "spectral" and self.dt > self.max_dt:
+            raise ValueError("dt " + str(self.dt) + " is unstable for spectral method, "
+                             "explicit reaction limits dt to " + str(self.max_dt))
+
+        padded = (self.shape[0] + 2, self.shape[1] + 2)
+        self.grid_A = np.ones(padded, dtype=np.float32)
+        self.grid_B = np.zeros(padded, dtype=np.float32)
+        self.next_A = np.ones(padded, dtype=np.float32)
+        self.next_B = np.zeros(padded, dtype=np.float32)
+
+        # stencil and reaction temporaries
+        self.lap = np.empty(self.shape, dtype=np.float32)
+        self.tmp = np.empty(self.shape, dtype=np.float32)
+        self.reaction = np.empty(self.shape, dtype=np.float32)
+
+        if method == "spectral":
+            self.init_spectral()
+
+        self.n_steps = 0
+
+    """
+    Largest stable timestep of explicit method times safety.
+    Forward Euler of u' = -r * u is stable for dt * r <= 2, here r is
+    diffusion (D * largest stencil eigenvalue) plus linear decay of A (feed)
+    and B (kill + feed). Reaction A * B * B is not included
+    """
+    def give_stable_dt(self, safety=0.9):
+
+        rate_A = self.dA * STENCIL_MAX_EIGENVALUE + self.feed
+        rate_B = self.dB * STENCIL_MAX_EIGENVALUE + self.kill + self.feed
+
+        return safety * 2.0 / max(rate_A, rate_B)
+
+    """
+    Largest timestep of spectral method estimated from parameters.
+    Explicit reaction step (REACTION_STIFFNESS) damped by implicit decay of A
+    must not grow: |1 - dt * stiffness| <= 1 + dt * feed
+    """
+    def give_spectral_dt(self):
+
+        return 2.0 / (REACTION_STIFFNESS - self.feed)
+
+    """
+    Implicit factors of Fourier modes for diffusion and linear decay:
+        A: 1 / (1 + dt * (feed - dA * lap(k)))
+        B: 1 / (1 + dt * (kill + feed - dB * lap(k)))
+    lap(k) is eigenvalue of 3x3 stencil for mode k
+    """
+    def init_spectral(self):
+
+        kx = 2 * np.pi * np.fft.fftfreq(self.shape[0])[:, np.newaxis]
+        ky = 2 * np.pi * np.fft.rfftfreq(self.shape[1])[np.newaxis, :]
+        symbol = -1 + 0.4 * (np.cos(kx) + np.cos(ky)) + 0.2 * np.cos(kx) * np.cos(ky)
+
+        self.implicit_A = 1 / (1 + self.dt * (self.feed - self.dA * symbol))
+        self.implicit_B = 1 / (1 + self.dt * (self.kill + self.feed - self.dB * symbol))
+
+    """
+    Concentration A of grid (view, no ghost cells)
+    """
+    @property
+    def A(self):
+        return self.grid_A[1:-1, 1:-1]
+
+    """
+    Concentration B of grid (view, no ghost cells)
+    """
+    @property
+    def B(self):
+        return self.grid_B[1:-1, 1:-1]
+
+    """
+    Set B in rectangle rows x cols (slices) to value
+    """
+    def seed(self, rows, cols, value=1.0):
+
+        self.B[rows, cols] = value
+
+    """
+    Fill ghost cells of padded grid according to boundary,
+    outside is value of field in empty medium (dirichlet)
+    """
+    def fill_ghosts(self, grid, outside):
+
+        if self.boundary == "dirichlet":
+            grid[0, :] = outside
+            grid[-1, :] = outside
+            grid[:, 0] = outside
+            grid[:, -1] = outside
+
+        elif self.boundary == "neumann":
+            grid[0, 1:-1] = grid[1, 1:-1]
+            grid[-1, 1:-1] = grid[-2, 1:-1]
+            grid[:, 0] = grid[:, 1]
+            grid[:, -1] = grid[:, -2]
+
+        else:
+            grid[0, 1:-1] = grid[-2, 1:-1]
+            grid[-1, 1:-1] = grid[1, 1:-1]
+            grid[:, 0] = grid[:, -2]
+            grid[:, -1] = grid[:, 1]
+
+    """
+    lap(grid) of interior cells written to self.lap
+    """
+    def laplace(self, grid):
+
+        lap = self.lap
+        tmp = self.tmp
+
+        # edges
+        np.add(grid[:-2, 1:-1], grid[2:, 1:-1], out=lap)
+        lap += grid[1:-1, :-2]
+        lap += grid[1:-1, 2:]
+        lap *= 0.2
+
+        # corners
+        np.add(grid[:-2, :-2], grid[:-2, 2:], out=tmp)
+        tmp += grid[2:, :-2]
+        tmp += grid[2:, 2:]
+        tmp *= 0.05
+
+        lap += tmp
+        lap -= grid[1:-1, 1:-1]
+
+        return lap
+
+    """
+    Advance n_steps timesteps
+    """
+    def step(self, n_steps=1):
+
+        if self.method == "spectral":
+            self.step_spectral(n_steps)
+            return
+
+        for s in range(n_steps):
+
+            self.fill_ghosts(self.grid_A, 1.0)
+            self.fill_ghosts(self.grid_B, 0.0)
+
+            A = self.grid_A[1:-1, 1:-1]
+            B = self.grid_B[1:-1, 1:-1]
+            reaction = self.reaction
+            tmp = self.tmp
+
+            # A * B * B
+            np.multiply(B, B, out=reaction)
+            reaction *= A
+
+            # A' = A + dt * (dA * lap(A) - A * B * B + feed * (1 - A))
+            lap = self.laplace(self.grid_A)
+            lap *= self.dA
+            lap -= reaction
+            np.subtract(1.0, A, out=tmp)
+            tmp *= self.feed
+            lap += tmp
+            lap *= self.dt
+            np.add(A, lap, out=self.next_A[1:-1, 1:-1])
+
+            # B' = B + dt * (dB * lap(B) + A * B * B - (kill + feed) * B)
+            lap = self.laplace(self.grid_B)
+            lap *= self.dB
+            lap += reaction
+            np.multiply(B, self.kill + self.feed, out=tmp)
+            lap -= tmp
+            lap *= self.dt
+            np.add(B, lap, out=self.next_B[1:-1, 1:-1])
+
+            self.grid_A, self.next_A = self.next_A, self.grid_A
+            self.grid_B, self.next_B = self.next_B, self.grid_B
+
+            self.n_steps += 1
+
+    """
+    Advance n_steps timesteps with spectral method: reaction A * B * B
+    and feed explicitly, then diffusion and decay implicitly in Fourier space
+    """
+    def step_spectral(self, n_steps):
+
+        for s in range(n_steps):
+
+            A = self.grid_A[1:-1, 1:-1]
+            B = self.grid_B[1:-1, 1:-1]
+            reaction = self.reaction
+            tmp = self.tmp
+
+            # A * B * B
+            np.multiply(B, B, out=reaction)
+            reaction *= A
+
+            # A + dt * (feed - A * B * B)
+            np.subtract(self.feed, reaction, out=tmp)
+            tmp *= self.dt
+            tmp += A
+            A[...] = np.fft.irfft2(np.fft.rfft2(tmp) * self.implicit_A, s=self.shape)
+
+            # B + dt * A * B * B
+            np.multiply(reaction, self.dt, out=tmp)
+            tmp += B
+            B[...] = np.fft.irfft2(np.fft.rfft2(tmp) * self.implicit_B, s=self.shape)
+
+            self.n_steps += 1
+
+        # reaction limit depends on parameters, catch blow up
+        if not (np.isfinite(self.grid_A).all() and np.isfinite(self.grid_B).all()):
+            raise ValueError("spectral step diverged after " + str(self.n_steps) +
+                             " steps, reduce dt (now " + str(self.dt) + ")")
+
+"""
+Advance rd (GrayScott or TiledGrayScott) by at most max_steps timesteps.
+Every check_every steps root mean square change of A and B in one step is
+measured, when it drops below tol pattern is steady and run stops.
+Returns (steps done, steps saved)
+"""
+def run_until_steady(rd, max_steps, tol=1e-6, check_every=50):
+
+    previous_A = np.empty(rd.shape, dtype=np.float32)
+    previous_B = np.empty(rd.shape, dtype=np.float32)
+    diff = np.empty(rd.shape, dtype=np.float32)
+
+    done = 0
+    while done < max_steps:
+
+        n = min(check_every, max_steps - done)
+
+        # change in last step of chunk
+        rd.step(n - 1)
+        np.copyto(previous_A, rd.A)
+        np.copyto(previous_B, rd.B)
+        rd.step(1)
+        done += n
+
+        np.subtract(rd.A, previous_A, out=diff)
+        change = np.dot(diff.ravel(), diff.ravel())
+        np.subtract(rd.B, previous_B, out=diff)
+        change += np.dot(diff.ravel(), diff.ravel())
+
+        if np.sqrt(change / diff.size) < tol:
+            break
+
+    return done, max_steps - done
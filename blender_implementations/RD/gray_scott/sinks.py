@@ -0,0 +1,180 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+import struct
+import zlib
+
+import numpy as np
+
+"""
+Sinks take fields A and B of reaction-diffusion (rows x cols).
+Grid row i is image column x = i and grid col j is image row y = j
+(as set_pixel in RD.py), A goes to red and B to green channel.
+"""
+
+"""
+RGBA image (height x width x 4, float32) of fields in one vectorized pass.
+Row 0 is bottom row of image (Blender pixel order)
+"""
+def give_rgba(A, B):
+
+    rgba = np.empty((A.shape[1], A.shape[0], 4), dtype=np.float32)
+    rgba[:, :, 0] = A.T
+    rgba[:, :, 1] = B.T
+    rgba[:, :, 2] = 0.0
+    rgba[:, :, 3] = 1.0
+
+    return rgba
+
+class BlenderImageSink:
+
+    """
+    Writes fields to Blender image of size rows x cols with one bulk
+    assignment of flat RGBA buffer (no per-pixel RNA calls).
+    bpy is not needed to import this module
+    """
+    def __init__(self, image):
+
+        self.image = image
+
+    def write(self, A, B):
+
+        pixels = give_rgba(A, B).ravel()
+
+        if hasattr(self.image.pixels, "foreach_set"):
+            self.image.pixels.foreach_set(pixels)
+        else:
+            self.image.pixels[:] = pixels
+
+        self.image.update()
+
+class PngSink:
+
+    """
+    RGBA PNG, 8 or 16 bits per channel, values are clipped to [0, 1].
+    Written with zlib, no image library needed
+    """
+    def __init__(self, path, bits=8):
+
+        if bits not in (8, 16):
+            raise ValueError("bits must be 8 or 16")
+
+        self.path = path
+        self.bits = bits
+
+    def write(self, A, B):
+
+        # PNG rows go from top to bottom
+        rgba = np.clip(give_rgba(A, B)[::-1], 0.0, 1.0)
+        height, width = rgba.shape[:2]
+
+        if self.bits == 8:
+            data = np.round(rgba * 255).astype(np.uint8)
+        else:
+            data = np.round(rgba * 65535).astype(">u2")
+
+        # every scanline starts with filter type 0
+        raw = np.zeros((height, 1 + data[0].nbytes), dtype=np.uint8)
+        raw[:, 1:] = data.reshape(height, -1).view(np.uint8)
+
+        def chunk(tag, payload):
+            return (struct.pack(">I", len(payload)) + tag + payload +
+                    struct.pack(">I", zlib.crc32(tag + payload) & 0xffffffff))
+
+        header = struct.pack(">IIBBBBB", width, height, self.bits, 6, 0, 0, 0)
+
+        with open(self.path, "wb") as out:
+            out.write(b"\x89PNG\r\n\x1a\n")
+            out.write(chunk(b"IHDR", header))
+            out.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)))
+            out.write(chunk(b"IEND", b""))
+
+class ExrSink:
+
+    """
+    Uncompressed scanline OpenEXR with float32 RGBA channels, values are
+    not clipped. Written with struct, no image library needed
+    """
+    def __init__(self, path):
+
+        self.path = path
+
+    def write(self, A, B):
+
+        # EXR scanlines go from top to bottom
+        rgba = give_rgba(A, B)[::-1]
+        height, width = rgba.shape[:2]
+
+        def attribute(name, kind, value):
+            return name + b"\0" + kind + b"\0" + struct.pack("<i", len(value)) + value
+
+        # channels are stored in alphabetical order, 2: FLOAT
+        names = [b"A", b"B", b"G", b"R"]
+        channels = b"".join(name + b"\0" + struct.pack("<iB3xii", 2, 0, 1, 1) for name in names) + b"\0"
+        window = struct.pack("<iiii", 0, 0, width - 1, height - 1)
+
+        header = (struct.pack("<ii", 20000630, 2) +
+                  attribute(b"channels", b"chlist", channels) +
+                  attribute(b"compression", b"compression", b"\0") +
+                  attribute(b"dataWindow", b"box2i", window) +
+                  attribute(b"displayWindow", b"box2i", window) +
+                  attribute(b"lineOrder", b"lineOrder", b"\0") +
+                  attribute(b"pixelAspectRatio", b"float", struct.pack("<f", 1.0)) +
+                  attribute(b"screenWindowCenter", b"v2f", struct.pack("<ff", 0.0, 0.0)) +
+                  attribute(b"screenWindowWidth", b"float", struct.pack("<f", 1.0)) +
+                  b"\0")
+
+        # one block per scanline: y, size, then every channel of the line
+        planes = rgba[:, :, [3, 2, 1, 0]].transpose(0, 2, 1).astype("<f4")
+        line_size = planes[0].nbytes
+        block_size = 8 + line_size
+
+        first = len(header) + 8 * height
+        offsets = first + block_size * np.arange(height, dtype="<u8")
+
+        blocks = np.zeros((height, block_size), dtype=np.uint8)
+        blocks[:, :8] = np.stack((np.arange(height), np.full(height, line_size)), axis=1).astype("<i4").view(np.uint8)
+        blocks[:, 8:] = planes.reshape(height, -1).view(np.uint8)
+
+        with open(self.path, "wb") as out:
+            out.write(header)
+            out.write(offsets.tobytes())
+            out.write(blocks.tobytes())
+
+SINKS = {".png": PngSink, ".exr": ExrSink}
+
+"""
+Image sink chosen by file extension (.png, .exr)
+"""
+def give_image_sink(path):
+
+    extension = path[path.rfind("."):].lower()
+
+    if extension not in SINKS:
+        raise ValueError("image must be one of " + ", ".join(SINKS))
+
+    return SINKS[extension](path)
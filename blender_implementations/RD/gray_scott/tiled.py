@@ -0,0 +1,163 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .engine import GrayScott
+
+class Tile:
+
+    """
+    GrayScott on strip of rows plus halo rows of neighbour strips
+
+    engine: GrayScott of tile rows
+    rows: global rows of tile (halo and strip), wrapped for periodic boundary
+    strip: slice of global rows owned by tile
+    core: slice of tile rows which are its strip
+    """
+    def __init__(self, engine, rows, strip, core):
+
+        self.engine = engine
+        self.rows = rows
+        self.strip = strip
+        self.core = core
+
+class TiledGrayScott:
+
+    """
+    Gray-Scott reaction-diffusion split into strips of rows for multicore.
+
+    Every tile is GrayScott on its strip plus halo rows of neighbour strips
+    (wrapped for periodic boundary). Stencil reaches one row per step, so
+    tile can advance halo steps before wrong values from its ghost rows reach
+    its own strip. Then strips are gathered into global A and B and halos are
+    refilled from them.
+    Tiles run in a thread pool, numpy kernels release GIL on large arrays.
+    Result is same as with GrayScott on whole grid.
+
+    shape: [rows, cols]
+    n_tiles: number of strips, number of cores if None
+    halo: rows of halo, timesteps between halo exchanges
+    n_threads: threads of pool, n_tiles if None
+    other arguments are same as for GrayScott
+    """
+    def __init__(self,
+                 shape,
+                 dA=1.0,
+                 dB=0.5,
+                 feed=0.055,
+                 kill=0.062,
+                 dt=1.0,
+                 boundary="dirichlet",
+                 n_tiles=None,
+                 halo=8,
+                 n_threads=None):
+
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.boundary = boundary
+        self.halo = max(1, min(halo, self.shape[0]))
+
+        if n_tiles is None:
+            n_tiles = os.cpu_count() or 1
+        n_tiles = max(1, min(n_tiles, self.shape[0]))
+
+        self.A = np.ones(self.shape, dtype=np.float32)
+        self.B = np.zeros(self.shape, dtype=np.float32)
+
+        # strips [start, end) of rows, halo rows outside grid only for periodic
+        bounds = np.linspace(0, self.shape[0], n_tiles + 1).astype(int)
+        self.tiles = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+
+            if boundary == "periodic":
+                top = self.halo
+                bottom = self.halo
+            else:
+                top = min(self.halo, start)
+                bottom = min(self.halo, self.shape[0] - end)
+
+            engine = GrayScott([top + end - start + bottom, self.shape[1]],
+                               dA=dA, dB=dB, feed=feed, kill=kill, dt=dt,
+                               boundary=boundary)
+            self.tiles.append(Tile(engine,
+                                   np.arange(start - top, end + bottom) % self.shape[0],
+                                   slice(start, end),
+                                   slice(top, top + end - start)))
+
+        self.pool = ThreadPoolExecutor(max_workers=n_threads or len(self.tiles))
+        self.n_steps = 0
+
+    """
+    Set B in rectangle rows x cols (slices) to value
+    """
+    def seed(self, rows, cols, value=1.0):
+
+        self.B[rows, cols] = value
+
+    """
+    Fill tile (strip and halo) from global grid and advance n_steps.
+    Only reads global grid
+    """
+    def advance_tile(self, tile, n_steps):
+
+        np.take(self.A, tile.rows, axis=0, out=tile.engine.A)
+        np.take(self.B, tile.rows, axis=0, out=tile.engine.B)
+        tile.engine.step(n_steps)
+
+    """
+    Copy strip of tile to global grid. Strips do not overlap
+    """
+    def gather_tile(self, tile):
+
+        self.A[tile.strip] = tile.engine.A[tile.core]
+        self.B[tile.strip] = tile.engine.B[tile.core]
+
+    """
+    Advance n_steps timesteps, halos are exchanged every halo steps
+    """
+    def step(self, n_steps=1):
+
+        while n_steps > 0:
+
+            n = min(self.halo, n_steps)
+
+            # all tiles read global grid before any of them writes to it
+            list(self.pool.map(lambda tile: self.advance_tile(tile, n), self.tiles))
+            list(self.pool.map(self.gather_tile, self.tiles))
+
+            n_steps -= n
+            self.n_steps += n
+
+    """
+    Stop thread pool
+    """
+    def close(self):
+
+        self.pool.shutdown()
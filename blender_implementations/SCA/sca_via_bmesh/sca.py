@@ -9,52 +9,40 @@ IMPORTS
 
 ########################### STANDARD IMPORTS ################################
 import numpy as np 
-import copy
 import math
 import bpy
 import os
+import sys
+
+########################## PROJECT IMPORTS ##################################
+# branch store lives in blender_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from branch_store import BranchStore
 
 """ *************************************************************************
-CLASS
-Helper class: defining one branch:
-    + starting point of branch is position of parent
-    + ending point of branch is position
-    + direction of growth is direction
+PUBLIC HELPER FUNCTION
+Index of and distance to closest target for every point
+Distance matrix is computed in chunks of points, so that at most
+chunk_size distances are held in memory at once
+    points: (n, 3) array
+    targets: (m, 3) array
 ************************************************************************* """
-class Branch():
+def give_closest(points, targets, chunk_size=2**20):
 
-    """ **********************************************************************
-    CONSTRUCTOR
-    ********************************************************************** """
-    def __init__(self, position, parent, direction):
+    closest = np.empty(len(points), dtype=np.int64)
+    dist = np.empty(len(points))
 
-        # user defined
-        self.position = position
-        self.parent = parent
-        self.direction = direction
+    step = max(1, chunk_size // max(1, len(targets)))
 
-        # additional variables
-        self.count = 0
-        self.original_direction = copy.copy(direction)
-        
+    for start in range(0, len(points), step):
 
-    """ ******************************************************************
-    PUBLIC HELPER FUNCTION
-    Resets direction of growth and number of leaf influenced the direction
-    ****************************************************************** """
-    def reset(self):
-            self.direction = copy.copy(self.original_direction)
-            self.count = 0
+        chunk = points[start:start+step]
+        dists = np.linalg.norm(chunk[:, np.newaxis, :] - targets[np.newaxis, :, :], axis=2)
 
-    """ ******************************************************************
-    PUBLIC HELPER FUNCTION
-    Create new branch using direction and position of existing one
-    ****************************************************************** """
-    def give_next_branch(self):
-        next_position = np.array(self.position) + np.array(self.direction)
-        next_branch = Branch(next_position, self, copy.copy(self.direction))
-        return next_branch
+        closest[start:start+step] = np.argmin(dists, axis=1)
+        dist[start:start+step] = dists[np.arange(len(chunk)), closest[start:start+step]]
 
+    return closest, dist
 
 """ *********************************************************************
 CLASS
@@ -124,15 +112,16 @@ class SCA():
         self.leaves = []
         for i in range(self.n_leaves):
             self.leaves.append(Leaf(self.leaf_cloud_center, self.leaves_spread))
+        self.leaf_positions = np.array([leaf.position for leaf in self.leaves])
 
         # create root of the tree (point without parent) and turn its direction to leafs
-        self.branches = []
-        self.root = Branch(self.root_position, None, None)
+        self.branches = BranchStore()
+        self.branches.append(self.root_position, -1, [0, 0, 0])
+        self.root = self.branches[0]
         closest_leaf_to_root = self.find_closest_leaf_to_branch(self.root)
-        root_direction = np.array(closest_leaf_to_root.position) - np.array(self.root.position)
+        root_direction = np.array(closest_leaf_to_root.position) - np.array(self.root_position)
         root_direction /= np.linalg.norm(root_direction)
-        self.root.direction = root_direction
-        self.branches.append(self.root)
+        self.branches.directions[0] = root_direction
 
 
     """ *********************************************************************
@@ -141,18 +130,9 @@ class SCA():
     ********************************************************************* """
     def find_closest_leaf_to_branch(self, branch):
 
-        # random ini
-        closest_dist = math.inf
-        closest_leaf = self.leaves[0]
+        dists = np.linalg.norm(self.leaf_positions - np.array(branch.position), axis=1)
 
-        # find closest leaf
-        for leaf in self.leaves:
-            dist = np.linalg.norm(np.array(leaf.position)-np.array(branch.position))
-            if dist < closest_dist:
-                closest_dist = dist
-                closest_leaf = leaf
-
-        return closest_leaf
+        return self.leaves[np.argmin(dists)]
 
     """ *********************************************************************
     PUBLIC FUNCTION
@@ -171,83 +151,75 @@ class SCA():
     ********************************************************************* """
     def grow_to_point_cloud(self):
 
-        curr_branch = self.root 
+        curr_branch = self.root.index
         found = False
 
         while not found:
 
-            for i in range(self.n_leaves):
-
-                dist = np.linalg.norm(np.array(self.leaves[i].position)-np.array(curr_branch.position))
+            position = self.branches.positions[curr_branch]
+            direction = self.branches.directions[curr_branch]
+            dists = np.linalg.norm(self.leaf_positions - position, axis=1)
 
-                if dist < self.growth_dist['max']:
-                    found = True
+            if np.min(dists) < self.growth_dist['max']:
+                found = True
 
-            # create a new branch
+            # create a new branch in direction of current one
             if not found:
-
-                branch = curr_branch.give_next_branch()
-                curr_branch = branch
-                self.branches.append(curr_branch)
+                curr_branch = self.branches.append(position + direction, curr_branch, direction)
 
     """ *********************************************************************
     PUBLIC FUNCTION
     When branch is reached the leaf cloud start growing branches in leaf cloud
+    Every iteration (on arrays of positions):
+        + every not reached leaf is associated with its closest branch
+        + leaves closer than min growth distance are reached
+        + every pulled branch grows one new branch in mean direction of its leaves
+    All branches grown in one iteration are added to branch store at once
+    max_iter: scalar, maximal number of iterations
     ********************************************************************* """
-    def grow_through_point_cloud(self):
-
-        # number of reached leaves
-        n_reached = 0
-
-        # grow branches as long exist leaves that are not close to branches 
-        while n_reached <= self.n_leaves:
-
-            # for every leaf
-            for leaf in self.leaves:
-
-                # check if it is not reached
-                if leaf.reached == True:
-                    continue
-
-                closest_branch = None
-                record = math.inf
+    def grow_through_point_cloud(self, max_iter=1000):
 
-                # try to find closest branch 
-                for branch in self.branches:
+        # direction of last growth of every branch. Branch pulled the same way
+        # again would grow on top of its previous child
+        last_growth = np.full((len(self.branches), 3), np.nan)
 
-                    dist = np.linalg.norm(np.array(leaf.position) - np.array(branch.position))
+        active = np.arange(self.n_leaves)
 
-                    # for current branch leaf is too close. Leaf should not be considered
-                    if dist < self.growth_dist['min']:
-                        leaf.riched = True
-                        n_reached += 1
-                        closest_branch = None
-                        break
+        for iteration in range(max_iter):
 
-                    # if current branch is closest or no closest branch exists
-                    elif closest_branch == None or dist < record:
-                        closest_branch = branch
-                        record = dist
+            positions = self.branches.positions[:len(self.branches)]
+            closest, dist = give_closest(self.leaf_positions[active], positions)
 
-                # for found clostest branch change direction to current leaf
-                if closest_branch != None:
+            # leaves too close to a branch should not be considered anymore
+            reached = dist < self.growth_dist['min']
+            for leaf in active[reached]:
+                self.leaves[leaf].reached = True
 
-                    new_direction = np.array(leaf.position) - np.array(closest_branch.position)
-                    new_direction = new_direction / np.linalg.norm(new_direction)
-                    closest_branch.direction = new_direction
-                    closest_branch.count += 1 
+            active = active[~reached]
+            closest = closest[~reached]
+            dist = dist[~reached]
 
+            if len(active) == 0:
+                break
 
-                # grow branches according to number of times extended
-                for branch in self.branches:
+            # sum of normalized directions to leaves for every pulled branch
+            directions = (self.leaf_positions[active] - positions[closest]) / dist[:, np.newaxis]
+            pulled, slot = np.unique(closest, return_inverse=True)
+            summed = np.zeros((len(pulled), 3))
+            np.add.at(summed, slot, directions)
 
-                    # if leaf was influencing the branch add new branch in its direction
-                    if branch.count > 0:
+            norms = np.linalg.norm(summed, axis=1)
+            grows = norms > 1e-9
+            directions = summed / np.where(grows, norms, 1)[:, np.newaxis]
+            grows &= ~np.all(np.abs(directions - last_growth[pulled]) < 1e-6, axis=1)
 
-                        branch.direction /= branch.count
-                        new_position = branch.position + branch.direction
-                        new_branch = Branch(new_position, branch, copy.copy(branch.direction))
+            if not np.any(grows):
+                break
 
-                        self.branches.append(new_branch) 
+            # add all new branches at once
+            pulled = pulled[grows]
+            directions = directions[grows]
+            last_growth[pulled] = directions
 
-                    branch.reset()
+            self.branches.extend(positions[pulled] + directions, pulled, directions)
+            last_growth = np.concatenate((last_growth, np.full(directions.shape, np.nan)))
@@ -9,95 +9,16 @@ IMPORTS
 
 ########################### STANDARD IMPORTS ################################
 import numpy as np 
-import copy
 import math
 import bpy
 import os
+import sys
 
-""" *************************************************************************
-CLASS
-Helper class: defining one branch:
-    + starting point of branch is position of parent
-    + ending point of branch is position
-    + direction of growth is direction
-************************************************************************* """
-class Branch():
-
-    """ **********************************************************************
-    CONSTRUCTOR
-    ********************************************************************** """
-    def __init__(self, position, parent, direction):
-
-        # user defined
-        self.position = position
-        self.parent = parent
-        self.direction = direction
-
-        # additional variables
-        self.count = 0
-        self.original_direction = copy.copy(direction)
-
-    """ ******************************************************************
-    PUBLIC HELPER FUNCTION
-    Resets direction of growth and number of leaf influenced the direction
-    ****************************************************************** """
-    def reset(self):
-            self.direction = copy.copy(self.original_direction)
-            self.count = 0
-
-    """ ******************************************************************
-    PUBLIC HELPER FUNCTION
-    Create new branch using direction and position of existing one
-    ****************************************************************** """
-    def give_next_branch(self):
-        next_position = np.array(self.position) + np.array(self.direction)
-        next_branch = Branch(next_position, self, copy.copy(self.direction))
-        return next_branch
-
-    """ ******************************************************************
-    PUBLIC HELPER FUNCTION
-    Using Blender metamesh display branch between parent and current branch
-    ****************************************************************** """
-    def show(self, mball, n_samples):
-
-        # NOTE if distance between parent and current branch is large use interpolation
-    
-        element = mball.elements.new()
-        element.co = self.position
-        element.radius = 1.0
-
-        
-    """ ******************************************************************
-    PUBLIC HELPER FUNCTION
-    Using Blender cylinder mesh display branch between parent and current branch
-    # alternatively add sphere mesh instead of cylinder
-    #bpy.ops.mesh.primitive_uv_sphere_add(location=pos, size=0.4, segments=5)
-    ****************************************************************** """
-    def show_tubular(self, thickness):
-
-        if self.parent == None:
-            return
-
-        dx = self.position[0] - self.parent.position[0]
-        dy = self.position[1] - self.parent.position[1]
-        dz = self.position[2] - self.parent.position[2]
-
-        dist = math.sqrt(dx ** 2 + dy ** 2 + dz ** 2)
-
-        bpy.ops.mesh.primitive_cylinder_add(radius=thickness,
-                                            depth=dist,
-                                            location=(dx + self.position[0],
-                                                      dy + self.position[1],
-                                                      dz + self.position[2]))
-        
-        phi = math.atan2(dy, dx)
-        theta = math.acos(dz/dist)
-
-        bpy.context.object.rotation_euler[1] = theta
-        bpy.context.object.rotation_euler[2] = phi
-
-
-
+########################## PROJECT IMPORTS ##################################
+# branch store and frame rendering live in blender_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from branch_store import BranchStore
+from render_queue import give_renderer
 
 """ *********************************************************************
 CLASS
@@ -126,6 +47,82 @@ class Leaf():
     def show(self, radius):
         bpy.ops.mesh.primitive_cube_add(location=self.position, radius=radius)
 
+""" *********************************************************************
+CLASS
+Uniform grid index of points (branches or leaves). Grid cells hold row
+indices into positions array owned by caller (e.g. BranchStore.positions),
+positions are not copied. Grid cell size equals influence distance, so every
+point within influence distance of a position lies in 3x3x3 cells around it.
+********************************************************************* """
+class PointIndex():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+    cell_size: scalar, influence distance
+    ********************************************************************* """
+    def __init__(self, cell_size):
+
+        self.cell_size = cell_size
+        self.cells = {}
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Grid cell of position
+    ********************************************************************* """
+    def key(self, position):
+
+        return (int(math.floor(position[0] / self.cell_size)),
+                int(math.floor(position[1] / self.cell_size)),
+                int(math.floor(position[2] / self.cell_size)))
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Put row index of point at position into its grid cell
+    ********************************************************************* """
+    def add(self, index, position):
+
+        key = self.key(position)
+        if key not in self.cells:
+            self.cells[key] = []
+        self.cells[key].append(index)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Indices of and distances to all points closer than cell_size to position
+    positions: (N, 3) array which added indices point into
+    ********************************************************************* """
+    def find_near(self, position, positions):
+
+        i, j, k = self.key(position)
+
+        candidates = []
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for dk in (-1, 0, 1):
+                    candidates.extend(self.cells.get((i+di, j+dj, k+dk), ()))
+
+        candidates = np.array(candidates, dtype=np.int64)
+        dists = np.linalg.norm(positions[candidates] - position, axis=1)
+        near = dists < self.cell_size
+
+        return candidates[near], dists[near]
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Index of and distance to closest point within cell_size from position.
+    (None, math.inf) if there is none
+    ********************************************************************* """
+    def find_closest(self, position, positions):
+
+        candidates, dists = self.find_near(position, positions)
+
+        if len(candidates) == 0:
+            return None, math.inf
+
+        closest = np.argmin(dists)
+
+        return candidates[closest], dists[closest]
+
 """ *********************************************************************
 CLASS
 Defining Tree as branches and leaves
@@ -154,26 +151,56 @@ class Tree():
         
         # additional variables
         self.leaves = []
-        self.branches = []
+        self.branches = BranchStore()
+        self.branch_index = PointIndex(self.max_dist)
+        self.leaf_index = PointIndex(self.max_dist)
         for i in range(self.n_leaves):
             self.leaves.append(Leaf(self.leaves_xy_spread, self.leaves_z_spread))
+            self.leaf_index.add(i, self.leaves[i].position)
+        self.leaf_positions = np.array([leaf.position for leaf in self.leaves]).reshape(-1, 3)
+        for i in range(self.n_leaves):
+            self.leaves[i].position = self.leaf_positions[i]
+
+        # for every leaf closest branch in influence distance (-1: none)
+        # updated only around new branches
+        self.leaf_closest = np.full(self.n_leaves, -1, dtype=np.int64)
+        self.leaf_dist = np.full(self.n_leaves, math.inf)
+        self.leaf_reached = np.zeros(self.n_leaves, dtype=bool)
 
         # create root of the tree (point without parent) and turn its direction to leafs
-        self.root = Branch(self.root_position, None, None)
-        closest_leaf_to_root = self.find_closest_leaf_to_branch(self.root)
-        root_direction = np.array(closest_leaf_to_root.position) - np.array(self.root.position)
+        closest_leaf_to_root = self.find_closest_leaf_to_position(self.root_position)
+        root_direction = np.array(closest_leaf_to_root.position) - np.array(self.root_position)
         root_direction /= np.linalg.norm(root_direction)
-        self.root.direction = root_direction
 
         # add root to branches
-        self.branches.append(self.root)
+        self.add_branch(self.root_position, -1, root_direction)
+        self.root = self.branches[0]
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Add branch to branch store and to spatial index and return its index.
+    Leaves around new branch for which it is closer than their closest
+    branch are updated
+    ********************************************************************* """
+    def add_branch(self, position, parent, direction):
+
+        index = self.branches.append(position, parent, direction)
+        position = self.branches.positions[index]
+        self.branch_index.add(index, position)
+
+        leaves, dists = self.leaf_index.find_near(position, self.leaf_positions)
+        closer = dists < self.leaf_dist[leaves]
+        self.leaf_closest[leaves[closer]] = index
+        self.leaf_dist[leaves[closer]] = dists[closer]
+
+        return index
 
 
     """ *********************************************************************
     PRIVATE HELPER FUNCTION
-    For given branch (think of branch as point!) find closest leaf
+    For given position find closest leaf
     ********************************************************************* """
-    def find_closest_leaf_to_branch(self, branch):
+    def find_closest_leaf_to_position(self, position):
 
         # random ini
         closest_dist = math.inf
@@ -181,7 +208,7 @@ class Tree():
 
         # find closest leaf
         for leaf in self.leaves:
-            dist = np.linalg.norm(np.array(leaf.position)-np.array(branch.position))
+            dist = np.linalg.norm(np.array(leaf.position)-np.array(position))
             if dist < closest_dist:
                 closest_dist = dist
                 closest_leaf = leaf
@@ -194,92 +221,86 @@ class Tree():
     ********************************************************************* """
     def grow_to_point_cloud(self):
 
-        curr_branch = self.root 
+        curr_branch = self.root.index
         found = False
 
         while not found:
 
+            position = self.branches.positions[curr_branch]
+            direction = self.branches.directions[curr_branch]
+
             for i in range(self.n_leaves):
 
-                dist = np.linalg.norm(np.array(self.leaves[i].position)-np.array(curr_branch.position))
+                dist = np.linalg.norm(np.array(self.leaves[i].position)-position)
 
                 if dist < self.max_dist:
                     found = True
 
-            # create a new branch
+            # create a new branch in direction of current one
             if not found:
-
-                branch = curr_branch.give_next_branch()
-                curr_branch = branch
-                self.branches.append(curr_branch)
+                curr_branch = self.add_branch(position + direction, curr_branch, direction)
 
     """ *********************************************************************
     PUBLIC FUNCTION
     When branch is reached the leaf cloud start growing branches in leaf cloud
+    Every leaf knows its closest branch in influence distance (add_branch):
+        + closer than min_dist: leaf is reached and removed
+        + closer than max_dist: leaf pulls its closest branch
+    max_iter: scalar, stop if leaves keep pulling branches without being reached
     ********************************************************************* """
-    def grow_through_point_cloud(self):
+    def grow_through_point_cloud(self, max_iter=1000):
 
         # number of reached leaves
         n_reached = 0
+        n_iter = 0
+        grown = True
 
         # grow branches as long exist leaves that are not close to branches 
-        while n_reached < self.n_leaves:
-
-            # for every leaf
-            for leaf in self.leaves:
-
-                # check if it is not reached
-                if leaf.reached == True:
-                    continue
-
-                closest_branch = None
-                record = math.inf
-
-                # try to find closest branch 
-                for branch in self.branches:
+        while n_reached < self.n_leaves and grown and n_iter < max_iter:
 
-                    dist = np.linalg.norm(np.array(leaf.position) - np.array(branch.position))
+            n_iter += 1
 
-                    # for current branch leaf is too close. Leaf should not be considered
-                    if dist < self.min_dist:
-                        leaf.riched = True
-                        n_reached += 1
-                        closest_branch = None
-                        break
+            # leaves too close to their closest branch should not be considered
+            reached = np.flatnonzero(~self.leaf_reached & (self.leaf_dist < self.min_dist))
+            self.leaf_reached[reached] = True
+            n_reached += len(reached)
+            for leaf in reached:
+                self.leaves[leaf].reached = True
 
-                    # if current branch is closest or no closest branch exists
-                    elif closest_branch == None or dist < record:
-                        closest_branch = branch
-                        record = dist
+            # remaining leaves in influence distance pull their closest branch
+            pulling = np.flatnonzero(~self.leaf_reached & (self.leaf_closest >= 0))
+            closest = self.leaf_closest[pulling]
 
-                # for found clostest branch change direction to current leaf
-                if closest_branch != None:
+            directions = self.leaf_positions[pulling] - self.branches.positions[closest]
+            directions /= self.leaf_dist[pulling][:, np.newaxis]
 
-                    new_direction = np.array(leaf.position) - np.array(closest_branch.position)
-                    new_direction = new_direction / np.linalg.norm(new_direction)
-                    closest_branch.direction = new_direction
-                    closest_branch.count += 1 
+            influenced, slot = np.unique(closest, return_inverse=True)
+            pulled = np.zeros((len(influenced), 3))
+            np.add.at(pulled, slot, directions)
 
+            # grow influenced branches in mean direction of their leaves
+            grown = False
+            for b in range(len(influenced)):
 
-                # grow branches according to number of times extended
-                for branch in self.branches:
+                branch = influenced[b]
+                direction = self.branches.directions[branch] + pulled[b]
+                direction = direction / np.linalg.norm(direction)
+                # in store precision, so repeated pull finds stacked branch at 0
+                new_position = (self.branches.positions[branch] + direction).astype(self.branches.positions.dtype)
 
-                    # if leaf was influencing the branch add new branch in its direction
-                    if branch.count > 0:
-
-                        branch.direction /= branch.count
-                        new_position = branch.position + branch.direction
-                        new_branch = Branch(new_position, branch, copy.copy(branch.direction))
-
-                        self.branches.append(new_branch) 
+                # same leaves pull same branch again: do not stack branches
+                existing, dist = self.branch_index.find_closest(new_position, self.branches.positions)
+                if dist < 1e-6:
+                    continue
 
-                    branch.reset()
+                self.add_branch(new_position, branch, direction)
+                grown = True
 
     """ *********************************************************************
     PUBLIC HELPER FUNCTION
     Using blender mesh display all branches
     ********************************************************************* """
-    def show_branches(self, cnt, iter_render, render_path):
+    def show_branches(self, cnt, iter_render, renderer):
 
         # get active scene
         scene = bpy.context.scene
@@ -297,16 +318,56 @@ class Tree():
             sample += 1
 
             # add metamesh object in branch direction
-            branch.show(mball, 1)
+            self.show_branch(branch, mball, 1)
 
             # add cylinder in branch direction
-            #branch.show_tubular(0.1)
+            #self.show_branch_tubular(branch, 0.1)
 
             # render
             if sample % iter_render == 0:
                 cnt[0] += 1
-                bpy.context.scene.render.filepath = os.path.join(render_path, str(cnt[0]))
-                bpy.ops.render.render(write_still=True)
+                renderer.render(cnt[0])
+
+    """ ******************************************************************
+    PUBLIC HELPER FUNCTION
+    Using Blender metamesh display branch between parent and current branch
+    ****************************************************************** """
+    def show_branch(self, branch, mball, n_samples):
+
+        # NOTE if distance between parent and current branch is large use interpolation
+    
+        element = mball.elements.new()
+        element.co = branch.position
+        element.radius = 1.0
+
+    """ ******************************************************************
+    PUBLIC HELPER FUNCTION
+    Using Blender cylinder mesh display branch between parent and current branch
+    # alternatively add sphere mesh instead of cylinder
+    #bpy.ops.mesh.primitive_uv_sphere_add(location=pos, size=0.4, segments=5)
+    ****************************************************************** """
+    def show_branch_tubular(self, branch, thickness):
+
+        if branch.parent == None:
+            return
+
+        dx = branch.position[0] - branch.parent.position[0]
+        dy = branch.position[1] - branch.parent.position[1]
+        dz = branch.position[2] - branch.parent.position[2]
+
+        dist = math.sqrt(dx ** 2 + dy ** 2 + dz ** 2)
+
+        bpy.ops.mesh.primitive_cylinder_add(radius=thickness,
+                                            depth=dist,
+                                            location=(dx + branch.position[0],
+                                                      dy + branch.position[1],
+                                                      dz + branch.position[2]))
+        
+        phi = math.atan2(dy, dx)
+        theta = math.acos(dz/dist)
+
+        bpy.context.object.rotation_euler[1] = theta
+        bpy.context.object.rotation_euler[2] = phi
 
     """ *********************************************************************
     PUBLIC HELPER FUNCTION
@@ -332,14 +393,15 @@ def main():
 
     # render info
     cnt = [0]
-    render_path = '/home/lovro/Documents/FER/diplomski/growth_models_results/blender_impl/sca/sca_metaball/temp'
-
-    # first tree
-    tree1 = Tree(100, [50,0,0], 10, 2, 50, 5)
-    tree1.show_leaves()
-    tree1.grow_to_point_cloud()
-    tree1.grow_through_point_cloud()
-    tree1.show_branches(cnt, 50, render_path)
+    # queue is closed also if growth fails
+    with give_renderer("sca_metaball") as renderer:
+
+        # first tree
+        tree1 = Tree(100, [50,0,0], 10, 2, 50, 5)
+        tree1.show_leaves()
+        tree1.grow_to_point_cloud()
+        tree1.grow_through_point_cloud()
+        tree1.show_branches(cnt, 50, renderer)
     
     """
     # second tree
@@ -347,14 +409,14 @@ def main():
     tree2.show_leaves()
     tree2.grow_to_point_cloud()
     tree2.grow_through_point_cloud()
-    tree2.show_branches(cnt, 50, render_path)
+    tree2.show_branches(cnt, 50, renderer)
     
     # third tree
     tree3 = Tree(100, [-50,50,50], 10, 2, 70, 5)
     tree3.show_leaves()
     tree3.grow_to_point_cloud()
     tree3.grow_through_point_cloud()
-    tree3.show_branches(cnt, 50, render_path)
+    tree3.show_branches(cnt, 50, renderer)
     """
     
 """ ************************************************************************************** 
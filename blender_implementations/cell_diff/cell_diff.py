@@ -25,42 +25,67 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 #
-
 import numpy as np 
 import bpy
+import heapq
 import os
+import sys
 
+# cell sheet lives next to this script, frame rendering and sphere mesh in
+# blender_implementations/common
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from render_queue import give_renderer
+from sphere_cloud import SphereCloud
+from cell_sheet import CellSheet
+from half_edge import give_grid_triangles
 
 
-class Cell:
 
-    def __init__(self, position, normal, neigh_topology, size):
+class Nutrients:
 
-        self.position = np.array(position)
-        self.normal = np.array(normal)
-        self.size = size
+    def __init__(self, n_cells, nutrient_tresh=5, nutrient_delta=1):
 
-        self.nutrient_level = 0
-        self.nutrient_tresh = 5
-        self.nutrient_delta = 1
+        self.nutrient_tresh = nutrient_tresh
+        self.nutrient_delta = nutrient_delta
 
-        self.neigh_topology = neigh_topology
+        # cell divides when its nutrient level reaches threshold, level is 0
+        # after division, so every cell divides after same number of iterations
+        if nutrient_delta <= 0 or nutrient_tresh % nutrient_delta != 0:
+            raise ValueError("nutrient_tresh must be positive multiple of nutrient_delta")
+        self.period = nutrient_tresh // nutrient_delta
 
-        bpy.ops.mesh.primitive_uv_sphere_add(location=self.position, size=self.size)
-        self.blender_sphere = bpy.context.object
+        # (division iteration, cell) of every cell, cells of same iteration
+        # divide in order of index
+        self.iteration = 0
+        self.queue = []
+        self.schedule(np.arange(n_cells))
 
 
-    def increase_nutrient(self):
+    def schedule(self, cells):
 
-        self.nutrient_level += self.nutrient_delta
+        for cell in cells:
+            heapq.heappush(self.queue, (self.iteration + self.period, int(cell)))
 
-        if self.nutrient_level == self.nutrient_tresh:
 
-            self.nutrient_level = 0
+    def give_differentiating(self):
 
-            return True
-        
-        return False
+        self.iteration += 1
+
+        differentiate = []
+        while self.queue and self.queue[0][0] == self.iteration:
+            differentiate.append(heapq.heappop(self.queue)[1])
+
+        # parents start new period
+        self.schedule(differentiate)
+
+        return np.array(differentiate, dtype=np.int64)
+
+
+    def add_cells(self, new_cells):
+
+        # new cells start with nutrient level 0 in iteration they are created
+        self.schedule(new_cells)
 
 
     
@@ -71,258 +96,81 @@ class organism:
         link_resistance,
         spring_facor,
         planar_factor,
-        bulge_factor
+        bulge_factor,
+        n_cells=8
         ):
 
-        self.cells, self.cells_m = self.init_cells()
+        self.n_cells = n_cells
+        self.sheet = self.init_cells()
+        self.nutrients = Nutrients(len(self.sheet))
         self.link_resistance = link_resistance
         self.spring_factor = spring_facor
         self.planar_factor = planar_factor
         self.bulge_factor = bulge_factor
 
+        # all cells are one mesh object
+        self.spheres = SphereCloud("cell_diff")
+
 
     def init_cells(self):
         
-        cell_matrix = []
-        n_cells = 8
-        pos_x = 0
-        pos_y = 0
+        n_cells = self.n_cells
         x_dist = 0.1
         y_dist = 0.1
 
-        for i in range(n_cells):
-            cells = []
-            pos_x += x_dist
-            pos_y = 0
-            for j in range(n_cells):
-                pos_y += y_dist
-                cell = Cell(np.array([pos_x, pos_y, 0]), [0,0,1.0], None, 0.1)
-                cells.append(cell)
-            cell_matrix.append(cells)
-
-        cell_list = []
-
-        for i in range(1, n_cells-1):
-            for j in range(1, n_cells-1):
-                cell = cell_matrix[i][j]
-                cell_list.append(cell)
-                topology = []
-                topology.append(cell_matrix[i][j+1])
-                topology.append(cell_matrix[i][j-1])
-                topology.append(cell_matrix[i+1][j])
-                topology.append(cell_matrix[i-1][j])
-                topology.append(cell_matrix[i-1][j-1])
-                topology.append(cell_matrix[i-1][j+1])
-                topology.append(cell_matrix[i+1][j-1])
-                topology.append(cell_matrix[i+1][j+1])
-                cell.neigh_topology = topology
-
-        for i in range(1, n_cells-1):
-            j = 0
-            cell = cell_matrix[i][j]
-            cell_list.append(cell)
-            topology = []
-            topology.append(cell_matrix[i-1][j])
-            topology.append(cell_matrix[i+1][j])
-            topology.append(cell_matrix[i-1][j])
-            topology.append(cell_matrix[i+1][j+1])
-            topology.append(cell_matrix[i][j+1])
-            cell.neigh_topology = topology
-
-        for i in range(1, n_cells-1):
-            j = n_cells-1
-            cell = cell_matrix[i][j]
-            cell_list.append(cell)
-            topology = []
-            topology.append(cell_matrix[i+1][j-1])
-            topology.append(cell_matrix[i+1][j])
-            topology.append(cell_matrix[i-1][j-1])
-            topology.append(cell_matrix[i-1][j])
-            topology.append(cell_matrix[i][j-1])
-            cell.neigh_topology = topology
-
-        for j in range(1, n_cells-1):
-            i = 0
-            cell = cell_matrix[i][j]
-            cell_list.append(cell)
-            topology = []
-            topology.append(cell_matrix[i+1][j+1])
-            topology.append(cell_matrix[i+1][j-1])
-            topology.append(cell_matrix[i+1][j-1])
-            topology.append(cell_matrix[i][j+1])
-            topology.append(cell_matrix[i][j-1])
-            cell.neigh_topology = topology
-
-        for j in range(1, n_cells-1):
-            i = n_cells-1
-            cell = cell_matrix[i][j]
-            cell_list.append(cell)
-            topology = []
-            topology.append(cell_matrix[i-1][j+1])
-            topology.append(cell_matrix[i-1][j-1])
-            topology.append(cell_matrix[i-1][j])
-            topology.append(cell_matrix[i][j+1])
-            topology.append(cell_matrix[i][j-1])
-            cell.neigh_topology = topology
-
-        i = 0
-        j = 0
-        cell = cell_matrix[0][0]
-        cell_list.append(cell)
-        topology = []
-        topology.append(cell_matrix[i+1][j+1])
-        topology.append(cell_matrix[i][j+1])
-        topology.append(cell_matrix[i+1][j])
-        cell.neigh_topology = topology
-
-        i = n_cells-1
-        j = 0
-        cell = cell_matrix[n_cells-1][0]
-        cell_list.append(cell)
-        topology = []
-        topology.append(cell_matrix[i-1][j+1])
-        topology.append(cell_matrix[i][j+1])
-        topology.append(cell_matrix[i-1][j])
-        cell.neigh_topology = topology
-
-        i = n_cells-1
-        j = n_cells-1
-        cell = cell_matrix[i][j]
-        cell_list.append(cell)
-        topology = []
-        topology.append(cell_matrix[i-1][j])
-        topology.append(cell_matrix[i][j-1])
-        topology.append(cell_matrix[i-1][j-1])
-        cell.neigh_topology = topology
-
-        i = 0
-        j = n_cells-1
-        cell = cell_matrix[0][n_cells-1]
-        cell_list.append(cell)
-        topology = []
-        topology.append(cell_matrix[i+1][j])
-        topology.append(cell_matrix[i][j-1])
-        topology.append(cell_matrix[i+1][j-1])
-        cell.neigh_topology = topology
-
-        return cell_list, cell_matrix
-
-            
-
-
-    def test_topology(self, i, j):
-        cell = self.cells_m[i][j] 
-        for nc in cell.neigh_topology:
-            bpy.ops.mesh.primitive_cube_add(location=nc.position, size=0.1)
-
-               
-    def constant_distance_force(self, cell):
-
-        sum_spring = 0
-        for cell_neigh in cell.neigh_topology:
-            dist = cell.position - cell_neigh.position
-            dist_norm = dist / np.linalg.norm(dist)
-            sum_spring += cell_neigh.position + self.link_resistance * dist_norm
-
-        return  sum_spring / len(cell.neigh_topology) 
-
+        # cell of row i, column j at ((i + 1) * x_dist, (j + 1) * y_dist)
+        i, j = np.divmod(np.arange(n_cells * n_cells), n_cells)
+        positions = np.stack(((i + 1) * x_dist, (j + 1) * y_dist, np.zeros(len(i))), axis=1)
+        normals = np.tile([0, 0, 1.0], (len(i), 1))
 
-    def planar_position_force(self, cell):
+        return CellSheet(positions, normals, 0.1, give_grid_triangles(n_cells))
 
-        sum_planar = 0
-        for cell_neigh in cell.neigh_topology:
-            sum_planar += cell_neigh.position
-
-        return sum_planar / len(cell.neigh_topology)
-
-    def bulge_force(self, cell):
-
-        sum_bulge = 0
-        for cell_neigh in cell.neigh_topology:
-
-            dotN = np.dot((cell_neigh.position - cell.position), cell.normal)
-
-            root_ex = self.link_resistance ** 2 - np.linalg.norm(cell_neigh.position) ** 2 + dotN ** 2
-            if root_ex < 0:
-                root_ex = 0
-
-            sum_bulge += np.sqrt(root_ex) + dotN
-
-        avg_bulge = sum_bulge / len(cell.neigh_topology)
             
-        bulge = cell.position + avg_bulge * cell.normal
 
-        return bulge
 
-    def cell_diff(self, cell):
-        x = np.random.rand() / 10
-        y = np.random.rand() / 10
-        z = 0
-        if np.random.rand() > 0.5:
-            x *= -1
-        
-        if np.random.rand() > 0.5:
-            y *= -1
-            
-        new_cell = Cell(cell.position + [x,y,z], [0,0,1.0], None, 0.1)
-        self.cells.append(new_cell)
+    def test_topology(self, i, j):
+        cell = i * self.n_cells + j
+        for neigh in self.sheet.give_neighbours(cell):
+            bpy.ops.mesh.primitive_cube_add(location=self.sheet.positions[neigh], size=0.1)
 
-        half_topology_neigh = int(len(cell.neigh_topology)/2)
 
-        topology_for_old_cell = []
-        for i in range(0, half_topology_neigh):
-            topology_for_old_cell.append(cell.neigh_topology[i])
+    def update_spheres(self):
 
-        topology_for_old_cell.append(new_cell)
+        self.spheres.update(self.sheet.positions, self.sheet.sizes)
 
-        topology_for_new_cell = []
-        for i in range(half_topology_neigh, len(cell.neigh_topology)):
-            topology_for_new_cell.append(cell.neigh_topology[i])
 
-        topology_for_new_cell.append(cell)
+    def cell_diff(self, cells):
+        offset = np.random.rand(len(cells), 3) / 10
+        offset[:, 2] = 0
+        offset[:, :2] *= np.where(np.random.rand(len(cells), 2) > 0.5, -1, 1)
 
-        cell.neigh_topology = topology_for_old_cell
-        new_cell.neigh_topology = topology_for_new_cell
+        new_cells = self.sheet.divide(cells, self.sheet.positions[cells] + offset)
+        self.nutrients.add_cells(new_cells)
 
 
 
 
-    def grow(self, n_iter):
+    def grow(self, n_iter, renderer):
 
         curr_iter = 0
-        render_out = '/home/lovro/Documents/FER/diplomski/growth_models_results/blender_impl/cell_diff/tmp/'
         render_iter = 0
 
         while True:
 
-            for cell in self.cells:
-
-                differentiate = cell.increase_nutrient()
-
-                if differentiate:
-
-                    self.cell_diff(cell)
-
-                    
+            differentiate = self.nutrients.give_differentiating()
 
-            for cell in self.cells:
+            if len(differentiate) > 0:
 
-                spring_target = self.constant_distance_force(cell)
-                planar_target = self.planar_position_force(cell)
-                bulge_target = self.bulge_force(cell)
+                self.cell_diff(differentiate)
 
-                spring = self.spring_factor * (spring_target - cell.position)
-                planar = self.planar_factor * (planar_target - cell.position)
-                bulge = self.bulge_factor * (bulge_target - cell.position)
+            # all cells move at once, from positions of last iteration
+            self.sheet.relax(self.link_resistance,
+                             self.spring_factor,
+                             self.planar_factor,
+                             self.bulge_factor)
 
-                new_position = cell.position + planar + spring + bulge
-    
-
-                cell.position = new_position
-                cell.blender_sphere.location = new_position
-
-            bpy.context.scene.render.filepath = os.path.join(render_out, str(render_iter))
-            bpy.ops.render.render(write_still=True)
+            self.update_spheres()
+            renderer.render(render_iter)
             render_iter += 1
 
             curr_iter += 1
@@ -337,9 +185,6 @@ org = organism(
         bulge_factor = 0.00001
     ) 
        
-org.grow(20)
-bpy.ops.mesh.primitive_cone_add(location=org.cells[4].position)
-bpy.context.object.scale = [0.3,0.3,0.3]
-for cell_neigh in org.cells[4].neigh_topology:
-    bpy.ops.mesh.primitive_cube_add(location=cell_neigh.position, radius=0.1)
-
+# queue is closed also if growth fails
+with give_renderer("cell_diff") as renderer:
+    org.grow(20, renderer)
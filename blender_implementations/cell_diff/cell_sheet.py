@@ -0,0 +1,173 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+#############################################################################
+# DESCRIPTION:
+# Cell sheet as arrays (no bpy): positions and normals of cells are
+# vertices of half-edge triangle mesh. CSR neighbour adjacency (neighbours
+# of cell c are indices[indptr[c]:indptr[c+1]]) is taken from mesh after
+# divisions. Forces of all cells are evaluated at once with segment sums
+# (np.add.reduceat over neighbour entries)
+#############################################################################
+
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+
+########################### STANDARD IMPORTS ################################
+import numpy as np
+
+############################ USER IMPORTS ###################################
+from half_edge import HalfEdgeMesh
+
+""" *************************************************************************
+CLASS
+Cells of sheet and their neighbours
+    + positions (n, 3), normals (n, 3), sizes (n)
+    + mesh: HalfEdgeMesh, cells are its vertices
+    + indptr (n + 1), indices: CSR neighbour adjacency of mesh
+************************************************************************* """
+class CellSheet():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        positions: (n, 3)
+        normals: (n, 3)
+        sizes: (n) or scalar
+        triangles: (f, 3) cell indices, counter clockwise
+    ********************************************************************* """
+    def __init__(self, positions, normals, sizes, triangles):
+
+        self.positions = np.array(positions, dtype=np.float64).reshape(-1, 3)
+        self.normals = np.array(normals, dtype=np.float64).reshape(-1, 3)
+        self.sizes = np.array(np.broadcast_to(sizes, (len(self.positions),)), dtype=np.float64)
+
+        self.mesh = HalfEdgeMesh(triangles, len(self.positions))
+        self.indptr, self.indices = self.mesh.give_adjacency()
+
+    def __len__(self):
+        return len(self.positions)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Neighbour indices of cell
+    ********************************************************************* """
+    def give_neighbours(self, cell):
+
+        return self.indices[self.indptr[cell]:self.indptr[cell+1]]
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Cell of every neighbour entry and number of neighbours of every cell
+    ********************************************************************* """
+    def give_entry_cells(self):
+
+        counts = np.diff(self.indptr)
+
+        return np.repeat(np.arange(len(self)), counts), counts
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Mean over neighbour entries of every cell, values: (entries, ...) array
+    ********************************************************************* """
+    def give_mean(self, values, counts):
+
+        sums = np.add.reduceat(values, self.indptr[:-1], axis=0)
+
+        return sums / counts.reshape((-1,) + (1,) * (values.ndim - 1))
+
+    """ *********************************************************************
+    PUBLIC
+    Target positions of all cells (n, 3) x 3:
+        + spring: neighbour position pushed link_resistance away along link
+        + planar: mean neighbour position
+        + bulge: cell moved along normal
+    ********************************************************************* """
+    def give_targets(self, link_resistance):
+
+        cells, counts = self.give_entry_cells()
+
+        neighbour = self.positions[self.indices]
+        position = self.positions[cells]
+        normal = self.normals[cells]
+
+        dist = position - neighbour
+        dist_norm = dist / np.linalg.norm(dist, axis=1, keepdims=True)
+        spring = self.give_mean(neighbour + link_resistance * dist_norm, counts)
+
+        planar = self.give_mean(neighbour, counts)
+
+        dotN = np.sum((neighbour - position) * normal, axis=1)
+        root_ex = link_resistance ** 2 - np.sum(neighbour ** 2, axis=1) + dotN ** 2
+        avg_bulge = self.give_mean(np.sqrt(np.maximum(root_ex, 0)) + dotN, counts)
+        bulge = self.positions + avg_bulge[:, np.newaxis] * self.normals
+
+        return spring, planar, bulge
+
+    """ *********************************************************************
+    PUBLIC
+    Move all cells once towards weighted force targets
+    ********************************************************************* """
+    def relax(self, link_resistance, spring_factor, planar_factor, bulge_factor):
+
+        spring_target, planar_target, bulge_target = self.give_targets(link_resistance)
+
+        spring = spring_factor * (spring_target - self.positions)
+        planar = planar_factor * (planar_target - self.positions)
+        bulge = bulge_factor * (bulge_target - self.positions)
+
+        self.positions += planar + spring + bulge
+
+    """ *********************************************************************
+    PUBLIC
+    Divide cells (in given order), new cells are appended in same order at
+    given positions. Parent is split by mesh edge towards its neighbour
+    closest to direction of child, parent and child share about half of
+    ring. Returns indices of children
+    ********************************************************************* """
+    def divide(self, dividing, child_positions):
+
+        child_positions = np.asarray(child_positions, dtype=np.float64).reshape(-1, 3)
+        children = []
+
+        # children are next vertices of mesh, later parents may neighbour them
+        self.positions = np.concatenate((self.positions, child_positions))
+        self.normals = np.concatenate((self.normals, self.normals[dividing]))
+        self.sizes = np.concatenate((self.sizes, self.sizes[dividing]))
+
+        for cell, position in zip(dividing, child_positions):
+
+            half_edges, neighbours = self.mesh.give_ring(cell)
+            directions = self.positions[neighbours[:len(half_edges)]] - self.positions[cell]
+            h = half_edges[int(np.argmax(directions @ (position - self.positions[cell])))]
+
+            children.append(self.mesh.split_vertex(cell, h))
+
+        self.indptr, self.indices = self.mesh.give_adjacency()
+
+        return np.array(children, dtype=np.int64)
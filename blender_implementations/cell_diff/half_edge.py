@@ -0,0 +1,298 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+#############################################################################
+# DESCRIPTION:
+# Compact half-edge triangle mesh (no bpy) of cell sheet, cells are vertices
+# Half-edges of face f are 3f, 3f+1, 3f+2 (counter clockwise), so next and
+# prev are implicit and only dest and twin are stored (twin -1: border)
+# Local operations are O(1): edge split adds vertex, edge flip swaps diagonal
+# of two faces. Neighbours stay symmetric: a - b is neighbour pair iff mesh
+# has edge a - b
+#############################################################################
+
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+
+########################### STANDARD IMPORTS ################################
+import numpy as np
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Next and previous half-edge in face
+************************************************************************* """
+def give_next(h):
+    return h - h % 3 + (h + 1) % 3
+
+def give_prev(h):
+    return h - h % 3 + (h + 2) % 3
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Triangles (counter clockwise) of n x n grid, vertex of row i, column j has
+index i * n + j (x grows with i, y with j)
+************************************************************************* """
+def give_grid_triangles(n):
+
+    i, j = np.divmod(np.arange((n - 1) * (n - 1)), n - 1)
+    p00 = i * n + j
+    p10 = p00 + n
+    p11 = p10 + 1
+    p01 = p00 + 1
+
+    lower = np.stack((p00, p10, p11), axis=1)
+    upper = np.stack((p00, p11, p01), axis=1)
+
+    return np.concatenate((lower, upper))
+
+""" *************************************************************************
+CLASS
+Manifold triangle mesh as half-edge arrays
+    + dest[h]: vertex half-edge h points to
+    + twin[h]: opposite half-edge or -1 on border
+    + out[v]: one half-edge leaving vertex v
+Lists are used (not arrays), so split and flip are O(1) list updates
+************************************************************************* """
+class HalfEdgeMesh():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        triangles: (f, 3) vertex indices, counter clockwise
+        n_vertices: number of vertices
+    ********************************************************************* """
+    def __init__(self, triangles, n_vertices):
+
+        triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+
+        dest = np.roll(triangles, -1, axis=1).ravel()
+        origin = triangles.ravel()
+
+        # twin of a -> b is b -> a, found by sorted keys
+        keys = origin * n_vertices + dest
+        twin_keys = dest * n_vertices + origin
+        order = np.argsort(keys)
+        found = np.searchsorted(keys[order], twin_keys)
+        found = np.minimum(found, len(keys) - 1)
+        twin = np.where(keys[order][found] == twin_keys, order[found], -1)
+
+        if len(np.unique(keys)) != len(keys):
+            raise ValueError("triangles are not consistently oriented manifold")
+
+        out = np.full(n_vertices, -1, dtype=np.int64)
+        out[origin] = np.arange(len(origin))
+
+        if np.any(out < 0):
+            raise ValueError("every vertex must be in triangle")
+
+        self.dest = dest.tolist()
+        self.twin = twin.tolist()
+        self.out = out.tolist()
+
+    def __len__(self):
+        return len(self.out)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Vertex half-edge h starts from
+    ********************************************************************* """
+    def give_origin(self, h):
+        return self.dest[give_prev(h)]
+
+    """ *********************************************************************
+    PUBLIC
+    Half-edges leaving vertex in counter clockwise order and its neighbours.
+    Ring of border vertex starts with its clockwise most half-edge and has
+    one more neighbour than half-edges
+    ********************************************************************* """
+    def give_ring(self, v):
+
+        # rotate clockwise to border (or once around)
+        start = self.out[v]
+        h = start
+        while self.twin[h] != -1:
+            h = give_next(self.twin[h])
+            if h == start:
+                break
+
+        half_edges = [h]
+        g = self.twin[give_prev(h)]
+        while g != -1 and g != h:
+            half_edges.append(g)
+            g = self.twin[give_prev(g)]
+
+        neighbours = [self.dest[g] for g in half_edges]
+        if g == -1:
+            neighbours.append(self.dest[give_next(half_edges[-1])])
+
+        return half_edges, neighbours
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Set twins of two half-edges (-1 allowed)
+    ********************************************************************* """
+    def link(self, h, g):
+
+        if h != -1:
+            self.twin[h] = g
+        if g != -1:
+            self.twin[g] = h
+
+    """ *********************************************************************
+    PUBLIC
+    Swap diagonal of two faces of inner edge h (a -> b):
+    faces (a, b, c), (b, a, d) become (c, d, b), (d, c, a).
+    Returns False (mesh unchanged) on border, if edge c - d exists or if
+    a or b would be left with less than 3 neighbours
+    ********************************************************************* """
+    def flip_edge(self, h):
+
+        t = self.twin[h]
+        if t == -1:
+            return False
+
+        h1, h2 = give_next(h), give_prev(h)
+        t1, t2 = give_next(t), give_prev(t)
+        a, b = self.dest[t], self.dest[h]
+        c, d = self.dest[h1], self.dest[t1]
+
+        if c == d or d in self.give_ring(c)[1]:
+            return False
+
+        if len(self.give_ring(a)[1]) <= 3 or len(self.give_ring(b)[1]) <= 3:
+            return False
+
+        twin_h1, twin_h2 = self.twin[h1], self.twin[h2]
+        twin_t1, twin_t2 = self.twin[t1], self.twin[t2]
+
+        # h: c -> d, h1: d -> b, h2: b -> c
+        self.dest[h], self.dest[h1], self.dest[h2] = d, b, c
+        # t: d -> c, t1: c -> a, t2: a -> d
+        self.dest[t], self.dest[t1], self.dest[t2] = c, a, d
+
+        self.link(h, t)
+        self.link(h1, twin_t2)
+        self.link(h2, twin_h1)
+        self.link(t1, twin_h2)
+        self.link(t2, twin_t1)
+
+        self.out[a], self.out[b], self.out[c], self.out[d] = t2, h2, t1, h1
+
+        return True
+
+    """ *********************************************************************
+    PUBLIC
+    Put new vertex on edge h (a -> b), faces of edge are split in two.
+    Returns new vertex
+    ********************************************************************* """
+    def split_edge(self, h):
+
+        v = len(self.out)
+        t = self.twin[h]
+        h1 = give_next(h)
+        b, c = self.dest[h], self.dest[h1]
+
+        # face (a, b, c) -> (a, v, c) in place and new (v, b, c)
+        g0 = len(self.dest)
+        g1, g2 = g0 + 1, g0 + 2
+        self.dest.extend([b, c, v])
+        self.twin.extend([-1, -1, -1])
+
+        self.dest[h] = v
+        self.link(g1, self.twin[h1])
+        self.link(h1, g2)
+
+        self.out.append(h1)
+        self.out[b] = g1
+
+        if t == -1:
+            return v
+
+        # face (b, a, d) -> (v, a, d) in place and new (b, v, d)
+        t2 = give_prev(t)
+        d = self.dest[give_next(t)]
+
+        k0 = len(self.dest)
+        k1, k2 = k0 + 1, k0 + 2
+        self.dest.extend([v, d, b])
+        self.twin.extend([-1, -1, -1])
+
+        self.dest[t2] = v
+        self.link(k2, self.twin[t2])
+        self.link(t2, k1)
+        self.link(g0, k0)
+
+        return v
+
+    """ *********************************************************************
+    PUBLIC
+    Divide vertex c towards neighbour n: split edge c - n and flip edges of c
+    clockwise from new vertex until new vertex has about half of ring of c.
+    Both keep c - new vertex edge and two common neighbours.
+    Returns new vertex
+    ********************************************************************* """
+    def split_vertex(self, c, h):
+
+        half_edges, neighbours = self.give_ring(c)
+        n_flips = max(0, len(neighbours) // 2 - 2)
+
+        # edge from c to clockwise neighbour of new vertex
+        e = -1 if self.twin[h] == -1 else give_next(self.twin[h])
+        v = self.split_edge(h)
+
+        for flip in range(n_flips):
+
+            if e == -1 or self.twin[e] == -1:
+                break
+
+            after = give_prev(self.twin[e])
+            if not self.flip_edge(e):
+                break
+            e = after
+
+        return v
+
+    """ *********************************************************************
+    PUBLIC
+    Symmetric CSR neighbour adjacency (indptr, indices) of all vertices
+    ********************************************************************* """
+    def give_adjacency(self):
+
+        dest = np.array(self.dest, dtype=np.int64)
+        twin = np.array(self.twin, dtype=np.int64)
+        origin = dest[give_prev(np.arange(len(dest)))]
+
+        # border half-edges have no twin, their reverse is added
+        border = twin == -1
+        rows = np.concatenate((origin, dest[border]))
+        cols = np.concatenate((dest, origin[border]))
+
+        order = np.argsort(rows, kind="stable")
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(self.out)))))
+
+        return indptr, cols[order]
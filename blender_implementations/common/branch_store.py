@@ -0,0 +1,234 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+#############################################################################
+# DESCRIPTION:
+# Compact structure-of-arrays store of SCA tree branches
+# Shared by all SCA models, which add blender_implementations/common
+# to sys.path
+#############################################################################
+
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+
+########################### STANDARD IMPORTS ################################
+import numpy as np
+
+""" *************************************************************************
+CLASS
+Lightweight view of one branch in BranchStore:
+    + starting point of branch is position of parent
+    + ending point of branch is position
+    + direction of growth is direction
+Position and direction are views into store arrays (no copy)
+************************************************************************* """
+class BranchView():
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+
+        self.store = store
+        self.index = index
+
+    @property
+    def position(self):
+        return self.store.positions[self.index]
+
+    @property
+    def direction(self):
+        return self.store.directions[self.index]
+
+    @property
+    def parent(self):
+
+        parent = self.store.parents[self.index]
+
+        if parent < 0:
+            return None
+
+        return BranchView(self.store, int(parent))
+
+    @property
+    def generation(self):
+        return int(self.store.generations[self.index])
+
+    @property
+    def thickness(self):
+        return float(self.store.thicknesses[self.index])
+
+""" *************************************************************************
+CLASS
+Branches of SCA tree in contiguous arrays (one row per branch):
+    + parents: int32, index of parent branch, -1 for root
+    + positions, directions: float32 (N, 3)
+    + generations: int32, number of branches from root
+    + thicknesses: float32
+Arrays are doubled when full. Indexing and iteration give BranchView
+************************************************************************* """
+class BranchStore():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        capacity: initial number of rows
+    ********************************************************************* """
+    def __init__(self, capacity=1024):
+
+        self.parents = np.full(capacity, -1, dtype=np.int32)
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.directions = np.zeros((capacity, 3), dtype=np.float32)
+        self.generations = np.zeros(capacity, dtype=np.int32)
+        self.thicknesses = np.ones(capacity, dtype=np.float32)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+
+        if index < 0:
+            index += self.size
+
+        if index < 0 or index >= self.size:
+            raise IndexError("branch index out of range")
+
+        return BranchView(self, index)
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield BranchView(self, index)
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Make room for n more branches
+    ********************************************************************* """
+    def reserve(self, n):
+
+        capacity = max(1, len(self.parents))
+        if self.size + n <= len(self.parents):
+            return
+
+        while capacity < self.size + n:
+            capacity *= 2
+
+        for name in ("parents", "positions", "directions", "generations", "thicknesses"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Add branches at once and return index of first one
+        positions, directions: (n, 3)
+        parents: n indices, -1 for root. Parent may be added in same batch,
+                 but before its children
+        thicknesses: n values or scalar
+    ********************************************************************* """
+    def extend(self, positions, parents, directions, thicknesses=1.0):
+
+        parents = np.asarray(parents, dtype=np.int32)
+        n = len(parents)
+
+        first = self.size
+        if np.any(parents >= first + np.arange(n)):
+            raise ValueError("parent of branch must be added before it")
+
+        self.reserve(n)
+        rows = slice(first, first + n)
+
+        self.parents[rows] = parents
+        self.positions[rows] = positions
+        self.directions[rows] = directions
+        self.thicknesses[rows] = thicknesses
+
+        # generations of stored parents at once, parents of this batch in order
+        self.generations[rows] = np.where(parents >= 0, self.generations[np.maximum(parents, 0)] + 1, 0)
+        for row in np.flatnonzero(parents >= first):
+            self.generations[first + row] = self.generations[parents[row]] + 1
+
+        self.size += n
+
+        return first
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Add one branch and return its index
+    ********************************************************************* """
+    def append(self, position, parent, direction, thickness=1.0):
+
+        return self.extend([position], [parent], [direction], thickness)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Used rows of all arrays as dict of views (no copy)
+    ********************************************************************* """
+    def give_arrays(self):
+
+        return {"parents": self.parents[:self.size],
+                "positions": self.positions[:self.size],
+                "directions": self.directions[:self.size],
+                "generations": self.generations[:self.size],
+                "thicknesses": self.thicknesses[:self.size]}
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Write arrays to .npz file, arrays are written from store buffers
+    ********************************************************************* """
+    def save(self, path):
+
+        np.savez(path, **self.give_arrays())
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Store wrapping given arrays (e.g. loaded .npz or arrays from other
+    process) without copying them if dtypes match
+    ********************************************************************* """
+    @classmethod
+    def from_arrays(cls, parents, positions, directions, generations, thicknesses):
+
+        store = cls(0)
+        store.parents = np.asarray(parents, dtype=np.int32)
+        store.positions = np.asarray(positions, dtype=np.float32)
+        store.directions = np.asarray(directions, dtype=np.float32)
+        store.generations = np.asarray(generations, dtype=np.int32)
+        store.thicknesses = np.asarray(thicknesses, dtype=np.float32)
+        store.size = len(store.parents)
+
+        return store
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Store from .npz file written by save
+    ********************************************************************* """
+    @classmethod
+    def load(cls, path):
+
+        with np.load(path) as arrays:
+            return cls.from_arrays(**arrays)
@@ -0,0 +1,691 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+#############################################################################
+# DESCRIPTION:
+# Rendering of growth frames, inline or by pool of background Blender
+# processes. Models call render(frame) where they used to render and
+# finish() at the end:
+#     + InlineRenderer: renders in running Blender (growth waits)
+#     + RenderQueue: stores snapshot of scene (object geometry, transforms,
+#       materials, camera) as frame in queue folder and returns. Workers
+#       (blender -b base.blend --python render_queue.py) claim frames,
+#       rebuild scene and render while growth continues
+# bpy is imported in functions, so queue can be used outside of Blender
+# Shared by all Blender models, which add blender_implementations/common
+# to sys.path
+# USAGE:
+#     blender -P model.py -- -render-out OUT -render-workers 4
+#############################################################################
+
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+
+########################### STANDARD IMPORTS ################################
+import numpy as np
+import argparse
+import atexit
+import hashlib
+import os
+import subprocess
+import sys
+import time
+
+""" *************************************************************************
+Object types captured in snapshots, removed from base scene in workers
+************************************************************************* """
+RENDERABLE = {"MESH", "CURVE", "SURFACE", "FONT", "META"}
+
+""" *************************************************************************
+Queue file names: frames are <frame>.npz, claimed frames are renamed to
+<frame>.npz.<pid>, shared mesh geometry is in geometry/<hash>.npz
+************************************************************************* """
+FRAME_SUFFIX = ".npz"
+DONE_FILE = "done"
+BASE_FILE = "base.blend"
+GEOMETRY_FOLDER = "geometry"
+
+""" *************************************************************************
+CLASS
+Renders every frame in running Blender, same as calling
+bpy.ops.render.render in growth loop
+************************************************************************* """
+class InlineRenderer():
+
+    def __init__(self, out_dir):
+
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+    def render(self, frame):
+
+        import bpy
+
+        bpy.context.scene.render.filepath = os.path.join(self.out_dir, str(frame))
+        bpy.ops.render.render(write_still=True)
+
+    def finish(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
+
+""" *************************************************************************
+PRIVATE HELPER FUNCTION
+Write npz through temporary file, so that readers never see partial file
+************************************************************************* """
+def save_atomic(path, **arrays):
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as out:
+        np.savez(out, **arrays)
+
+    os.replace(tmp, path)
+
+""" *************************************************************************
+PRIVATE HELPER FUNCTION
+Flat matrix of Blender matrix (row major, 16 floats)
+************************************************************************* """
+def give_matrix(matrix):
+
+    return np.array([list(row) for row in matrix], dtype=np.float64).ravel()
+
+""" *************************************************************************
+PRIVATE HELPER FUNCTION
+Name and diffuse color of active material, ("", NaN) if none
+************************************************************************* """
+def give_material(obj):
+
+    material = obj.active_material
+    if material is None:
+        return "", np.full(3, np.nan)
+
+    return material.name, np.array(material.diffuse_color[:3], dtype=np.float32)
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Vertex indices of polygons in polygon order
+    starts, totals: loop_start and loop_total of polygons
+    loops: vertex index of every loop
+************************************************************************* """
+def give_face_vertices(starts, totals, loops):
+
+    offsets = np.cumsum(totals) - totals
+    idx = np.repeat(starts - offsets, totals) + np.arange(np.sum(totals))
+
+    return loops[idx]
+
+""" *************************************************************************
+PRIVATE HELPER FUNCTION
+Geometry of Blender mesh as arrays: vertices (n, 3), loose edges (m, 2),
+face sizes and face vertices
+************************************************************************* """
+def give_mesh_arrays(mesh):
+
+    vertices = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", vertices)
+
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    loose = np.empty(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get("is_loose", loose)
+
+    starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", totals)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+
+    return {"vertices": vertices.reshape(-1, 3),
+            "edges": edges.reshape(-1, 2)[loose],
+            "face_sizes": totals,
+            "face_vertices": give_face_vertices(starts, totals, loops)}
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Content hash of mesh arrays, equal meshes (e.g. many equal spheres) share
+one geometry file
+************************************************************************* """
+def give_geometry_key(arrays):
+
+    digest = hashlib.sha1()
+    for name in ("vertices", "edges", "face_sizes", "face_vertices"):
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+
+    return digest.hexdigest()
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Frames waiting in queue folder, sorted by frame number
+************************************************************************* """
+def give_queued_frames(queue_dir):
+
+    frames = []
+    for name in os.listdir(queue_dir):
+
+        number = name[:-len(FRAME_SUFFIX)]
+        if name.endswith(FRAME_SUFFIX) and number.isdigit():
+            frames.append(int(number))
+
+    return sorted(frames)
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Claim first free frame by renaming its file (atomic, so every frame is
+taken by one worker). Returns (frame, claimed path) or None
+************************************************************************* """
+def claim_frame(queue_dir):
+
+    for frame in give_queued_frames(queue_dir):
+
+        path = os.path.join(queue_dir, str(frame) + FRAME_SUFFIX)
+        claimed = path + "." + str(os.getpid())
+
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue
+
+        return frame, claimed
+
+    return None
+
+""" *************************************************************************
+CLASS
+Frame queue rendered by pool of background Blender processes
+Base scene (camera, lights, world, render settings) is saved on first
+frame, workers start from it. Every frame stores all renderable objects,
+so objects may be added, moved and removed during growth.
+************************************************************************* """
+class RenderQueue():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        out_dir: folder of rendered images (<frame>.<ext>)
+        n_workers: number of background Blender processes
+        blender: Blender executable, default: running Blender
+        queue_dir: folder of snapshots, default: out_dir/queue
+        idle_timeout: seconds worker waits for next frame before it quits,
+                      None: wait as long as growing Blender runs
+    Queue is closed (workers quit after queued frames) by finish, on exit
+    of with block or at interpreter exit, so failed growth does not leave
+    workers waiting. Workers also quit if growing Blender is gone
+    ********************************************************************* """
+    def __init__(self, out_dir, n_workers=2, blender=None, queue_dir=None, idle_timeout=None):
+
+        self.out_dir = out_dir
+        self.n_workers = n_workers
+        self.blender = blender
+        self.queue_dir = queue_dir if queue_dir is not None else os.path.join(out_dir, "queue")
+        self.geometry_dir = os.path.join(self.queue_dir, GEOMETRY_FOLDER)
+        self.idle_timeout = idle_timeout
+
+        self.workers = []
+        self.written = set()
+        self.n_frames = 0
+        self.closed = False
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Clear queue folder, save base scene and start workers
+    ********************************************************************* """
+    def start(self):
+
+        import bpy
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        os.makedirs(self.geometry_dir, exist_ok=True)
+
+        for name in os.listdir(self.queue_dir):
+            if name.endswith(FRAME_SUFFIX) or FRAME_SUFFIX + "." in name or name == DONE_FILE:
+                os.remove(os.path.join(self.queue_dir, name))
+
+        base = os.path.join(self.queue_dir, BASE_FILE)
+        bpy.ops.wm.save_as_mainfile(filepath=base, copy=True)
+
+        blender = self.blender if self.blender is not None else bpy.app.binary_path
+
+        for worker in range(self.n_workers):
+
+            log = open(os.path.join(self.queue_dir, "worker_" + str(worker) + ".log"), "w")
+            command = [blender, "-b", base, "--python", os.path.abspath(__file__), "--",
+                       "-queue", self.queue_dir, "-out", self.out_dir, "-parent", str(os.getpid())]
+            if self.idle_timeout is not None:
+                command += ["-timeout", str(self.idle_timeout)]
+
+            self.workers.append((subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT), log))
+
+        # growth may fail before finish
+        atexit.register(self.close)
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Write geometry file of mesh once and return its key
+    ********************************************************************* """
+    def store_geometry(self, mesh):
+
+        arrays = give_mesh_arrays(mesh)
+        key = give_geometry_key(arrays)
+
+        if key not in self.written:
+            save_atomic(os.path.join(self.geometry_dir, key + ".npz"), **arrays)
+            self.written.add(key)
+
+        return key
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Store snapshot of scene as frame
+    ********************************************************************* """
+    def snapshot(self, frame):
+
+        import bpy
+
+        scene = bpy.context.scene
+
+        mesh = {"keys": [], "matrices": [], "materials": [], "colors": []}
+        meta = {"matrices": [], "materials": [], "colors": [], "resolutions": [],
+                "thresholds": [], "counts": [], "co": [], "radii": []}
+
+        for obj in scene.objects:
+
+            if obj.type not in RENDERABLE or obj.hide_render:
+                continue
+
+            material, color = give_material(obj)
+
+            if obj.type == "META":
+
+                elements = obj.data.elements
+                co = np.empty(len(elements) * 3, dtype=np.float32)
+                elements.foreach_get("co", co)
+                radii = np.empty(len(elements), dtype=np.float32)
+                elements.foreach_get("radius", radii)
+
+                meta["matrices"].append(give_matrix(obj.matrix_world))
+                meta["materials"].append(material)
+                meta["colors"].append(color)
+                meta["resolutions"].append(obj.data.render_resolution)
+                meta["thresholds"].append(obj.data.threshold)
+                meta["counts"].append(len(elements))
+                meta["co"].append(co.reshape(-1, 3))
+                meta["radii"].append(radii)
+                continue
+
+            # plain meshes are stored as they are, other objects as evaluated mesh
+            if obj.type == "MESH" and len(obj.modifiers) == 0:
+                key = self.store_geometry(obj.data)
+            else:
+                evaluated = obj.to_mesh(scene, True, 'RENDER')
+                key = self.store_geometry(evaluated)
+                bpy.data.meshes.remove(evaluated)
+
+            mesh["keys"].append(key)
+            mesh["matrices"].append(give_matrix(obj.matrix_world))
+            mesh["materials"].append(material)
+            mesh["colors"].append(color)
+
+        camera = give_matrix(scene.camera.matrix_world) if scene.camera is not None else np.zeros(0)
+
+        save_atomic(os.path.join(self.queue_dir, str(frame) + FRAME_SUFFIX),
+                    camera=camera,
+                    mesh_keys=np.array(mesh["keys"], dtype=str),
+                    mesh_matrices=np.array(mesh["matrices"]).reshape(-1, 16),
+                    mesh_materials=np.array(mesh["materials"], dtype=str),
+                    mesh_colors=np.array(mesh["colors"]).reshape(-1, 3),
+                    meta_matrices=np.array(meta["matrices"]).reshape(-1, 16),
+                    meta_materials=np.array(meta["materials"], dtype=str),
+                    meta_colors=np.array(meta["colors"]).reshape(-1, 3),
+                    meta_resolutions=np.array(meta["resolutions"], dtype=np.float32),
+                    meta_thresholds=np.array(meta["thresholds"], dtype=np.float32),
+                    meta_counts=np.array(meta["counts"], dtype=np.int64),
+                    meta_co=np.concatenate(meta["co"]) if meta["co"] else np.zeros((0, 3)),
+                    meta_radii=np.concatenate(meta["radii"]) if meta["radii"] else np.zeros(0))
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Fail early if worker died, before queue is closed worker must not quit
+    ********************************************************************* """
+    def check_workers(self):
+
+        for process, log in self.workers:
+            code = process.poll()
+            if code is None:
+                continue
+            if code != 0:
+                raise ValueError("render worker failed with exit code " + str(code) +
+                                 ", see " + log.name)
+            if not self.closed:
+                raise ValueError("render worker quit before queue was closed (idle timeout?), see " +
+                                 log.name)
+
+    """ *********************************************************************
+    PUBLIC
+    Queue frame for rendering
+    ********************************************************************* """
+    def render(self, frame):
+
+        if len(self.workers) == 0:
+            self.start()
+
+        self.check_workers()
+        self.snapshot(frame)
+        self.n_frames += 1
+
+    """ *********************************************************************
+    PUBLIC
+    Tell workers that no more frames will come, they render queued frames
+    and quit. Does not wait, can be called more than once
+    ********************************************************************* """
+    def close(self):
+
+        if len(self.workers) == 0 or self.closed:
+            return
+
+        open(os.path.join(self.queue_dir, DONE_FILE), "w").close()
+        self.closed = True
+
+    """ *********************************************************************
+    PUBLIC
+    Close queue and wait for workers
+    ********************************************************************* """
+    def finish(self):
+
+        if len(self.workers) == 0:
+            return
+
+        self.close()
+
+        for process, log in self.workers:
+            process.wait()
+            log.close()
+
+        self.check_workers()
+        self.workers = []
+
+        print("RENDERED", self.n_frames, "frames to", self.out_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Renderer configured from command line arguments after "--":
+    -render-out: output folder, default ./render_out/<name>
+    -render-workers: 0 renders inline, otherwise number of workers
+    -blender: Blender executable for workers
+    -render-timeout: seconds idle worker waits for next frame, default: no limit
+************************************************************************* """
+def give_renderer(name):
+
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-render-out", type=str, default=os.path.join(os.getcwd(), "render_out", name))
+    parser.add_argument("-render-workers", type=int, default=0)
+    parser.add_argument("-blender", type=str, default=None)
+    parser.add_argument("-render-timeout", type=float, default=None)
+    args, unknown = parser.parse_known_args(argv)
+
+    if args.render_workers == 0:
+        return InlineRenderer(args.render_out)
+
+    return RenderQueue(args.render_out, args.render_workers, args.blender,
+                       idle_timeout=args.render_timeout)
+
+""" *************************************************************************
+CLASS
+Worker side: rebuilds frames in base scene and renders them
+Meshes and materials are created once and shared by all frames
+************************************************************************* """
+class FrameBuilder():
+
+    def __init__(self, queue_dir):
+
+        import bpy
+
+        self.geometry_dir = os.path.join(queue_dir, GEOMETRY_FOLDER)
+        self.meshes = {}
+        self.materials = {}
+        self.objects = []
+
+        # scene objects of base file are replaced by snapshots
+        scene = bpy.context.scene
+        for obj in list(scene.objects):
+            if obj.type in RENDERABLE:
+                scene.objects.unlink(obj)
+                bpy.data.objects.remove(obj)
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Blender mesh of geometry key, loaded on first use
+    ********************************************************************* """
+    def give_mesh(self, key):
+
+        import bpy
+
+        if key in self.meshes:
+            return self.meshes[key]
+
+        with np.load(os.path.join(self.geometry_dir, key + ".npz")) as arrays:
+
+            faces = []
+            if len(arrays["face_sizes"]) > 0:
+                splits = np.cumsum(arrays["face_sizes"])[:-1]
+                faces = [face.tolist() for face in np.split(arrays["face_vertices"], splits)]
+
+            mesh = bpy.data.meshes.new("frame_mesh")
+            mesh.from_pydata(arrays["vertices"].tolist(), arrays["edges"].tolist(), faces)
+
+        # slot for per object material
+        mesh.materials.append(None)
+        self.meshes[key] = mesh
+
+        return mesh
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Material of base file with given name or new one with diffuse color
+    ********************************************************************* """
+    def give_material(self, name, color):
+
+        import bpy
+
+        if name in bpy.data.materials:
+            return bpy.data.materials[name]
+
+        if np.any(np.isnan(color)):
+            return None
+
+        key = tuple(np.round(color, 4))
+        if key not in self.materials:
+            material = bpy.data.materials.new("frame_material")
+            for channel in range(3):
+                material.diffuse_color[channel] = color[channel]
+            self.materials[key] = material
+
+        return self.materials[key]
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Link new object to scene
+    ********************************************************************* """
+    def add_object(self, data, matrix, material):
+
+        import bpy
+        from mathutils import Matrix
+
+        obj = bpy.data.objects.new("frame_object", data)
+        obj.matrix_world = Matrix(matrix.reshape(4, 4).tolist())
+        bpy.context.scene.objects.link(obj)
+
+        if material is not None:
+            if len(obj.material_slots) == 0:
+                data.materials.append(None)
+            obj.material_slots[0].link = 'OBJECT'
+            obj.material_slots[0].material = material
+
+        self.objects.append(obj)
+
+    """ *********************************************************************
+    PUBLIC
+    Build scene of snapshot file
+    ********************************************************************* """
+    def build(self, path):
+
+        import bpy
+        from mathutils import Matrix
+
+        with np.load(path) as frame:
+
+            scene = bpy.context.scene
+            if len(frame["camera"]) == 16 and scene.camera is not None:
+                scene.camera.matrix_world = Matrix(frame["camera"].reshape(4, 4).tolist())
+
+            for key, matrix, name, color in zip(frame["mesh_keys"], frame["mesh_matrices"],
+                                                frame["mesh_materials"], frame["mesh_colors"]):
+                self.add_object(self.give_mesh(str(key)), matrix, self.give_material(str(name), color))
+
+            first = 0
+            for i, count in enumerate(frame["meta_counts"]):
+
+                mball = bpy.data.metaballs.new("frame_meta")
+                mball.resolution = frame["meta_resolutions"][i]
+                mball.render_resolution = frame["meta_resolutions"][i]
+                mball.threshold = frame["meta_thresholds"][i]
+
+                for co, radius in zip(frame["meta_co"][first:first+count], frame["meta_radii"][first:first+count]):
+                    element = mball.elements.new()
+                    element.co = co.tolist()
+                    element.radius = radius
+                first += count
+
+                self.add_object(mball, frame["meta_matrices"][i],
+                                self.give_material(str(frame["meta_materials"][i]), frame["meta_colors"][i]))
+
+    """ *********************************************************************
+    PUBLIC
+    Remove objects of last frame (shared meshes are kept)
+    ********************************************************************* """
+    def clear(self):
+
+        import bpy
+
+        scene = bpy.context.scene
+        for obj in self.objects:
+
+            data = obj.data
+            is_meta = obj.type == "META"
+            scene.objects.unlink(obj)
+            bpy.data.objects.remove(obj)
+
+            # metaballs are built per frame
+            if is_meta:
+                bpy.data.metaballs.remove(data)
+
+        self.objects = []
+
+""" *************************************************************************
+PUBLIC
+Worker loop: render queued frames until queue is done and empty
+    parent: pid of growing Blender, worker quits when it is gone (its
+            parent changes), None: not checked
+    timeout: seconds without queued frame before worker quits, None: no limit
+************************************************************************* """
+def run_worker(queue_dir, out_dir, poll=0.1, parent=None, timeout=None):
+
+    import bpy
+
+    builder = FrameBuilder(queue_dir)
+    idle_since = time.time()
+
+    while True:
+
+        claimed = claim_frame(queue_dir)
+
+        if claimed is None:
+            # check queue once more after done, frame may be written just before
+            if os.path.exists(os.path.join(queue_dir, DONE_FILE)):
+                claimed = claim_frame(queue_dir)
+                if claimed is None:
+                    break
+            elif parent is not None and os.getppid() != parent:
+                print("GROWING BLENDER IS GONE, QUIT")
+                break
+            elif timeout is not None and time.time() - idle_since > timeout:
+                print("NO FRAME FOR", timeout, "s, QUIT")
+                break
+            else:
+                time.sleep(poll)
+                continue
+
+        frame, path = claimed
+
+        builder.build(path)
+        bpy.context.scene.render.filepath = os.path.join(out_dir, str(frame))
+        bpy.ops.render.render(write_still=True)
+        builder.clear()
+
+        os.remove(path)
+        print("RENDERED FRAME", frame)
+        idle_since = time.time()
+
+""" *************************************************************************
+ROOT
+Started by RenderQueue:
+    blender -b base.blend --python render_queue.py -- -queue Q -out O -parent PID
+************************************************************************* """
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-queue", type=str)
+    parser.add_argument("-out", type=str)
+    parser.add_argument("-parent", type=int, default=None)
+    parser.add_argument("-timeout", type=float, default=None)
+    args = parser.parse_args(sys.argv[sys.argv.index("--") + 1:])
+
+    run_worker(args.queue, args.out, parent=args.parent, timeout=args.timeout)
@@ -0,0 +1,177 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+#############################################################################
+# DESCRIPTION:
+# Many spheres (particles, cells) shown as one Blender object
+# Sphere of every point (position, radius) is copy of one UV sphere template
+# placed with numpy, whole mesh is written with foreach_set. Number of
+# objects and bpy calls per frame does not depend on number of spheres
+# (no bpy.ops, no depsgraph update per sphere)
+# NOTE: instances are baked in mesh (not dupli objects), so render queue
+# snapshots see them as plain mesh
+# bpy is imported in functions, so template can be used outside of Blender
+# Shared by Blender models through blender_implementations/common
+#############################################################################
+
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+
+########################### STANDARD IMPORTS ################################
+import numpy as np
+
+""" *************************************************************************
+PUBLIC HELPER FUNCTION
+Unit UV sphere as primitive_uv_sphere_add builds it: vertices (k, 3),
+face sizes (triangle fans at poles, quads between) and face vertices
+************************************************************************* """
+def give_uv_sphere(segments, rings):
+
+    theta = np.pi * np.arange(1, rings) / rings
+    phi = 2 * np.pi * np.arange(segments) / segments
+
+    ring_vertices = np.stack((np.outer(np.sin(theta), np.cos(phi)).ravel(),
+                              np.outer(np.sin(theta), np.sin(phi)).ravel(),
+                              np.repeat(np.cos(theta), segments)), axis=1)
+
+    vertices = np.concatenate(([[0, 0, 1]], ring_vertices, [[0, 0, -1]]))
+
+    # vertex index of ring r (0 .. rings-2) and segment s
+    top = 0
+    bottom = len(vertices) - 1
+    s = np.arange(segments)
+    s_next = (s + 1) % segments
+    ring = lambda r, seg: 1 + r * segments + seg
+
+    top_fan = np.stack((np.full(segments, top), ring(0, s), ring(0, s_next)), axis=1)
+    bottom_fan = np.stack((ring(rings - 2, s_next), ring(rings - 2, s), np.full(segments, bottom)), axis=1)
+
+    r = np.arange(rings - 2).reshape(-1, 1)
+    quads = np.stack((ring(r, s), ring(r + 1, s), ring(r + 1, s_next), ring(r, s_next)), axis=2).reshape(-1, 4)
+
+    face_sizes = np.concatenate((np.full(segments, 3), np.full(len(quads), 4), np.full(segments, 3)))
+    face_vertices = np.concatenate((top_fan.ravel(), quads.ravel(), bottom_fan.ravel()))
+
+    return vertices, face_sizes, face_vertices
+
+""" *************************************************************************
+CLASS
+One mesh object of spheres
+    + update(positions, radii): spheres of current frame
+      Same number of spheres as last frame only moves vertices,
+      otherwise mesh datablock of object is replaced
+************************************************************************* """
+class SphereCloud():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        name: name of Blender object
+        segments, rings: resolution of every sphere
+    ********************************************************************* """
+    def __init__(self, name, segments=16, rings=8):
+
+        self.name = name
+        self.template, self.face_sizes, self.face_vertices = give_uv_sphere(segments, rings)
+
+        self.obj = None
+        self.n_spheres = -1
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Vertices (n * k, 3) of spheres, positions (n, 3), radii (n) or scalar
+    ********************************************************************* """
+    def give_vertices(self, positions, radii):
+
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(positions),))
+
+        vertices = self.template[np.newaxis] * radii[:, np.newaxis, np.newaxis] + positions[:, np.newaxis]
+
+        return vertices.reshape(-1, 3)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Polygons of n spheres: loop start, loop total, loop vertex indices
+    ********************************************************************* """
+    def give_polygons(self, n):
+
+        totals = np.tile(self.face_sizes, n)
+        starts = np.cumsum(totals) - totals
+
+        offsets = len(self.template) * np.arange(n).reshape(-1, 1)
+        loops = (self.face_vertices[np.newaxis] + offsets).ravel()
+
+        return starts, totals, loops
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    New mesh with topology of n spheres
+    ********************************************************************* """
+    def new_mesh(self, n):
+
+        import bpy
+
+        starts, totals, loops = self.give_polygons(n)
+
+        mesh = bpy.data.meshes.new(self.name)
+        mesh.vertices.add(n * len(self.template))
+        mesh.loops.add(len(loops))
+        mesh.polygons.add(len(totals))
+
+        mesh.loops.foreach_set("vertex_index", loops.astype(np.int32))
+        mesh.polygons.foreach_set("loop_start", starts.astype(np.int32))
+        mesh.polygons.foreach_set("loop_total", totals.astype(np.int32))
+
+        return mesh
+
+    """ *********************************************************************
+    PUBLIC
+    Show spheres of given positions (n, 3) and radii (n) or scalar
+    ********************************************************************* """
+    def update(self, positions, radii):
+
+        import bpy
+
+        vertices = self.give_vertices(positions, radii)
+        n = len(vertices) // len(self.template)
+
+        if self.obj is None:
+            self.obj = bpy.data.objects.new(self.name, self.new_mesh(n))
+            bpy.context.scene.objects.link(self.obj)
+
+        elif n != self.n_spheres:
+            old = self.obj.data
+            self.obj.data = self.new_mesh(n)
+            bpy.data.meshes.remove(old)
+
+        mesh = self.obj.data
+        mesh.vertices.foreach_set("co", vertices.astype(np.float32).ravel())
+        mesh.update(calc_edges=n != self.n_spheres)
+
+        self.n_spheres = n
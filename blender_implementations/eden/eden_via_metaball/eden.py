@@ -39,6 +39,11 @@ IMPORTS
 import bpy
 import numpy as np
 import os
+import sys
+
+# frame rendering lives in blender_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "common"))
+from render_queue import give_renderer
 
 """ *************************************************************************
 CLASS
@@ -61,7 +66,7 @@ class EDEN:
         self.starter = starter
 
         # Additional variables: plate and populated list
-        self.plate = np.zeros(self.plate_size)
+        self.plate = np.zeros(self.plate_size, dtype=np.uint8)
         self.plate[self.starter[0]][self.starter[1]] = 1
 
         self.populated = []
@@ -70,12 +75,16 @@ class EDEN:
         # Additional variables: mapping to blender
         # NOTE: different mapping!
         self.blender_starter = [-self.starter[0], -self.starter[1]]
-        self.mapper = {}
-        for i in range(self.plate_size[0]):
-            for j in range(self.plate_size[1]):
-                self.mapper[(i,j)] = (self.blender_starter[0] + i, self.blender_starter[1] + j, 0)
         
 
+    """ ***************************************************************************
+    PUBLIC
+    Helper function: blender location of plate cell [i, j]
+    ***************************************************************************** """
+    def lattice_to_world(self, cell):
+
+        return (self.blender_starter[0] + cell[0], self.blender_starter[1] + cell[1], 0)
+
     """ ***************************************************************************
     PRIVATE
     Helper function: finds free slots around populated cells, 4-neigh
@@ -145,10 +154,10 @@ class EDEN:
     PUBLIC
     call to grow eden pattern
     **************************************************************************** """
-    def grow_pattern(self, render_iter, render_path):
+    def grow_pattern(self, render_iter, renderer):
         
         # create starter metaball object
-        bpy.ops.object.metaball_add(type='PLANE', location=self.mapper[self.starter[0], self.starter[1]], radius=0.5)
+        bpy.ops.object.metaball_add(type='PLANE', location=self.lattice_to_world(self.starter), radius=0.5)
         obj = bpy.context.active_object.data
 
         for sample in range(self.n_iter):
@@ -166,7 +175,7 @@ class EDEN:
      
             # move metaball in direction of new cell
             element = obj.elements.new()
-            element.co = self.mapper[(next_grow_site_coord[0], next_grow_site_coord[1])]
+            element.co = self.lattice_to_world(next_grow_site_coord)
             element.radius = 1.3
 
             # filter out cells in populated list with no free slots
@@ -174,8 +183,7 @@ class EDEN:
             
             # render scene
             if sample % render_iter == 0:
-                bpy.context.scene.render.filepath = os.path.join(render_path,str(sample))
-                bpy.ops.render.render(write_still=True)
+                renderer.render(sample)
 
 """ ************************************************************************************** 
 MAIN
@@ -192,8 +200,9 @@ def main():
                 starter=[500,500])
 
 
-    eden.grow_pattern(render_iter=50, 
-                     render_path='/home/lovro/Documents/FER/diplomski/growth_models_results/blender_impl/eden/eden_metaball/tmp')
+    # queue is closed also if growth fails
+    with give_renderer("eden_metaball") as renderer:
+        eden.grow_pattern(render_iter=50, renderer=renderer)
 
 """ ************************************************************************************** 
 ROOT
@@ -60,7 +60,7 @@ class EDEN:
         self.starter = starter
 
         # Additional variables: plate 
-        self.plate = np.zeros(self.plate_size)
+        self.plate = np.zeros(self.plate_size, dtype=np.uint8)
         self.plate[self.starter[0]][self.starter[1]] = 1
         
         # populated list (that will be filtered)
@@ -73,12 +73,16 @@ class EDEN:
 
         # Additional variables: mapping to blender
         self.blender_starter = [-self.starter[0], -self.starter[1]]
-        self.mapper = {}
-        for i in range(self.plate_size[0]):
-            for j in range(self.plate_size[1]):
-                self.mapper[(i,j)] = (self.blender_starter[0] + i, self.blender_starter[1] + j, 0)
         
 
+    """ ***************************************************************************
+    PUBLIC
+    Helper function: blender location of plate cell [i, j]
+    ***************************************************************************** """
+    def lattice_to_world(self, cell):
+
+        return (self.blender_starter[0] + cell[0], self.blender_starter[1] + cell[1], 0)
+
     """ ***************************************************************************
     PRIVATE
     Helper function: finds free slots around populated cells, 4-neigh
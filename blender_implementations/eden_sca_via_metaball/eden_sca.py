@@ -453,7 +453,7 @@ class eden_sca:
 
             # move metaball in direction of new cell
             element = metamesh.elements.new()
-            loc = self.eden.mapper[(cell[0], cell[1])]
+            loc = self.eden.lattice_to_world(cell)
             loc = (loc[0], loc[1], height)
             element.co = loc
             element.radius = radius
@@ -29,19 +29,16 @@
 import numpy as np 
 import bpy
 import os
+import sys
 
-class Particle:
+# batched flow lives next to this script, frame rendering and sphere mesh in
+# blender_implementations/common
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from render_queue import give_renderer
+from flow_batch import FlowBatch
+from sphere_cloud import SphereCloud
 
-    def __init__(self, position, size):
-
-        self.position = np.array(position)
-        self.size = size
-        self.stuck = False
-
-        bpy.ops.mesh.primitive_uv_sphere_add(size=size, location=position)
-        self.blender_sphere = bpy.context.object
-
-    
 class FlowAgg:
 
     """ #####################################################################
@@ -57,7 +54,7 @@ class FlowAgg:
         area,
         particle_size,
         prox_thresh,
-        render_out
+        renderer
     ):
 
         self.radius_range = radius_range
@@ -65,91 +62,25 @@ class FlowAgg:
         self.area = area
         self.particle_size = particle_size
         self.prox_thresh = prox_thresh
-        self.render_out = render_out
+        self.renderer = renderer
 
-        self.aggregate = []
         self.x0 = area["xm"]
         self.y0 = area["ym"]
-        self.aggregate.append(Particle([self.x0, self.y0, 0], particle_size))
-
-
-    def ini_particle(self):
-
-        phi = np.random.rand() * 2 * np.pi
-        x = self.area["radius"] * np.cos(phi)
-        y = self.area["radius"] * np.sin(phi)
-
-        return Particle([x,y,0], self.particle_size)
-
-
-    def move_angle(self, phi_low, phi_high, particle, add_amp=1):
-
-        phi = np.random.rand() * (phi_high - phi_low) + phi_low
-
-        dx = np.cos(phi)
-        dy = np.sin(phi)
-
-        particle.position[0] += self.jump_amp["x"] * add_amp * dx
-        particle.position[1] += self.jump_amp["y"] * add_amp * dy
-
-        particle.blender_sphere.location = particle.position
-
-    def move(self, particle):
-
-        # if close to center
-
-        # middle bottom
-        if particle.position[0] > self.x0 - 1 and particle.position[0] < self.x0 + 1 and particle.position[1] < self.y0:
-
-            self.move_angle(np.pi, 3*np.pi/2, particle, 4)
-
-        # middle top
-        if particle.position[0] > self.x0 - 1 and particle.position[0] < self.x0 + 1 and particle.position[1] > self.y0:
-
-            self.move_angle(- np.pi / 2, np.pi / 2, particle, 4)
 
-        
-        # middle left
-        if particle.position[1] > self.y0 - 1 and particle.position[1] < self.y0 + 1 and particle.position[0] < self.x0:
+        # particle movement and sticking without bpy
+        self.flow = FlowBatch([self.x0, self.y0], jump_amp, area["radius"], prox_thresh)
+        self.flow.add_to_aggregate([[self.x0, self.y0]])
 
-            self.move_angle(0, np.pi, particle, 4)
+        # aggregate and free particles are one mesh object
+        self.spheres = SphereCloud("flow_agg")
 
-        # middle right
-        if particle.position[1] > self.y0 - 1 and particle.position[1] < self.y0 + 1 and particle.position[0] > self.x0:
 
-            self.move_angle(np.pi, 2 * np.pi, particle, 4)
+    def update_spheres(self):
 
+        points = np.concatenate((self.flow.aggregate.points, self.flow.positions))
+        positions = np.column_stack((points, np.zeros(len(points))))
 
-        # top left
-        if particle.position[0] < self.x0 and particle.position[1] > self.y0:
-
-            self.move_angle(3 * np.pi / 2, 2 * np.pi, particle)
-            
-        # top right
-        if particle.position[0] > self.x0 and particle.position[1] > self.y0:
-
-            self.move_angle(np.pi, 3 * np.pi / 2, particle)
-
-        # bot left
-        if particle.position[0] < self.x0 and particle.position[1] < self.y0:
-
-            self.move_angle(0, np.pi / 2, particle)
-
-        # bot right
-        if particle.position[0] > self.x0 and particle.position[1] < self.y0:
-
-            self.move_angle(np.pi / 2, np.pi, particle)
-
-
-    def is_close(self, particle):
-
-        for a_particle in self.aggregate:
-
-            if np.linalg.norm(a_particle.position - particle.position) < self.prox_thresh:
-
-                return True
-
-        return False
+        self.spheres.update(positions, self.particle_size)
 
 
     def add_shape(self, radius, n_particles):
@@ -158,11 +89,7 @@ class FlowAgg:
                            stop=2 * np.pi,
                            num=n_particles)
 
-        for phi in phis:
-
-            x = radius * np.cos(phi)
-            y = radius * np.sin(phi)
-            self.aggregate.append(Particle([x,y,0], self.particle_size))
+        self.flow.add_to_aggregate(np.stack((radius * np.cos(phis), radius * np.sin(phis)), axis=1))
 
 
 
@@ -170,7 +97,6 @@ class FlowAgg:
     def grow(self):
 
         render_iter = 0
-        n_stuck = 0
 
         radii = np.linspace(start=self.radius_range[0], 
                             stop=self.radius_range[1], 
@@ -184,51 +110,36 @@ class FlowAgg:
 
             self.add_shape(radius, n_particles)
 
-            free_particles = []
-            n_stuck = 0
-            for particle in range(n_particles):
-                free_particles.append(self.ini_particle())
-                
-            to_add = []
-
-            while True:
-
-                for f_particle in free_particles:
+            # all free particles move at once, scene is updated only on frames
+            self.flow.spawn(n_particles)
 
-                    if f_particle.stuck == False:
+            while not self.flow.is_done():
 
-                        self.move(f_particle)
+                stuck = self.flow.step()
 
-                        if self.is_close(f_particle) == True:
+                if len(stuck) > 0:
 
-                            # stick particle to aggregate
-                            to_add.append(f_particle)
+                    # render
+                    self.update_spheres()
+                    self.renderer.render(render_iter)
+                    render_iter += 1
 
-                            # set stuck
-                            f_particle.stuck = True
-                            n_stuck += 1
-
-                            # render
-                            bpy.context.scene.render.filepath = os.path.join(self.render_out, str(render_iter))
-                            bpy.ops.render.render(write_still=True)
-                            render_iter += 1
-
-                if n_stuck == len(free_particles):
-                    break
-
-            self.aggregate.extend(to_add)
+            self.flow.add_to_aggregate(self.flow.positions)
 
 
 def main():
 
-    fa = FlowAgg(radius_range=[1, 10, 20],
-                jump_amp={"x":0.2, "y":0.2},
-                area={"xm":0, "ym":0, "radius":10},
-                particle_size=0.2,
-                prox_thresh=0.4,
-                render_out='/home/lovro/Documents/FER/diplomski/growth_models_results/blender_impl/flow_agg/tmp/'
-                )
+    # queue is closed also if growth fails
+    with give_renderer("flow_agg") as renderer:
+
+        fa = FlowAgg(radius_range=[1, 10, 20],
+                    jump_amp={"x":0.2, "y":0.2},
+                    area={"xm":0, "ym":0, "radius":10},
+                    particle_size=0.2,
+                    prox_thresh=0.4,
+                    renderer=renderer
+                    )
 
-    fa.grow()
+        fa.grow()
     
 main()
@@ -0,0 +1,257 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+#############################################################################
+# DESCRIPTION:
+# Batched flow aggregation (no bpy): all free particles are moved at once
+# with drift rules applied as array masks and tested for sticking against
+# grid index of aggregate
+#############################################################################
+
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+
+########################### STANDARD IMPORTS ################################
+import numpy as np
+
+""" *************************************************************************
+Key of grid cell (x, y) packed in one int64, |y| < 2^31
+************************************************************************* """
+KEY_STRIDE = np.int64(1) << 32
+
+def give_keys(cells):
+
+    return cells[:, 0] * KEY_STRIDE + cells[:, 1]
+
+""" *************************************************************************
+CLASS
+Grid index of aggregate points in plane
+Points are sorted by key of their cell (cell side is proximity threshold),
+so all points of cell are one slice found with searchsorted and closeness
+of many query points is tested with 3x3 neighbour cells at once
+************************************************************************* """
+class AggregateGrid():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        cell_size: scalar, proximity threshold
+    ********************************************************************* """
+    def __init__(self, cell_size):
+
+        self.cell_size = cell_size
+        self.points = np.zeros((0, 2))
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.max_count = 0
+
+    def __len__(self):
+        return len(self.points)
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Integer grid cells of points
+    ********************************************************************* """
+    def give_cells(self, points):
+
+        return np.floor(points / self.cell_size).astype(np.int64)
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Add points (n, 2) to index
+    ********************************************************************* """
+    def add(self, points):
+
+        points = np.concatenate((self.points, np.asarray(points, dtype=np.float64).reshape(-1, 2)))
+        keys = give_keys(self.give_cells(points))
+
+        order = np.argsort(keys, kind="stable")
+        self.points = points[order]
+        self.keys = keys[order]
+
+        if len(self.keys) > 0:
+            self.max_count = int(np.max(np.unique(self.keys, return_counts=True)[1]))
+
+    """ *********************************************************************
+    PUBLIC HELPER FUNCTION
+    Mask of query points (n, 2) closer than threshold to any point in index
+    ********************************************************************* """
+    def touching(self, points, threshold):
+
+        hit = np.zeros(len(points), dtype=bool)
+        if len(self.points) == 0 or len(points) == 0:
+            return hit
+
+        cells = self.give_cells(points)
+        threshold_squared = threshold ** 2
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+
+                keys = give_keys(cells + np.array([dx, dy]))
+                start = np.searchsorted(self.keys, keys, side="left")
+                count = np.searchsorted(self.keys, keys, side="right") - start
+
+                # k-th point of every neighbour cell at once
+                for k in range(self.max_count):
+
+                    query = np.flatnonzero((count > k) & ~hit)
+                    if len(query) == 0:
+                        break
+
+                    offset = self.points[start[query] + k] - points[query]
+                    hit[query] |= np.sum(offset ** 2, axis=1) < threshold_squared
+
+        return hit
+
+""" *************************************************************************
+CLASS
+Free particles drifting towards center (x0, y0) of flow
+Drift rules of FlowAgg.move are applied in same order, each to particles
+selected by mask of current positions:
+    + bands around axes (|x - x0| < 1 or |y - y0| < 1): jump 4x in half
+      plane away from the axis side
+    + quadrants: jump in quarter of angles pointing towards center
+Band rules can push particle away from center for good, so particles
+further than kill_radius are respawned on spawn circle (as in DLA)
+************************************************************************* """
+class FlowBatch():
+
+    """ *********************************************************************
+    CONSTRUCTOR
+        center: [x0, y0]
+        jump_amp: {x:float, y:float}
+        spawn_radius: scalar, free particles start on circle of this radius
+        prox_thresh: scalar, particle closer to aggregate sticks
+        kill_radius: scalar, default 2 * spawn_radius
+        rng: np.random.RandomState, global numpy stream if None
+    ********************************************************************* """
+    def __init__(self, center, jump_amp, spawn_radius, prox_thresh, kill_radius=None, rng=None):
+
+        self.center = np.array(center, dtype=np.float64)
+        self.jump = np.array([jump_amp["x"], jump_amp["y"]], dtype=np.float64)
+        self.spawn_radius = spawn_radius
+        self.prox_thresh = prox_thresh
+        self.kill_radius = kill_radius if kill_radius is not None else 2 * spawn_radius
+        self.rng = np.random if rng is None else rng
+
+        self.aggregate = AggregateGrid(prox_thresh)
+
+        self.positions = np.zeros((0, 2))
+        self.stuck = np.zeros(0, dtype=bool)
+
+    """ *********************************************************************
+    PUBLIC
+    Start new round with n free particles on spawn circle, returns positions
+    ********************************************************************* """
+    def spawn(self, n):
+
+        self.positions = self.give_spawn_positions(n)
+        self.stuck = np.zeros(n, dtype=bool)
+
+        return self.positions
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    n random positions on spawn circle
+    ********************************************************************* """
+    def give_spawn_positions(self, n):
+
+        phi = self.rng.rand(n) * 2 * np.pi
+
+        return np.stack((self.spawn_radius * np.cos(phi),
+                         self.spawn_radius * np.sin(phi)), axis=1)
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    Jump selected particles in random angle from [phi_low, phi_high)
+    ********************************************************************* """
+    def move_angle(self, mask, phi_low, phi_high, amp=1):
+
+        selected = np.flatnonzero(mask)
+        phi = self.rng.rand(len(selected)) * (phi_high - phi_low) + phi_low
+
+        self.positions[selected, 0] += self.jump[0] * amp * np.cos(phi)
+        self.positions[selected, 1] += self.jump[1] * amp * np.sin(phi)
+
+    """ *********************************************************************
+    PRIVATE HELPER FUNCTION
+    One drift of all particles in active mask
+    ********************************************************************* """
+    def drift(self, active):
+
+        x0, y0 = self.center
+        x = self.positions[:, 0]
+        y = self.positions[:, 1]
+        pi = np.pi
+
+        # bands around axes (masks use positions after previous rule)
+        self.move_angle(active & (x > x0 - 1) & (x < x0 + 1) & (y < y0), pi, 3 * pi / 2, 4)
+        self.move_angle(active & (x > x0 - 1) & (x < x0 + 1) & (y > y0), -pi / 2, pi / 2, 4)
+        self.move_angle(active & (y > y0 - 1) & (y < y0 + 1) & (x < x0), 0, pi, 4)
+        self.move_angle(active & (y > y0 - 1) & (y < y0 + 1) & (x > x0), pi, 2 * pi, 4)
+
+        # quadrants
+        self.move_angle(active & (x < x0) & (y > y0), 3 * pi / 2, 2 * pi)
+        self.move_angle(active & (x > x0) & (y > y0), pi, 3 * pi / 2)
+        self.move_angle(active & (x < x0) & (y < y0), 0, pi / 2)
+        self.move_angle(active & (x > x0) & (y < y0), pi / 2, pi)
+
+    """ *********************************************************************
+    PUBLIC
+    Move all free particles once and stick ones close to aggregate
+    Returns indices of particles stuck in this step
+    ********************************************************************* """
+    def step(self):
+
+        active = ~self.stuck
+        self.drift(active)
+
+        # particles which escaped start again
+        escaped = active & (np.sum((self.positions - self.center) ** 2, axis=1) > self.kill_radius ** 2)
+        if np.any(escaped):
+            self.positions[escaped] = self.give_spawn_positions(np.count_nonzero(escaped))
+
+        free = np.flatnonzero(active)
+        stuck = free[self.aggregate.touching(self.positions[free], self.prox_thresh)]
+        self.stuck[stuck] = True
+
+        return stuck
+
+    """ *********************************************************************
+    PUBLIC
+    True when all particles of round are stuck
+    ********************************************************************* """
+    def is_done(self):
+        return bool(np.all(self.stuck))
+
+    """ *********************************************************************
+    PUBLIC
+    Add points (e.g. shape ring or stuck particles of round) to aggregate
+    ********************************************************************* """
+    def add_to_aggregate(self, points):
+        self.aggregate.add(points)
@@ -47,8 +47,19 @@ import bpy
 # Standard imports.
 import numpy as np
 import os
+import sys
+import argparse
 from colorsys import hsv_to_rgb
 
+# Processes growing SCA trees of every layer, from arguments after "--".
+# Headless runs (blender -b) use all cores, with UI open trees are grown
+# in Blender process (see grow_sca_forest).
+parser = argparse.ArgumentParser()
+parser.add_argument("-sca-processes", type=int,
+                    default=os.cpu_count() if bpy.app.background else 1)
+args, unknown = parser.parse_known_args(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else [])
+n_processes = args.sca_processes
+
 # Get scene.
 scene = bpy.context.scene
 
@@ -81,6 +92,7 @@ scaCL1 = SCACircleBrancher(center=[0,0,0.03],
                           branch_thickness_max=0.1,
                           bevel_radius_delta = 0.0012,
                           name='scaCLA',
+                          n_processes=n_processes,
                           color=hsv_to_rgb(30.0/360.0,50.0/100.0,50.0/100.0))
 
 scaCL1.initialize_sca_forest(scene)
@@ -97,6 +109,7 @@ scaCL2 = SCACircleBrancher(center=[0,0,0.03],
                           branch_thickness_max=0.1,
                           bevel_radius_delta=0.0015,
                           name='scaCLB',
+                          n_processes=n_processes,
                           color=hsv_to_rgb(30.0/360.0,50.0/100.0,70.0/100.0))
 
 scaCL2.initialize_sca_forest(scene)
@@ -113,6 +126,7 @@ scaCL3 = SCACircleBrancher(center=[0,0,0.03],
                           branch_thickness_max=0.12,
                           bevel_radius_delta=0.003,
                           name='scaCLC',
+                          n_processes=n_processes,
                           color=hsv_to_rgb(30.0/360.0,50.0/100.0,60.0/100.0))
 
 scaCL3.initialize_sca_forest(scene)
@@ -129,6 +143,7 @@ scaCL4 = SCACircleBrancher(center=[0,0,0.03],
                           branch_thickness_max=0.17,
                           bevel_radius_delta=0.005,
                           name='scaCLD',
+                          n_processes=n_processes,
                           color=hsv_to_rgb(30.0/360.0,50.0/100.0,50.0/100.0))
 
 scaCL4.initialize_sca_forest(scene)
@@ -33,57 +33,52 @@
 This module defines one SCA object.
 
 Contains:
-    Branch class
+    give_closest function
     Leaf class
     SCA class
 
 """
 
-# Blender imports.
-import bpy
-
 # Standard imports.
 import numpy as np 
-import copy
 import math
 import os
+import sys
 
-class Branch:
-    """ Defines the branch of SCA tree
+# Project specific imports, branch store lives in blender_implementations/common.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from branch_store import BranchStore
 
-    Attributes:
-        position (np.array): end vertex of a branch.
-        parent (Branch): parent (containing start vertex) of a branch.
-        direction (np.array): direction of growth.
+def give_closest(points, targets, chunk_size=2**20):
+    """ Index of and distance to closest target for every point.
 
-    Metods:
-        __init__()
-        reset()
-        give_next_branch()
+    Distance matrix is computed in chunks of points, so that at most
+    chunk_size distances are held in memory at once.
+
+    Args:
+        points (np.array): (n, 3) array.
+        targets (np.array): (m, 3) array.
+        chunk_size (int): maximal number of distances in one chunk.
+
+    Returns:
+        (np.array, np.array): indices into targets and distances, both of length n.
 
     """
 
-    def __init__(self, position, parent, direction):
+    closest = np.empty(len(points), dtype=np.int64)
+    dist = np.empty(len(points))
 
-        # User defined.
-        self.position = position
-        self.parent = parent
-        self.direction = direction
+    step = max(1, chunk_size // max(1, len(targets)))
 
-        # Additional variables.
-        self.count = 0
-        self.original_direction = copy.copy(direction)
-        
-    def reset(self):
-        """ Resets direction of growth and number of leaf influenced the direction."""
-        self.direction = copy.copy(self.original_direction)
-        self.count = 0
+    for start in range(0, len(points), step):
 
-    def give_next_branch(self):
-        """ Create new branch using direction and position of existing one. """
-        next_position = np.array(self.position) + np.array(self.direction)
-        next_branch = Branch(next_position, self, copy.copy(self.direction))
-        return next_branch
+        chunk = points[start:start+step]
+        dists = np.linalg.norm(chunk[:, np.newaxis, :] - targets[np.newaxis, :, :], axis=2)
+
+        closest[start:start+step] = np.argmin(dists, axis=1)
+        dist[start:start+step] = dists[np.arange(len(chunk)), closest[start:start+step]]
+
+    return closest, dist
 
 class Leaf:
     """ Defines attractor point in SCA.
@@ -91,17 +86,19 @@ class Leaf:
     Attributes:
         center (np.array): center of attractor points area
         spread (np.array): spread of attractor points around center
+        rng (np.random.RandomState): random stream, global numpy stream if None
 
     Methods:
         __init__()
 
     """
 
-    def __init__(self, center, spread):
+    def __init__(self, center, spread, rng=None):
         
         # user defined
         self.center = center
         self.spread = spread
+        self.rng = np.random if rng is None else rng
         
         # additional variables
         self.position = self.__calculate_leaf_position()
@@ -110,9 +107,9 @@ class Leaf:
     def __calculate_leaf_position(self):
         """ Calculate leaf position based on center and spread. """
 
-        x = np.random.rand(1)[0] * self.spread[0] - self.spread[0] / 2 + self.center[0]
-        y = np.random.rand(1)[0] * self.spread[1] - self.spread[1] / 2 + self.center[1]
-        z = np.random.rand(1)[0] * self.spread[2] - self.spread[2] / 2 + self.center[2]
+        x = self.rng.rand(1)[0] * self.spread[0] - self.spread[0] / 2 + self.center[0]
+        y = self.rng.rand(1)[0] * self.spread[1] - self.spread[1] / 2 + self.center[1]
+        z = self.rng.rand(1)[0] * self.spread[2] - self.spread[2] / 2 + self.center[2]
     
         return [x,y,z]
 
@@ -125,6 +122,7 @@ class SCA:
         leaf_spread (np.array): spread of attractor points around center.
         n_leaves (int): number of attractor points.
         growth_dist (dict): {'min':min_dist, 'max':max_dist}
+        rng (np.random.RandomState): random stream of leaves, global numpy stream if None.
 
     Methods:
         __init__()
@@ -136,7 +134,8 @@ class SCA:
                 root_position,
                 leaves_cloud_center,
                 leaves_spread,
-                n_leaves):
+                n_leaves,
+                rng=None):
 
         # User defined.
         self.root_position = root_position
@@ -149,30 +148,24 @@ class SCA:
         # Leaf cloud.
         self.leaves = []
         for i in range(self.n_leaves):
-            self.leaves.append(Leaf(self.leaf_cloud_center, self.leaves_spread))
+            self.leaves.append(Leaf(self.leaf_cloud_center, self.leaves_spread, rng))
+        self.leaf_positions = np.array([leaf.position for leaf in self.leaves])
 
         # Create root of the tree (point without parent) and turn its direction to leafs.
-        self.branches = []
-        self.root = Branch(self.root_position, None, None)
+        self.branches = BranchStore()
+        self.branches.append(self.root_position, -1, [0, 0, 0])
+        self.root = self.branches[0]
         closest_leaf_to_root = self.__find_closest_leaf_to_branch(self.root)
-        root_direction = np.array(closest_leaf_to_root.position) - np.array(self.root.position)
+        root_direction = np.array(closest_leaf_to_root.position) - np.array(self.root_position)
         root_direction /= np.linalg.norm(root_direction)
-        self.root.direction = root_direction
-        self.branches.append(self.root)
+        self.branches.directions[0] = root_direction
 
     def __find_closest_leaf_to_branch(self, branch):
         """ For given branch (think of branch as point!) find closest leaf. """
 
-        closest_dist = math.inf
-        closest_leaf = self.leaves[0]
+        dists = np.linalg.norm(self.leaf_positions - np.array(branch.position), axis=1)
 
-        for leaf in self.leaves:
-            dist = np.linalg.norm(np.array(leaf.position)-np.array(branch.position))
-            if dist < closest_dist:
-                closest_dist = dist
-                closest_leaf = leaf
-
-        return closest_leaf
+        return self.leaves[np.argmin(dists)]
 
     def grow(self):
         """ Performs growth from root to all attractor points. """
@@ -183,78 +176,77 @@ class SCA:
     def __grow_to_point_cloud(self):
         """ Grow branch from root till leaf cloud. """
 
-        curr_branch = self.root 
+        curr_branch = self.root.index
         found = False
 
         while not found:
 
-            for i in range(self.n_leaves):
-
-                dist = np.linalg.norm(np.array(self.leaves[i].position)-np.array(curr_branch.position))
+            position = self.branches.positions[curr_branch]
+            direction = self.branches.directions[curr_branch]
+            dists = np.linalg.norm(self.leaf_positions - position, axis=1)
 
-                if dist < self.growth_dist['max']:
-                    found = True
+            if np.min(dists) < self.growth_dist['max']:
+                found = True
 
-            # Create a new branch
+            # Create a new branch in direction of current one.
             if not found:
+                curr_branch = self.branches.append(position + direction, curr_branch, direction)
 
-                branch = curr_branch.give_next_branch()
-                curr_branch = branch
-                self.branches.append(curr_branch)
-
-    def __grow_through_point_cloud(self):
-        """ Grow branches through leaf cloud. """
-
-        # Number of reached leaves.
-        n_reached = 0
-
-        # Grow branches as long exist leaves that are not close to branches.
-        while n_reached <= self.n_leaves:
+    def __grow_through_point_cloud(self, max_iter=1000):
+        """ Grow branches through leaf cloud.
 
-            for leaf in self.leaves:
+        Every iteration each not reached leaf is associated with its closest
+        branch. Leaves closer than min growth distance are reached and stop
+        pulling. Every pulled branch grows one new branch in the mean direction
+        of its leaves. All branches grown in one iteration are added to branch
+        store at once.
 
-                if leaf.reached == True:
-                    continue
+        Args:
+            max_iter (int): maximal number of iterations.
 
-                closest_branch = None
-                record = math.inf
+        """
 
-                # For current leaf try to find closest branch.
-                for branch in self.branches:
+        # Direction of last growth of every branch. Branch pulled the same way
+        # again would grow on top of its previous child.
+        last_growth = np.full((len(self.branches), 3), np.nan)
 
-                    dist = np.linalg.norm(np.array(leaf.position) - np.array(branch.position))
+        active = np.arange(self.n_leaves)
 
-                    # for current branch leaf is too close. Leaf should not be considered.
-                    if dist < self.growth_dist['min']:
-                        leaf.riched = True
-                        n_reached += 1
-                        closest_branch = None
-                        break
+        for iteration in range(max_iter):
 
-                    # If current branch is closest or no closest branch exists.
-                    elif closest_branch == None or dist < record:
-                        closest_branch = branch
-                        record = dist
+            positions = self.branches.positions[:len(self.branches)]
+            closest, dist = give_closest(self.leaf_positions[active], positions)
 
-                # For found clostest branch change direction to current leaf.
-                if closest_branch != None:
+            # Leaves too close to a branch should not be considered anymore.
+            reached = dist < self.growth_dist['min']
+            for leaf in active[reached]:
+                self.leaves[leaf].reached = True
 
-                    new_direction = np.array(leaf.position) - np.array(closest_branch.position)
-                    new_direction = new_direction / np.linalg.norm(new_direction)
-                    closest_branch.direction = new_direction
-                    closest_branch.count += 1 
+            active = active[~reached]
+            closest = closest[~reached]
+            dist = dist[~reached]
 
+            if len(active) == 0:
+                break
 
-                # Grow branches according to number of times extended.
-                for branch in self.branches:
+            # Sum of normalized directions to leaves for every pulled branch.
+            directions = (self.leaf_positions[active] - positions[closest]) / dist[:, np.newaxis]
+            pulled, slot = np.unique(closest, return_inverse=True)
+            summed = np.zeros((len(pulled), 3))
+            np.add.at(summed, slot, directions)
 
-                    # If leaf was influencing the branch add new branch in its direction.
-                    if branch.count > 0:
+            norms = np.linalg.norm(summed, axis=1)
+            grows = norms > 1e-9
+            directions = summed / np.where(grows, norms, 1)[:, np.newaxis]
+            grows &= ~np.all(np.abs(directions - last_growth[pulled]) < 1e-6, axis=1)
 
-                        branch.direction /= branch.count
-                        new_position = branch.position + branch.direction
-                        new_branch = Branch(new_position, branch, copy.copy(branch.direction))
+            if not np.any(grows):
+                break
 
-                        self.branches.append(new_branch) 
+            # Add all new branches at once.
+            pulled = pulled[grows]
+            directions = directions[grows]
+            last_growth[pulled] = directions
 
-                    branch.reset()
+            self.branches.extend(positions[pulled] + directions, pulled, directions)
+            last_growth = np.concatenate((last_growth, np.full(directions.shape, np.nan)))
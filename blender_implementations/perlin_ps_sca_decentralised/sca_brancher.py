@@ -38,7 +38,7 @@ Contains:
 """
 
 #Project specific imports.
-from sca import SCA
+from sca_forest import grow_sca_forest
 
 # Blender imports
 import bpy
@@ -63,6 +63,10 @@ class SCACircleBrancher:
         bevel_radius_delta (float): increase of thickness in every iteration.
         name (string): name of circular SCA object.
         color (np.array): color of SCA circular object.
+        seed (int): seed of SCA trees random streams, fresh entropy if None.
+        n_processes (int): processes growing SCA trees. 1 (default) grows
+            them in this process. More processes (None: all cores) are meant
+            for headless runs (blender -b), see grow_sca_forest.
 
     Methods:
         __init__()
@@ -80,7 +84,9 @@ class SCACircleBrancher:
                  branch_thickness_max,
                  bevel_radius_delta,
                  name,
-                 color):
+                 color,
+                 seed=None,
+                 n_processes=1):
 
         # User defined.
         self.center = center
@@ -91,6 +97,8 @@ class SCACircleBrancher:
         self.n_leaves = n_leaves
         self.name = name
         self.color = color
+        self.seed = seed
+        self.n_processes = n_processes
 
         # Additional.
         self.sca_forest = []
@@ -102,6 +110,10 @@ class SCACircleBrancher:
     def initialize_sca_forest(self, scene):
         """ Confiure and grow the set of the SCA objects.
 
+        SCA trees are independent and are grown in this process or, if
+        n_processes is not 1, in a process pool. Blender objects are created
+        from grown branches in this (main) process.
+
         Args:
             scene (Blender scene object): scene where SCA objects will be placed.
 
@@ -117,7 +129,8 @@ class SCACircleBrancher:
         bpy.context.object.scale = (0,0,0)
         self.bevel_object = bpy.context.object
 
-        # For every SCA model.
+        # Configure every SCA model.
+        configs = []
         for n in range(self.n_sca_trees):
 
             # Configure SCA root position.
@@ -130,51 +143,67 @@ class SCACircleBrancher:
             yl = self.center[1] + np.sin(segment * n) * self.leaf_center_radius
             zl = self.center[2] + 0
 
-            # Configure SCA and grow.
-            sca = SCA(root_position=[xr,yr,zr],
-                      leaves_cloud_center=[xl, yl, zl],
-                      leaves_spread=self.leaves_spread,
-                      n_leaves=self.n_leaves)
-
-            sca.grow()
-
-            # Create mesh.
-            bm = bmesh.new()
-
-            for branch in sca.branches:
-                if branch.parent == None:
-                    continue
-                v1 = bm.verts.new(branch.position)
-                v2 = bm.verts.new(branch.parent.position)
-                interpolated = self.__interpolate_nodes(v1, v2, 4, 0.5, bm)
-                for i in range(len(interpolated)-1):
-                    bm.edges.new((interpolated[i], interpolated[i+1]))
-                
-            # Add a new mesh data.
-            sca_data = bpy.data.meshes.new(self.name+str(n)+"_data")  
-
-            # Add a new empty mesh object using the mesh data.
-            sca_object = bpy.data.objects.new(self.name+str(n)+"_object", sca_data) 
-            
-            # Make the bmesh the object's mesh.
-            # Transfer bmesh data do mesh data which is connected to empty mesh object.
-            bm.to_mesh(sca_data)
-            bm.free()
+            configs.append({"root_position": [xr,yr,zr],
+                            "leaves_cloud_center": [xl, yl, zl],
+                            "leaves_spread": self.leaves_spread,
+                            "n_leaves": self.n_leaves})
+
+        # Grow all SCA models.
+        forest = grow_sca_forest(configs, self.seed, self.n_processes)
+
+        # Create Blender objects.
+        for n in range(self.n_sca_trees):
+            self.sca_forest.append(self.__create_sca_object(n, forest[n], scene))
+
+    def __create_sca_object(self, n, branches, scene):
+        """ Create Blender curve object of one grown SCA tree.
+
+        Args:
+            n (int): index of SCA tree in circle.
+            branches (BranchStore): branches of grown SCA tree.
+            scene (Blender scene object): scene where SCA object will be placed.
+
+        Returns:
+            Blender curve object.
+
+        """
+
+        # Create mesh.
+        bm = bmesh.new()
+
+        for branch in branches:
+            if branch.parent == None:
+                continue
+            v1 = bm.verts.new(branch.position)
+            v2 = bm.verts.new(branch.parent.position)
+            interpolated = self.__interpolate_nodes(v1, v2, 4, 0.5, bm)
+            for i in range(len(interpolated)-1):
+                bm.edges.new((interpolated[i], interpolated[i+1]))
             
-            # Add sca object to scene, convert to curve, add bevel.
-            scene.objects.link(sca_object) 
-            sca_object.select = True
-            bpy.context.scene.objects.active = sca_object
-            bpy.ops.object.convert(target='CURVE')
-            sca_object.data.bevel_object = self.bevel_object
-
-            # Add color.
-            material = bpy.data.materials.new(self.name+str(n)+"_material")
-            material.diffuse_color = self.color
-            sca_object.active_material = material
-
-            # Store
-            self.sca_forest.append(sca_object)
+        # Add a new mesh data.
+        sca_data = bpy.data.meshes.new(self.name+str(n)+"_data")  
+
+        # Add a new empty mesh object using the mesh data.
+        sca_object = bpy.data.objects.new(self.name+str(n)+"_object", sca_data) 
+        
+        # Make the bmesh the object's mesh.
+        # Transfer bmesh data do mesh data which is connected to empty mesh object.
+        bm.to_mesh(sca_data)
+        bm.free()
+        
+        # Add sca object to scene, convert to curve, add bevel.
+        scene.objects.link(sca_object) 
+        sca_object.select = True
+        bpy.context.scene.objects.active = sca_object
+        bpy.ops.object.convert(target='CURVE')
+        sca_object.data.bevel_object = self.bevel_object
+
+        # Add color.
+        material = bpy.data.materials.new(self.name+str(n)+"_material")
+        material.diffuse_color = self.color
+        sca_object.active_material = material
+
+        return sca_object
             
     def __interpolate_nodes(self, v1, v2, n_nodes, rand_amplitude, bm):
         """ Interpolates nodes between two existing nodes.
@@ -0,0 +1,104 @@
+
+#
+# This source file is part of Growth_models.
+# Visit https://github.com/lorentzo/Growth_models for more information.
+#
+# This software is released under MIT licence.
+#
+# Copyright (c) Lovro Bosnar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+
+# -*- coding: utf-8 -*-
+
+""" Growth of independent SCA trees in a process pool.
+
+Trees are grown without Blender (sca module does not import bpy), every tree
+with its own random stream spawned from one seed. Result of every tree is a
+compact BranchStore, Blender objects are created from it in main process.
+
+Contains:
+    grow_sca_tree function
+    grow_sca_forest function
+
+"""
+
+# Standard imports.
+import numpy as np
+import multiprocessing
+import os
+import sys
+
+# Project specific imports, branch store lives in blender_implementations/common.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from sca import SCA
+from branch_store import BranchStore
+
+def grow_sca_tree(config):
+    """ Grow one SCA tree (runs in worker process).
+
+    Args:
+        config (dict): SCA constructor arguments and 'seed'
+            (np.random.SeedSequence) of tree random stream.
+
+    Returns:
+        dict: branch arrays of grown tree (BranchStore.give_arrays()).
+
+    """
+
+    config = dict(config)
+    seed = config.pop("seed")
+
+    sca = SCA(rng=np.random.RandomState(seed.generate_state(4)), **config)
+    sca.grow()
+
+    return sca.branches.give_arrays()
+
+def grow_sca_forest(configs, seed=None, n_processes=1):
+    """ Grow independent SCA trees, optionally over a process pool.
+
+    Tree n always gets n-th stream spawned from seed, so for fixed seed
+    forest does not depend on number of processes.
+
+    Args:
+        configs (list): SCA constructor arguments (dict) for every tree.
+        seed (int): seed of forest, fresh entropy if None.
+        n_processes (int): 1 (default) grows trees in current process.
+            Otherwise number of worker processes, all cores if None. Pool is
+            meant for headless runs: workers are forked from running Blender
+            (fragile with UI open) and with spawn start method they import
+            the calling bpy script again.
+
+    Returns:
+        list of BranchStore: branches of every tree, in order of configs.
+
+    """
+
+    seeds = np.random.SeedSequence(seed).spawn(len(configs))
+    jobs = [dict(config, seed=tree_seed) for config, tree_seed in zip(configs, seeds)]
+
+    if n_processes == 1:
+        results = [grow_sca_tree(job) for job in jobs]
+
+    else:
+        with multiprocessing.Pool(n_processes) as pool:
+            results = pool.map(grow_sca_tree, jobs)
+
+    return [BranchStore.from_arrays(**arrays) for arrays in results]
@@ -0,0 +1,123 @@
+""" **********************************************************************************
+IMPORTS
+*********************************************************************************** """
+################################ STANDARD LIBRARIES ###################################
+import numpy as np
+
+################################ USER LIBRARIES #######################################
+from plate import SparsePlate
+
+""" **********************************************************************************
+Arrival time of sites which were never occupied
+*********************************************************************************** """
+NOT_ARRIVED = np.iinfo(np.int32).max
+
+""" ***********************************************************************************
+CLASS
+Checkpoints of growing plate without plate copies
+For every site first checkpoint time at which site was not plate_color is stored in
+one int32 arrival array (O(plate) memory for any number of checkpoints). Plate at
+checkpoint time t is rebuilt on demand as: plate where arrival <= t, else plate_color.
+NOTE: site is shown with its current plate value from its arrival on, so sites which
+change value after they are occupied (e.g. DLA test sites) show latest value
+Dense plate: arrival array in memory or memory-mapped .npy file
+Sparse plate: one arrival tile per plate tile
+Indexing and len give checkpoint plates, so store can replace list of plate copies
+************************************************************************************* """
+class ArrivalStore:
+
+    """ ******************************************************************************
+    CONSTRUCTOR
+    plate: dense np.array or SparsePlate, store follows its changes
+    plate_color: scalar, value of free sites
+    path: .npy file for memory-mapped arrival array or None (dense plate only)
+    ******************************************************************************* """
+    def __init__(self, plate, plate_color=0, path=None):
+
+        self.plate = plate
+        self.plate_color = plate_color
+        self.times = []
+        self.sparse = isinstance(plate, SparsePlate)
+
+        if self.sparse:
+            if path is not None:
+                raise ValueError("memory-mapped arrival times need dense plate, plate_size must be given")
+            self.tiles = {}
+
+        elif path is None:
+            self.arrival = np.full(plate.shape, NOT_ARRIVED, dtype=np.int32)
+
+        else:
+            self.arrival = np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=plate.shape)
+            self.arrival[:] = NOT_ARRIVED
+
+    def __len__(self):
+        return len(self.times)
+
+    def __getitem__(self, index):
+        return self.give_plate(self.times[index])
+
+    def __iter__(self):
+        for time in self.times:
+            yield self.give_plate(time)
+
+    """ ******************************************************************************
+    PRIVATE
+    Mark occupied sites of plate (or tile) not seen before with time
+    ****************************************************************************** """
+    def mark(self, arrival, plate, time):
+
+        arrived = (plate != self.plate_color) & (arrival == NOT_ARRIVED)
+        arrival[arrived] = time
+
+    """ ******************************************************************************
+    PUBLIC
+    Store checkpoint at time (e.g. iteration number), times must not decrease
+    ****************************************************************************** """
+    def record(self, time):
+
+        if self.sparse:
+            for key, tile in self.plate.tiles.items():
+
+                arrival = self.tiles.get(key)
+                if arrival is None:
+                    arrival = np.full(tile.shape, NOT_ARRIVED, dtype=np.int32)
+                    self.tiles[key] = arrival
+
+                self.mark(arrival, tile, time)
+
+        else:
+            self.mark(self.arrival, self.plate, time)
+
+        self.times.append(time)
+
+    """ ******************************************************************************
+    PUBLIC
+    Plate as it was at last checkpoint with time <= given time
+    ****************************************************************************** """
+    def give_plate(self, time):
+
+        if not self.sparse:
+            rebuilt = np.where(self.arrival <= time, self.plate, self.plate_color)
+            return rebuilt.astype(self.plate.dtype, copy=False)
+
+        # tiles reached later are left out, so plate keeps its bounds at time
+        rebuilt = SparsePlate(self.plate.tile_size)
+        for key, arrival in self.tiles.items():
+
+            if arrival.min() > time:
+                continue
+
+            tile = self.plate.tiles[key]
+            rebuilt.tiles[key] = np.where(arrival <= time, tile, self.plate_color).astype(tile.dtype, copy=False)
+
+        return rebuilt
+
+    """ ******************************************************************************
+    PUBLIC
+    Write pending changes of memory-mapped arrival array to file
+    ****************************************************************************** """
+    def flush(self):
+
+        if not self.sparse and isinstance(self.arrival, np.memmap):
+            self.arrival.flush()
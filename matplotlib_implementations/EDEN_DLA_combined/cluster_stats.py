@@ -0,0 +1,78 @@
+""" **********************************************************************************
+IMPORTS
+*********************************************************************************** """
+################################ STANDARD LIBRARIES ###################################
+import numpy as np
+
+""" **********************************************************************************
+PUBLIC
+Boolean mask of free sites with at least one occupied 4-neigh.
+Shifted slices are used instead of np.roll so plate does not wrap around.
+occupied: np.array(dtype=bool)
+*********************************************************************************** """
+def give_perimeter(occupied):
+
+    touched = np.zeros(occupied.shape, dtype=bool)
+    touched[1:, :] |= occupied[:-1, :]
+    touched[:-1, :] |= occupied[1:, :]
+    touched[:, 1:] |= occupied[:, :-1]
+    touched[:, :-1] |= occupied[:, 1:]
+
+    return touched & ~occupied
+
+""" **********************************************************************************
+PUBLIC
+Boolean mask of occupied sites with at least one free 4-neigh (cluster border)
+*********************************************************************************** """
+def give_border(occupied):
+
+    return occupied & give_perimeter(~occupied)
+
+""" **********************************************************************************
+PUBLIC
+Radius of gyration of occupied sites
+*********************************************************************************** """
+def radius_of_gyration(occupied):
+
+    coords = np.argwhere(occupied)
+    center = coords.mean(axis=0)
+
+    return np.sqrt(np.mean(np.sum(np.power(coords - center, 2), axis=1)))
+
+""" **********************************************************************************
+PUBLIC
+Perimeter roughness: standard deviation of border distances from cluster center,
+relative to their mean. 0 if cluster has no border (plate is full)
+*********************************************************************************** """
+def perimeter_roughness(occupied):
+
+    center = np.argwhere(occupied).mean(axis=0)
+    border = np.argwhere(give_border(occupied))
+
+    if len(border) == 0:
+        return 0.0
+    radii = np.sqrt(np.sum(np.power(border - center, 2), axis=1))
+
+    return np.std(radii) / np.mean(radii)
+
+""" **********************************************************************************
+PUBLIC
+Relative drift of cluster statistics of occupied from reference
+Returns {"radius_of_gyration": drift, "perimeter_roughness": drift}
+Statistic which is 0 for reference drifts by 0 if equal, otherwise by inf
+*********************************************************************************** """
+def give_drift(occupied, reference):
+
+    drift = {}
+
+    for name, stat in [("radius_of_gyration", radius_of_gyration),
+                       ("perimeter_roughness", perimeter_roughness)]:
+
+        value = stat(occupied)
+        reference_value = stat(reference)
+        if reference_value == 0:
+            drift[name] = 0.0 if value == 0 else np.inf
+        else:
+            drift[name] = abs(value - reference_value) / reference_value
+
+    return drift
@@ -5,7 +5,11 @@ IMPORTS
 ################################# STANDARD IMPORTS #####################################
 import numpy as np 
 import matplotlib.pyplot as plt
-import copy
+
+################################# USER LIBRARIES #####################################
+from plate import new_plate
+from arrival_store import ArrivalStore
+from walker_batch import WalkerBatch
 
 
 """ ************************************************************************************
@@ -22,10 +26,11 @@ class DLA:
 
     """ **********************************************************************
     Constructor
-    plate_size: [max_x, max_y]. Need to mach eden model
+    plate_size: [max_x, max_y] or None for sparse unbounded plate. Need to mach eden model
     starter: [x01,y01], Need to match eden model
     n_iter, radius_spawn, radius_kill, radius_jump: scalars
     dla_attractor: 'circle', 'line', 'none'
+    arrival_path: .npy file for memory-mapped checkpoints or None (see ArrivalStore)
     NOTE: radius_jump > radius spawn, radius_kill > radius_jump
     ********************************************************************** """
     def __init__(self, 
@@ -39,7 +44,8 @@ class DLA:
                  checkpoint,
                  plate_color=0,
                  cell_color=2,
-                 test_color=3):
+                 test_color=3,
+                 arrival_path=None):
 
         # User specified variables
         self.radius_spawn = radius_spawn
@@ -63,13 +69,13 @@ class DLA:
         self.test_color = test_color
 
         # Additional variables
-        self.plate = np.zeros(self.plate_size)
+        self.plate = new_plate(self.plate_size)
         self.plate[self.starter[0], self.starter[1]] = self.cell_color
         self.set_attractors(self.dla_attractor)
 
         self.occupied = []
         self.occupied.append(np.array(self.starter))
-        self.plate_throught_iterations = []
+        self.checkpoints = ArrivalStore(self.plate, self.plate_color, arrival_path)
 
     
     """ *******************************************************
@@ -101,7 +107,7 @@ class DLA:
             x = int(self.starter[0] + 10 * np.sin(t))
             y = int(self.starter[1] + 10 * np.cos(t))
 
-            self.plate[x][y] = self.cell_color
+            self.plate[x, y] = self.cell_color
 
     """ ***************************************************
     PRIVATE
@@ -116,10 +122,10 @@ class DLA:
         for sample in range(40):
 
             if sample % 2 == 1:
-                self.plate[self.starter[0]][self.starter[1]+cnt_line] = self.cell_color
+                self.plate[self.starter[0], self.starter[1]+cnt_line] = self.cell_color
 
             else:
-                self.plate[self.starter[0]][self.starter[1]-cnt_line] = self.cell_color
+                self.plate[self.starter[0], self.starter[1]-cnt_line] = self.cell_color
 
             cnt_line += 1
 
@@ -184,7 +190,7 @@ class DLA:
         y = int(self.starter[0] + self.radius_spawn * np.cos(t))
 
         # draw randomly chosen pixels on circle for test
-        self.plate[x][y] = self.test_color
+        self.plate[x, y] = self.test_color
 
         return [x,y]
 
@@ -209,11 +215,36 @@ class DLA:
 
         return False
 
+    """ ***********************************************************
+    Private function
+    Stores plate on checkpoint
+    ********************************************************** """
+    def store_checkpoint(self, particle):
+
+        if particle % self.shoot == 0:
+            print("DLA Particles:", particle)
+            self.checkpoints.record(particle)
+
     """ ***********************************************************
     Public function
     Call to run the creation of DLA pattern
+    mode: 'single' one walker at a time
+          'batch' n_walkers walkers move at once (see WalkerBatch)
+    n_walkers: scalar, used only in 'batch' mode
     ********************************************************** """
-    def grow_pattern(self):
+    def grow_pattern(self, mode="single", n_walkers=1000):
+
+        if mode == "single":
+            self.grow_single()
+
+        if mode == "batch":
+            self.grow_batch(n_walkers)
+
+    """ ***********************************************************
+    Private function
+    DLA pattern, one walker at a time
+    ********************************************************** """
+    def grow_single(self):
 
         # for every paticle
         for particle in range(self.n_iter):
@@ -222,16 +253,37 @@ class DLA:
             dla_point = self.calculate_new_dla_point()
     
             # mark position on plate
-            self.plate[dla_point[0]][dla_point[1]] = self.cell_color
+            self.plate[dla_point[0], dla_point[1]] = self.cell_color
+
+            self.store_checkpoint(particle)
+
+    """ ***********************************************************
+    Private function
+    DLA pattern, many walkers moving at once
+    ********************************************************** """
+    def grow_batch(self, n_walkers):
+
+        if self.plate_size is None:
+            raise ValueError("batch mode needs dense plate, plate_size must be given")
+
+        walkers = WalkerBatch(self.plate, self.starter, self.cell_color,
+                              self.radius_spawn, self.radius_kill, n_walkers)
+
+        particle = 0
+        while particle < self.n_iter:
+
+            # move all walkers, stuck ones are already marked on plate
+            stuck = walkers.step(self.n_iter - particle)
 
-            if particle % self.shoot == 0:
-                print("DLA Particles:", particle)
-                self.plate_throught_iterations.append(copy.copy(self.plate))
+            for dla_point in stuck:
+                self.store_checkpoint(particle)
+                particle += 1
 
     """ **************************************************************
     PUBLIC
-    Fetch created dla pattern
+    Fetch created dla pattern, plates are rebuilt on indexing
     ************************************************************** """
     def give_plates(self):
-        return self.plate_throught_iterations
+        self.checkpoints.flush()
+        return self.checkpoints
 
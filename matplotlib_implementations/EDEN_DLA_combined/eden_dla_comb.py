@@ -5,15 +5,17 @@ IMPORTS
 
 ############################## STANDARD LIBRARIES ##############################
 import numpy as np
-import matplotlib.pyplot as plt
 import os
+import sys
 import time
 import argparse
 
 ############################## USER LIBRARIES ##################################
 from eden_lattice import EDEN
 from dla_lattice import DLA
-from img_to_video import images_to_video
+# frame writer lives in matplotlib_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from frame_writer import FrameWriter, FRAME_SIZE
 
 """ ****************************************************************************
 CLASS
@@ -26,12 +28,20 @@ class DLA_EDEN:
 
     """ ***********************************************************************************
     CONSTRUCTOR
-    plate_size: [x_max, y_max]
+    plate_size: [x_max, y_max] or None for sparse unbounded plate
     n_iter: scalar
     starter: [x,y]
     dla_attractor: 'circle', 'line', 'none'
     radius_spawn, radius_kill, radius_jump: scalars
     NOTE: radius_jump > radius spawn, radius_kill > radius_jump
+    eden_mode: 'exact', 'legacy', 'batch'. See EDEN.grow_pattern
+    eden_batch_size: scalar, cells occupied per iteration in 'batch' mode
+    eden_drift: (y/n) report drift of 'batch' mode from 'exact' mode (slow)
+    seed: seed of EDEN drift reference (global numpy random state is seeded in main)
+    dla_mode: 'single', 'batch'. See DLA.grow_pattern
+    dla_n_walkers: scalar, walkers moving at once in 'batch' mode
+    mmap: (y/n) checkpoints of dense plates are kept in memory-mapped arrival time
+          files in out folder instead of RAM (see ArrivalStore)
     NOTE: if not 'eden' or 'dla' in variable name then it is common for both eden and dla
     *********************************************************************************** """
     def __init__(self, 
@@ -44,7 +54,14 @@ class DLA_EDEN:
                  dla_radius_kill, 
                  dla_radius_jump,
                  checkpoint,
-                 out_folder):
+                 out_folder,
+                 eden_mode="exact",
+                 eden_batch_size=1,
+                 dla_mode="single",
+                 dla_n_walkers=1000,
+                 mmap='n',
+                 eden_drift='n',
+                 seed=None):
 
                  # user specified variables
                  self.plate_size = plate_size
@@ -57,6 +74,13 @@ class DLA_EDEN:
                  self.dla_radius_spawn = dla_radius_spawn
                  self.checkpoint = checkpoint
                  self.out_folder = out_folder
+                 self.eden_mode = eden_mode
+                 self.eden_batch_size = eden_batch_size
+                 self.dla_mode = dla_mode
+                 self.dla_n_walkers = dla_n_walkers
+                 self.mmap = mmap
+                 self.eden_drift = eden_drift
+                 self.seed = seed
 
 
     """ **************************************************************************************
@@ -65,15 +89,27 @@ class DLA_EDEN:
     ************************************************************************************** """
     def create_pattern(self):
 
+        PATH = os.path.join('.', self.out_folder)
+        if not os.path.exists(PATH):
+            os.mkdir(PATH)
+
+        # checkpoints in RAM or memory-mapped files
+        eden_arrival_path = None
+        dla_arrival_path = None
+        if self.mmap == 'y':
+            eden_arrival_path = os.path.join(PATH, "eden_arrival.npy")
+            dla_arrival_path = os.path.join(PATH, "dla_arrival.npy")
+
         # initialise EDEN model
         eden = EDEN(self.plate_size, 
                     self.eden_n_iter, 
                     self.starter,
-                    self.checkpoint)
+                    self.checkpoint,
+                    arrival_path=eden_arrival_path)
 
         # fill plate with EDEN pattern
         start = time.time()
-        eden.grow_pattern()
+        eden.grow_pattern(self.eden_mode, self.eden_batch_size, self.eden_drift, self.seed)
         end = time.time()
         print("Duration:", end-start)
         eden_plates = eden.give_plates()
@@ -86,11 +122,12 @@ class DLA_EDEN:
                   self.dla_radius_spawn, 
                   self.dla_radius_kill,
                   self.dla_radius_jump,
-                  self.checkpoint)
+                  self.checkpoint,
+                  arrival_path=dla_arrival_path)
 
         # fill plate with DLA pattern
         start = time.time()
-        dla.grow_pattern()
+        dla.grow_pattern(self.dla_mode, self.dla_n_walkers)
         end = time.time()
         print("Duration:", end-start)
         dla_plates = dla.give_plates()
@@ -101,32 +138,20 @@ class DLA_EDEN:
     """ ***********************************************************************************
     PRIVATE
     Join eden and dla plates 
-    save as images in a folder
+    stream joined plates to video in a folder
     *********************************************************************************** """
     def join_and_save(self, dla_plates, eden_plates):
 
         PATH = os.path.join('.', self.out_folder)
-        if not os.path.exists(PATH):
-            os.mkdir(PATH)
+
+        frame_size = None if self.plate_size is not None else FRAME_SIZE
+        frames = FrameWriter(os.path.join(PATH, "result.avi"), frame_size=frame_size)
 
         n = min(len(eden_plates), len(dla_plates))
         for i in range(n):
+            frames.write(dla_plates[i] + eden_plates[i])
 
-            out_file = os.path.join(PATH, str(i+1))
-
-            eden_dla_plate = dla_plates[i] + eden_plates[i]
-
-            fig = plt.figure()
-            ax = plt.subplot(111)
-            ax.imshow(eden_dla_plate)
-
-            fig.savefig(out_file)
-
-
-        # create video from images
-        img_path = os.path.join('.', self.out_folder)
-        video_path = os.path.join('.', self.out_folder)
-        images_to_video(img_path, video_path)
+        frames.release()
 
 
 
@@ -140,7 +165,7 @@ def main():
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-plate-size",
-                        help="Tuple x_max, y_max", 
+                        help="Tuple x_max, y_max, omit for sparse unbounded plate", 
                         type=str)
 
     parser.add_argument("-n-iter-dla",
@@ -179,12 +204,48 @@ def main():
                         help="Folder where plots throught iterations will be stored",
                         type=str)
 
+    parser.add_argument("-eden-mode",
+                        help="exact, legacy, batch",
+                        type=str,
+                        default="exact")
+
+    parser.add_argument("-eden-batch-size",
+                        help="Scalar, EDEN cells occupied per iteration in batch mode",
+                        type=int,
+                        default=1)
+
+    parser.add_argument("-eden-drift",
+                        help="(y/n) in batch mode compare EDEN with pattern grown in exact mode",
+                        type=str,
+                        default='n')
+
+    parser.add_argument("-dla-mode",
+                        help="single, batch",
+                        type=str,
+                        default="single")
+
+    parser.add_argument("-dla-n-walkers",
+                        help="Scalar, DLA walkers moving at once in batch mode",
+                        type=int,
+                        default=1000)
+
+    parser.add_argument("-mmap",
+                        help="(y/n) keep checkpoints in memory-mapped files in out folder",
+                        type=str,
+                        default='n')
+
+    parser.add_argument("-seed",
+                        help="Seed for random generator (same seed, same pattern and drift report)",
+                        type=int,
+                        default=None)
+
     args = parser.parse_args()
 
     # plate size
     plate_size = args.plate_size
-    plate_size = plate_size.split(',')
-    plate_size = [int(x) for x in plate_size]
+    if plate_size is not None:
+        plate_size = plate_size.split(',')
+        plate_size = [int(x) for x in plate_size]
 
     # n_iter: DLA, EDEN
     n_iter_eden = args.n_iter_eden
@@ -207,6 +268,23 @@ def main():
     checkpoint = args.checkpoint
     out_folder = args.out_folder
 
+    # eden mode, batch size
+    eden_mode = args.eden_mode
+    eden_batch_size = args.eden_batch_size
+    eden_drift = args.eden_drift
+
+    # dla mode, number of walkers
+    dla_mode = args.dla_mode
+    dla_n_walkers = args.dla_n_walkers
+
+    # checkpoints in memory-mapped files
+    mmap = args.mmap
+
+    # seed
+    seed = args.seed
+    if seed is not None:
+        np.random.seed(seed)
+
     # test print
     print("INPUT:")
     print("Plate size:", plate_size)
@@ -214,6 +292,10 @@ def main():
     print("Starter:", starter)
     print("DLA: attractor, spawn_r, kill_r, jump_r:", dla_attractor, dla_r_spawn, dla_r_kill, dla_r_jump)
     print("Out folder, checkpoint", out_folder, checkpoint)
+    print("EDEN: mode, batch size, drift report:", eden_mode, eden_batch_size, eden_drift)
+    print("DLA: mode, n walkers:", dla_mode, dla_n_walkers)
+    print("Memory-mapped checkpoints:", mmap)
+    print("Seed:", seed)
 
 
     # configure pattern formation
@@ -226,7 +308,14 @@ def main():
                         dla_r_kill, 
                         dla_r_jump,
                         checkpoint,
-                        out_folder)
+                        out_folder,
+                        eden_mode,
+                        eden_batch_size,
+                        dla_mode,
+                        dla_n_walkers,
+                        mmap,
+                        eden_drift,
+                        seed)
 
     # grow pattern
     dla_eden.create_pattern()
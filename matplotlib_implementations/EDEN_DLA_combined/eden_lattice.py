@@ -6,7 +6,12 @@ IMPORTS
 ################################# STANDARD LIBRARIES ##################################
 import numpy as np
 import matplotlib.pyplot as plt
-import copy
+
+################################# USER LIBRARIES ######################################
+from site_set import SiteSet
+from cluster_stats import give_perimeter, give_border, give_drift
+from plate import new_plate
+from arrival_store import ArrivalStore
 
 """ ***********************************************************************************
 CLASS
@@ -21,10 +26,11 @@ class EDEN:
 
     """ ******************************************************************************
     CONSTRUCTOR
-    plate: np.array(dim:[x_max, y_max]). Need to match DLA model
+    plate_size: [x_max, y_max] or None for sparse unbounded plate. Need to match DLA model
     n_iter: scalar
     starter: [x01, y01]. IN this context only one starter cell is 
                 chosen which is same as stater cell in DLA model
+    arrival_path: .npy file for memory-mapped checkpoints or None (see ArrivalStore)
     ******************************************************************************* """
     def __init__(self, 
                  plate_size,
@@ -32,7 +38,8 @@ class EDEN:
                  starter,
                  checkpoint,
                  plate_color=0,
-                 cell_color=1):
+                 cell_color=1,
+                 arrival_path=None):
 
         # User specified variables
         self.n_iter = n_iter
@@ -44,11 +51,11 @@ class EDEN:
         self.shoot = int(n_iter / checkpoint)
 
         # Additional variables
-        self.plate = np.zeros(self.plate_size)
+        self.plate = new_plate(self.plate_size)
         self.populated = []
-        self.plate[self.starter[0]][self.starter[1]] = self.cell_color
+        self.plate[self.starter[0], self.starter[1]] = self.cell_color
         self.populated.append([self.starter[0], self.starter[1]])
-        self.plate_through_iterations = []
+        self.checkpoints = ArrivalStore(self.plate, self.plate_color, arrival_path)
 
         
     """ ***************************************************************************
@@ -113,11 +120,215 @@ class EDEN:
         return list(found_grow_sites)
 
 
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: 4-neigh of given cell which lie on the plate
+    **************************************************************************** """
+    def give_neighbours(self, cell):
+
+        i = cell[0]
+        j = cell[1]
+
+        # sparse plate has no border
+        if self.plate_size is None:
+            return [(i, j+1), (i, j-1), (i-1, j), (i+1, j)]
+
+        neighbours = []
+
+        if j + 1 < self.plate_size[1]:
+            neighbours.append((i, j+1))
+
+        if j - 1 >= 0:
+            neighbours.append((i, j-1))
+
+        if i - 1 >= 0:
+            neighbours.append((i-1, j))
+
+        if i + 1 < self.plate_size[0]:
+            neighbours.append((i+1, j))
+
+        return neighbours
+
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: builds frontier (free sites around cells) and
+    populated (cells with free neighbours) sets from current plate
+    **************************************************************************** """
+    def init_frontier(self):
+
+        self.frontier = SiteSet()
+        populated = SiteSet()
+
+        for cell in self.populated:
+
+            for neighbour in self.give_neighbours(cell):
+
+                if self.plate[neighbour[0], neighbour[1]] == 0:
+                    self.frontier.add(neighbour)
+                    populated.add(cell)
+
+        self.populated = populated
+
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: occupies cell and updates frontier and populated sets.
+    Only 4-neigh of occupied cell is visited
+    **************************************************************************** """
+    def occupy(self, cell):
+
+        self.plate[cell[0], cell[1]] = self.cell_color
+        self.frontier.remove(cell)
+
+        for neighbour in self.give_neighbours(cell):
+
+            if self.plate[neighbour[0], neighbour[1]] == 0:
+                self.frontier.add(neighbour)
+                self.populated.add(cell)
+
+            # occupied neighbour may have lost its last free slot
+            elif neighbour in self.populated:
+
+                free = False
+                for second in self.give_neighbours(neighbour):
+                    if self.plate[second[0], second[1]] == 0:
+                        free = True
+                        break
+
+                if not free:
+                    self.populated.remove(neighbour)
+
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: stores plate on checkpoint
+    **************************************************************************** """
+    def store_checkpoint(self, sample):
+
+        if sample % self.shoot == 0:
+            print("EDEN particles", sample, len(self.populated))
+            self.checkpoints.record(sample)
+
     """ ****************************************************************************
     PUBLIC
     call to grow eden pattern
+    mode: 'exact' grows one cell per iteration from incrementally updated frontier
+          'legacy' rescans populated cells every iteration
+          'batch' occupies batch_size frontier sites per iteration using
+          plate masks (approximate Eden)
+    batch_size: scalar, used only in 'batch' mode
+    drift: (y/n) after 'batch' mode grow reference colony in 'exact' mode and
+           print drift of cluster statistics (doubles runtime)
+    drift_seed: seed of reference colony random generator, global numpy
+                random state is not used by reference
+    **************************************************************************** """
+    def grow_pattern(self, mode="exact", batch_size=1, drift='n', drift_seed=None):
+
+        if mode not in ("exact", "legacy", "batch"):
+            raise ValueError("unknown mode " + str(mode) + ", use exact, legacy or batch")
+
+        if mode == "exact":
+            self.grow_exact()
+
+        if mode == "legacy":
+            self.grow_legacy()
+
+        if mode == "batch":
+            self.grow_batch(batch_size)
+
+            if drift == 'y':
+                self.report_drift(drift_seed)
+
+    """ ****************************************************************************
+    PRIVATE
+    Eden growth on frontier set. O(1) work per occupied cell
+    rng: np.random.Generator or None for global numpy random state
+    **************************************************************************** """
+    def grow_exact(self, rng=None):
+
+        self.init_frontier()
+
+        for sample in range(self.n_iter):
+
+            "plate is full"
+            if len(self.frontier) == 0:
+                break
+
+            "among frontier sites choose randomly one"
+            if rng is None:
+                next_grow_site_idx = np.random.randint(low=0, high=len(self.frontier), size=1)[0]
+            else:
+                next_grow_site_idx = rng.integers(len(self.frontier))
+            next_grow_site_coord = self.frontier.give_site(next_grow_site_idx)
+
+            "occupy chosen cell, update frontier around it"
+            self.occupy(next_grow_site_coord)
+
+            self.store_checkpoint(sample)
+
+    """ ****************************************************************************
+    PRIVATE
+    Approximate Eden growth: every iteration batch_size sites are chosen
+    at once among perimeter sites found with plate masks
+    **************************************************************************** """
+    def grow_batch(self, batch_size):
+
+        if self.plate_size is None:
+            raise ValueError("batch mode needs dense plate, plate_size must be given")
+
+        occupied = self.plate != 0
+        sample = 0
+
+        while sample < self.n_iter:
+
+            "find all perimeter sites at once"
+            grow_sites = np.flatnonzero(give_perimeter(occupied))
+
+            "plate is full"
+            if len(grow_sites) == 0:
+                break
+
+            "choose batch of distinct sites and occupy them"
+            n_chosen = min(batch_size, self.n_iter - sample, len(grow_sites))
+            chosen = np.random.choice(grow_sites, size=n_chosen, replace=False)
+            occupied.flat[chosen] = True
+            self.plate.flat[chosen] = self.cell_color
+
+            "store plate for every checkpoint passed in this batch"
+            first = -(-sample // self.shoot) * self.shoot
+            if first < sample + n_chosen:
+                self.populated = np.argwhere(give_border(occupied)).tolist()
+
+            for checkpoint_sample in range(first, sample + n_chosen, self.shoot):
+                self.store_checkpoint(checkpoint_sample)
+
+            sample += n_chosen
+
+        self.populated = np.argwhere(give_border(occupied)).tolist()
+
+    """ ****************************************************************************
+    PRIVATE
+    Grows reference pattern in exact mode and prints how far cluster
+    statistics of current plate drift from it
+    seed: seed of reference random generator
+    **************************************************************************** """
+    def report_drift(self, seed=None):
+
+        reference = EDEN(self.plate_size, self.n_iter, self.starter, self.checkpoint,
+                         self.plate_color, self.cell_color)
+        reference.grow_exact(np.random.default_rng(seed))
+
+        drift = give_drift(self.plate != 0, reference.plate != 0)
+
+        print("EDEN drift from exact mode:")
+        for name in drift:
+            print("   ", name, drift[name])
+
+        return drift
+
+    """ ****************************************************************************
+    PRIVATE
+    Eden growth rescanning all populated cells every iteration
     **************************************************************************** """
-    def grow_pattern(self):
+    def grow_legacy(self):
 
         for sample in range(self.n_iter):
 
@@ -129,21 +340,20 @@ class EDEN:
             next_grow_site_coord = grow_sites[next_grow_site_idx]
 
             "occupy chosen cell"
-            self.plate[next_grow_site_coord[0]][next_grow_site_coord[1]] = self.cell_color
+            self.plate[next_grow_site_coord[0], next_grow_site_coord[1]] = self.cell_color
             self.populated.append([next_grow_site_coord[0], next_grow_site_coord[1]])
 
             "filter out cells in populated list with no free slots"
             self.filter_populated()
 
-            if sample % self.shoot == 0:
-                print("EDEN particles", sample, len(self.populated))
-                self.plate_through_iterations.append(copy.copy(self.plate))
+            self.store_checkpoint(sample)
 
 
 
     """ ******************************************************************************
     PUBLIC
-    Fetch created eden patterns
+    Fetch created eden patterns, plates are rebuilt on indexing
     ****************************************************************************** """
     def give_plates(self):
-        return self.plate_through_iterations
\ No newline at end of file
+        self.checkpoints.flush()
+        return self.checkpoints
\ No newline at end of file
@@ -0,0 +1,157 @@
+""" *************************************************************************
+IMPORTS
+************************************************************************* """
+import numpy as np
+import cv2 as cv
+
+""" *************************************************************************
+Frame size used for sparse plates (width, height). Sparse plate grows, so
+every frame is fitted into same size keeping aspect ratio
+************************************************************************* """
+FRAME_SIZE = (640, 480)
+
+""" **************************************************************************
+PUBLIC
+Colormap lookup table: (256, 3) uint8 BGR colors, default viridis
+(as matplotlib imshow)
+************************************************************************** """
+def give_colormap_lut(colormap=cv.COLORMAP_VIRIDIS):
+
+    gray = np.arange(256, dtype=np.uint8).reshape(-1, 1)
+
+    return cv.applyColorMap(gray, colormap).reshape(256, 3)
+
+""" **************************************************************************
+PUBLIC
+Plate as (rows, cols, 3) uint8 BGR frame, plate[i, j] is pixel in row i,
+column j (as imshow). Values are scaled from [vmin, vmax] to colormap,
+vmin/vmax None: min/max of plate.
+uint8 plates are colored with one lookup per site (no float copy of plate)
+************************************************************************** """
+def give_frame(plate, lut, vmin=None, vmax=None):
+
+    # sparse plate gives dense array of allocated area
+    values = np.asarray(plate)
+
+    low = values.min() if vmin is None else vmin
+    high = values.max() if vmax is None else vmax
+    scale = 255.0 / (high - low) if high > low else 0.0
+
+    if values.dtype == np.uint8:
+        levels = np.clip((np.arange(256) - low) * scale, 0, 255).astype(np.uint8)
+        return lut[levels][values]
+
+    levels = np.clip((values - low) * scale, 0, 255).astype(np.uint8)
+
+    return lut[levels]
+
+""" **************************************************************************
+PUBLIC
+Frame resized to frame_size (width, height) keeping aspect ratio,
+free area is filled with background color
+************************************************************************** """
+def fit_frame(frame, frame_size, background):
+
+    width, height = frame_size
+    scale = min(width / frame.shape[1], height / frame.shape[0])
+    fitted_width = max(1, int(frame.shape[1] * scale))
+    fitted_height = max(1, int(frame.shape[0] * scale))
+
+    fitted = cv.resize(frame, (fitted_width, fitted_height), interpolation=cv.INTER_NEAREST)
+
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    canvas[:] = background
+
+    top = (height - fitted_height) // 2
+    left = (width - fitted_width) // 2
+    canvas[top:top+fitted_height, left:left+fitted_width] = fitted
+
+    return canvas
+
+""" **************************************************************************
+CLASS
+Streams plates into one open video as they are produced, no images are
+written to disk and no frames are kept in memory.
+    + .raw path: frames are written as raw bgr24 bytes, path can be named
+      pipe read by e.g.
+      ffmpeg -f rawvideo -pix_fmt bgr24 -s WxH -r fps -i path out.mp4
+    + other paths: MJPG video written with cv.VideoWriter
+************************************************************************** """
+class FrameWriter:
+
+    """ **********************************************************************
+    CONSTRUCTOR
+    video_path: output file
+    fps: scalar
+    frame_size: (width, height) or None for size of first plate
+    vmin, vmax: scalars or None for min/max of every plate
+    ********************************************************************** """
+    def __init__(self, video_path, fps=10, frame_size=None, vmin=None, vmax=None):
+
+        self.video_path = video_path
+        self.fps = fps
+        self.frame_size = frame_size
+        self.vmin = vmin
+        self.vmax = vmax
+
+        self.lut = give_colormap_lut()
+        self.raw = video_path.endswith(".raw")
+        self.out = None
+        self.n_frames = 0
+
+    """ **********************************************************************
+    PRIVATE
+    Open output when size of first frame is known
+    ********************************************************************** """
+    def open(self):
+
+        if self.raw:
+            self.out = open(self.video_path, "wb")
+            return
+
+        fourcc = cv.VideoWriter_fourcc('M','J','P','G')
+        self.out = cv.VideoWriter(self.video_path, fourcc, self.fps, self.frame_size)
+
+        if not self.out.isOpened():
+            raise ValueError("can not open video for writing: " + self.video_path)
+
+    """ **********************************************************************
+    PUBLIC
+    Color plate (dense array or sparse plate) and append it to video
+    ********************************************************************** """
+    def write(self, plate):
+
+        frame = give_frame(plate, self.lut, self.vmin, self.vmax)
+
+        if self.frame_size is None:
+            self.frame_size = (frame.shape[1], frame.shape[0])
+
+        if self.out is None:
+            self.open()
+
+        if (frame.shape[1], frame.shape[0]) != tuple(self.frame_size):
+            frame = fit_frame(frame, self.frame_size, self.lut[0])
+
+        if self.raw:
+            self.out.write(np.ascontiguousarray(frame).tobytes())
+        else:
+            self.out.write(frame)
+
+        self.n_frames += 1
+
+    """ **********************************************************************
+    PUBLIC
+    Finish video
+    ********************************************************************** """
+    def release(self):
+
+        if self.out is None:
+            return
+
+        if self.raw:
+            self.out.close()
+        else:
+            self.out.release()
+
+        self.out = None
+        print("Frames:", self.n_frames, "size:", self.frame_size, "->", self.video_path)
@@ -3,44 +3,184 @@ IMPORTS
 ************************************************************************* """
 import cv2 as cv
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+""" *************************************************************************
+Image files taken into video, other files in folder are skipped
+************************************************************************* """
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+
+""" **************************************************************************
+PUBLIC
+Paths of images named by frame number (1.png, 2.png, ...) sorted by number.
+Files without numeric name or with other extension are skipped
+************************************************************************** """
+def give_numbered_images(img_path):
+
+    numbered = []
+    for name in os.listdir(img_path):
+
+        number, extension = os.path.splitext(name)
+        if number.isdigit() and extension.lower() in IMAGE_EXTENSIONS:
+            numbered.append((int(number), name))
+
+    numbered.sort()
+
+    return [os.path.join(img_path, name) for number, name in numbered]
+
+""" **************************************************************************
+PRIVATE
+Read image as frame of frame_size (width, height).
+Runs in worker threads (imread and resize release GIL)
+************************************************************************** """
+def read_frame(src, frame_size):
+
+    img = cv.imread(src, cv.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("can not read image: " + src)
+
+    # video writer needs same size for all frames
+    if (img.shape[1], img.shape[0]) != frame_size:
+        img = cv.resize(img, frame_size, interpolation=cv.INTER_AREA)
+
+    return img
+
+""" **************************************************************************
+PUBLIC
+Results of function for all items computed in thread pool, given in order
+of items. Reorder buffer holds at most buffer_size pending results, so memory
+does not grow with number of items
+************************************************************************** """
+def give_ordered(function, items, n_threads, buffer_size):
+
+    with ThreadPoolExecutor(n_threads) as pool:
+
+        pending = deque()
+        for item in items:
+
+            if len(pending) == buffer_size:
+                yield pending.popleft().result()
+
+            pending.append(pool.submit(function, item))
+
+        while pending:
+            yield pending.popleft().result()
+
+""" **************************************************************************
+PRIVATE
+Encode images in order into video file at path, images are read in n_threads
+threads while writer encodes frames already read
+************************************************************************** """
+def write_segment(images, path, fps, frame_size, n_threads, buffer_size):
+
+    out = cv.VideoWriter(path, cv.CAP_FFMPEG, cv.VideoWriter_fourcc('M','J','P','G'), fps, frame_size)
+    if not out.isOpened():
+        raise ValueError("can not open video for writing: " + path)
+
+    read = lambda src: read_frame(src, frame_size)
+    for frame in give_ordered(read, images, n_threads, buffer_size):
+        out.write(frame)
+
+    out.release()
+
+""" **************************************************************************
+PRIVATE
+Join encoded segments in order into one video. Compressed packets are copied
+(raw mode of FFMPEG backend), frames are not decoded or encoded again
+************************************************************************** """
+def concatenate_segments(segment_paths, path, fps, frame_size):
+
+    out = cv.VideoWriter(path, cv.CAP_FFMPEG, cv.VideoWriter_fourcc('M','J','P','G'), fps, frame_size,
+                         [cv.VIDEOWRITER_PROP_RAW_VIDEO, 1])
+    if not out.isOpened():
+        raise ValueError("can not open video for writing: " + path)
+
+    for segment_path in segment_paths:
+
+        segment = cv.VideoCapture(segment_path, cv.CAP_FFMPEG, [cv.CAP_PROP_FORMAT, -1])
+        if not segment.isOpened():
+            raise ValueError("can not read video segment: " + segment_path)
+
+        while True:
+            ok, packet = segment.read()
+            if not ok:
+                break
+            out.write(packet)
+
+        segment.release()
+
+    out.release()
 
 """ **************************************************************************
 PUBLIC
 Takes folder with images and outputs file of video
+Frames are split into n_segments consecutive chunks, every chunk is read and
+encoded by its own thread and video writer (encoding releases GIL), then
+segments are concatenated in order without encoding again.
+With one segment images are read in n_threads threads and encoded by one
+writer, frames are written in order of numbers
+img_path: folder with images named by frame number
+video_path: folder of result.avi
+fps: scalar
+n_threads: number of threads reading frames of one segment, None: cpu count
+buffer_size: maximal number of frames in flight, None: 4 per thread
+n_segments: number of segments encoded in parallel, None: cpu count
+            (1 if OpenCV can not copy packets, needs FFMPEG backend)
 ************************************************************************** """
-def images_to_video(img_path, video_path):
-    
-    # take all image names from folder
-    images = os.listdir(img_path)
-    
+def images_to_video(img_path, video_path, fps=10, n_threads=None, buffer_size=None, n_segments=None):
+
+    # take numbered image names from folder
+    images = give_numbered_images(img_path)
+
     # if no images quit
     if len(images) == 0:
         return
-    
+
     # find shape of image
-    src = os.path.join(img_path, images[0])
-    img = cv.imread(src)
-    img_shape = img.shape
-    
-    # create video writer
+    img = cv.imread(images[0], cv.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("can not read image: " + images[0])
+    frame_size = (img.shape[1], img.shape[0])
+
+    if n_threads is None:
+        n_threads = os.cpu_count() or 1
+    if buffer_size is None:
+        buffer_size = 4 * n_threads
+
+    can_concatenate = hasattr(cv, "VIDEOWRITER_PROP_RAW_VIDEO")
+    if n_segments is None:
+        n_segments = (os.cpu_count() or 1) if can_concatenate else 1
+    if n_segments > 1 and not can_concatenate:
+        raise ValueError("concatenating segments needs OpenCV with raw video writing, use n_segments=1")
+
+    # at least one frame per segment
+    n_segments = max(1, min(n_segments, len(images)))
+
     PATH = os.path.join(video_path, "result.avi")
-    out = cv.VideoWriter(PATH, cv.VideoWriter_fourcc('M','J','P','G'), 10, (img_shape[1], img_shape[0]))
-    
-    # sort images by numbers
-    numbers = []
-    for image in images:
-        numbers.append(int(image.split(".")[0]))
-        
-    image_num = zip(images, numbers)
-    image_num_s = sorted(image_num, key = lambda t: t[1])
-    images, numbers = zip(*image_num_s)
-    
-    # take sorted images and save to video
-    for image in images:
-        print("SAVING...", image)
-        src = os.path.join(img_path, image)
-        img = cv.imread(src)
-        img = cv.cvtColor(img, cv.COLOR_BGR2RGB)
-        out.write(img)
-        
-    out.release()
\ No newline at end of file
+
+    if n_segments == 1:
+        write_segment(images, PATH, fps, frame_size, n_threads, buffer_size)
+        print("SAVED", len(images), "frames to", PATH)
+        return
+
+    # consecutive chunks of frames, segment k holds frames of chunk k
+    bounds = [len(images) * k // n_segments for k in range(n_segments + 1)]
+    chunks = [images[bounds[k]:bounds[k+1]] for k in range(n_segments)]
+    segment_paths = [os.path.join(video_path, "segment_" + str(k) + ".avi") for k in range(n_segments)]
+
+    try:
+        with ThreadPoolExecutor(n_segments) as pool:
+            encoded = [pool.submit(write_segment, chunk, segment_path, fps, frame_size, 1, 2)
+                       for chunk, segment_path in zip(chunks, segment_paths)]
+            for segment in encoded:
+                segment.result()
+
+        concatenate_segments(segment_paths, PATH, fps, frame_size)
+
+    finally:
+        for segment_path in segment_paths:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
+
+    print("SAVED", len(images), "frames in", n_segments, "segments to", PATH)
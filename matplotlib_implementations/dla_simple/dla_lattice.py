@@ -5,12 +5,17 @@ IMPORTS
 import numpy as np 
 import matplotlib.pyplot as plt
 import argparse
-import copy
 import os
+import sys
 import time
 
 ############################### USER LIBRARIES #########################################
-from img_to_video import images_to_video
+# frame writer lives in matplotlib_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from frame_writer import FrameWriter, FRAME_SIZE
+from plate import new_plate
+from occupancy_pyramid import OccupancyPyramid
+from walker_batch import WalkerBatch
 
 """ ************************************************************************************
 IMPROVE:
@@ -35,9 +40,11 @@ class DLA:
 
     """ **********************************************************************
     Constructor
-    plate_size: [max_x, max_y]
+    plate_size: [max_x, max_y] or None for sparse unbounded plate
     starter: [x,y]
     n_particles, radius_spawn, radius_kill, radius_jump: scalars
+    walker_jumps: (y/n) far from aggregate walkers jump as far as
+                  occupancy pyramid allows instead of moving one site
     NOTE: radius_jump > radius spawn, radius_kill > radius_jump
     ********************************************************************** """
     def __init__(self, 
@@ -50,7 +57,8 @@ class DLA:
                 radius_jump, 
                 talk,
                 checkpoint,
-                out_folder
+                out_folder,
+                walker_jumps='y'
                 ):
 
         # User specified variables
@@ -71,16 +79,20 @@ class DLA:
         self.talk = talk
         self.checkpoint = checkpoint
         self.out_folder = out_folder
+        self.walker_jumps = walker_jumps
 
         # Additional variables
-        self.plate = np.zeros(self.plate_size)
-        self.plate[self.starter[0]][self.starter[1]] = 1
+        self.plate = new_plate(self.plate_size)
+        self.plate[self.starter[0], self.starter[1]] = 1
         self.set_attractors(self.attractor)
 
         self.occupied = []
         self.occupied.append(self.starter)
 
-        self.plate_states = []
+        self.pyramid = OccupancyPyramid()
+        self.pyramid.add_plate(self.plate, 1)
+
+        self.frames = None
     
     """ *******************************************************
     PRIVATE
@@ -108,7 +120,7 @@ class DLA:
             x = int(self.starter[0] + 10 * np.sin(t))
             y = int(self.starter[1] + 10 * np.cos(t))
 
-            self.plate[x][y] = 1
+            self.plate[x, y] = 1
 
     """ ***************************************************
     PRIVATE
@@ -123,10 +135,10 @@ class DLA:
         for sample in range(40):
 
             if sample % 2 == 1:
-                self.plate[self.starter[0]][self.starter[1]+cnt_line] = 1
+                self.plate[self.starter[0], self.starter[1]+cnt_line] = 1
 
             else:
-                self.plate[self.starter[0]][self.starter[1]-cnt_line] = 1
+                self.plate[self.starter[0], self.starter[1]-cnt_line] = 1
 
             cnt_line += 1
 
@@ -144,20 +156,32 @@ class DLA:
         
         while not self.close_to_neighbour(potential_particle):
 
+            # far from aggregate: jump on largest circle which can not touch it
+            if self.walker_jumps == 'y':
+                jump = self.pyramid.give_safe_radius(potential_particle)
+            else:
+                jump = 0
+
+            if jump > 0:
+                t = np.random.uniform() * 2 * np.pi
+                potential_particle = [int(potential_particle[0] + jump * np.sin(t)),
+                                      int(potential_particle[1] + jump * np.cos(t))]
+
             # perform random movement
-            rand_direction = np.random.randint(1, 5, 1)[0]
+            else:
+                rand_direction = np.random.randint(1, 5, 1)[0]
 
-            if rand_direction == 1:
-                potential_particle[0] += 1
+                if rand_direction == 1:
+                    potential_particle[0] += 1
             
-            if rand_direction == 2:
-                potential_particle[0] -= 1
+                if rand_direction == 2:
+                    potential_particle[0] -= 1
 
-            if rand_direction == 3:
-                potential_particle[1] += 1
+                if rand_direction == 3:
+                    potential_particle[1] += 1
 
-            if rand_direction == 4:
-                potential_particle[1] -= 1
+                if rand_direction == 4:
+                    potential_particle[1] -= 1
 
             # calculate distance from starter
             radius = np.power((potential_particle[0] - self.starter[0]), 2) + \
@@ -191,7 +215,7 @@ class DLA:
         y = int(self.starter[0] + self.radius_spawn * np.cos(t))
 
         # draw randomly chosen pixels on circle for test
-        self.plate[x][y] = 2
+        self.plate[x, y] = 2
 
         return [x,y]
 
@@ -218,36 +242,66 @@ class DLA:
 
     """ *****************************************************************
     Private function
-    Stores plots as images in folder
+    Opens video in out folder, checkpoint plates are streamed into it
     ***************************************************************** """
-    def store_plots(self):
+    def open_frames(self):
 
-        cnt = 0
         PATH = os.path.join('.', self.out_folder)
         if not os.path.exists(PATH):
             os.mkdir(PATH)
 
-        for plate in self.plate_states:
+        frame_size = None if self.plate_size is not None else FRAME_SIZE
+        self.frames = FrameWriter(os.path.join(PATH, "result.avi"), frame_size=frame_size)
+
+    """ *****************************************************************
+    Private function
+    Stores and shows plate on checkpoint
+    ***************************************************************** """
+    def store_checkpoint(self, particle):
 
-            cnt += 1    
+        if particle % self.checkpoint == 0:
 
-            fig = plt.figure()
-            ax = plt.subplot(111)
-            ax.imshow(plate)
+            # number of particles aggregated
+            print("Particles:", particle)
 
-            out_file = os.path.join(PATH, str(cnt))
-            fig.savefig(out_file)
+            # stream current state of the plate to video
+            if self.frames is not None:
+                self.frames.write(self.plate)
 
-        # create video from images
-        img_path = os.path.join('.', self.out_folder)
-        video_path = os.path.join('.', self.out_folder)
-        images_to_video(img_path, video_path)
+            # plot current state of the plate
+            if self.talk == 'y':
+                plt.imshow(self.plate)
+                plt.show()
 
     """ ***********************************************************
     Public function
     Call to run the creation of DLA pattern
+    mode: 'single' one walker at a time
+          'batch' n_walkers walkers move at once (see WalkerBatch)
+    n_walkers: scalar, used only in 'batch' mode
     ********************************************************** """
-    def create_dla_pattern(self):
+    def create_dla_pattern(self, mode="single", n_walkers=1000):
+
+        self.open_frames()
+
+        if mode == "single":
+            self.create_dla_pattern_single()
+
+        if mode == "batch":
+            self.create_dla_pattern_batch(n_walkers)
+
+        self.frames.release()
+
+        # draw the plate
+        if self.talk == 'y':
+            plt.imshow(self.plate)
+            plt.show()
+
+    """ ***********************************************************
+    Private function
+    DLA pattern, one walker at a time
+    ********************************************************** """
+    def create_dla_pattern_single(self):
 
         # for every paticle
         for particle in range(self.n_particles):
@@ -256,25 +310,33 @@ class DLA:
             dla_point = self.calculate_new_dla_point()
     
             # mark position on plate
-            self.plate[dla_point[0]][dla_point[1]] = 1
+            self.plate[dla_point[0], dla_point[1]] = 1
+            self.pyramid.add(dla_point)
 
-            if particle % self.checkpoint == 0:
+            self.store_checkpoint(particle)
 
-                # number of particles aggregated
-                print("Particles:", particle)
+    """ ***********************************************************
+    Private function
+    DLA pattern, many walkers moving at once
+    ********************************************************** """
+    def create_dla_pattern_batch(self, n_walkers):
 
-                # save current state of the plate
-                self.plate_states.append(copy.copy(self.plate))
+        if self.plate_size is None:
+            raise ValueError("batch mode needs dense plate, plate_size must be given")
 
-                # plot current state of the plate
-                if self.talk == 'y':
-                    plt.imshow(self.plate)
-                    plt.show()
+        walkers = WalkerBatch(self.plate, self.starter, 1,
+                              self.radius_spawn, self.radius_kill, n_walkers)
 
-        # draw the plate
-        if self.talk == 'y':
-            plt.imshow(self.plate)
-            plt.show()
+        particle = 0
+        while particle < self.n_particles:
+
+            # move all walkers, stuck ones are already marked on plate
+            stuck = walkers.step(self.n_particles - particle)
+
+            for dla_point in stuck:
+                self.pyramid.add(dla_point)
+                self.store_checkpoint(particle)
+                particle += 1
 
 
 """ ****************************************************************************
@@ -286,7 +348,7 @@ def main():
     parser = argparse.ArgumentParser()
     
     parser.add_argument("-plate-size",
-                        help="Tuple: x_max,y_max",
+                        help="Tuple: x_max,y_max, omit for sparse unbounded plate",
                         type=str)
 
     parser.add_argument("-starter",
@@ -325,12 +387,28 @@ def main():
                         help="folder where plots throught iterations will be stored",
                         type=str)
 
+    parser.add_argument("-mode",
+                        help="single, batch",
+                        type=str,
+                        default="single")
+
+    parser.add_argument("-n-walkers",
+                        help="number of walkers moving at once in batch mode",
+                        type=int,
+                        default=1000)
+
+    parser.add_argument("-walker-jumps",
+                        help="far from aggregate walkers jump using occupancy pyramid (y/n)",
+                        type=str,
+                        default='y')
+
 
     args = parser.parse_args()
 
     plate_size = args.plate_size
-    plate_size = plate_size.split(',')
-    plate_size = [int(x) for x in plate_size]
+    if plate_size is not None:
+        plate_size = plate_size.split(',')
+        plate_size = [int(x) for x in plate_size]
 
     starter = args.starter
     starter = starter.split(',')
@@ -346,6 +424,9 @@ def main():
     talk = args.talk
     out_folder = args.out_folder
     checkpoint = args.checkpoint
+    walker_jumps = args.walker_jumps
+    mode = args.mode
+    n_walkers = args.n_walkers
 
     print("INPUT:")
     print("Plate size:", plate_size)
@@ -358,6 +439,9 @@ def main():
     print("Talk:", talk)
     print("Out folder:", out_folder)
     print("Checkpoint:", checkpoint)
+    print("Walker jumps:", walker_jumps)
+    print("Mode:", mode)
+    print("N walkers:", n_walkers)
 
     dla = DLA(
             plate_size, 
@@ -369,17 +453,16 @@ def main():
             radius_jump, 
             talk,
             checkpoint,
-            out_folder
+            out_folder,
+            walker_jumps
             )
 
     start = time.time()
-    dla.create_dla_pattern()
+    dla.create_dla_pattern(mode, n_walkers)
     end = time.time()
 
     print("Duration:", end-start)
 
-    dla.store_plots()
-
 """ ****************************************************************************
 ROOT
 **************************************************************************** """
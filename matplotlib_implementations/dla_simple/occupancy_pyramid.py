@@ -0,0 +1,83 @@
+""" **********************************************************************************
+IMPORTS
+*********************************************************************************** """
+################################ STANDARD LIBRARIES ###################################
+import numpy as np
+
+""" ***********************************************************************************
+CLASS
+Multi-resolution occupancy pyramid of aggregate
+Level k holds blocks of 2^k x 2^k sites which contain at least one aggregate cell.
+Blocks are kept in sets, so pyramid works on dense and sparse (unbounded) plates
+and memory follows aggregate size.
+If 3x3 blocks around walker's block on level k are empty, all sites within
+2^k (in both axes) around walker are empty. Walker can then jump on circle of
+radius 2^k - 2 in one step and still not touch aggregate (Meakin, Ball).
+************************************************************************************* """
+class OccupancyPyramid:
+
+    """ ******************************************************************************
+    CONSTRUCTOR
+    n_levels: scalar, largest jump is 2^(n_levels-1) - 2
+    ******************************************************************************* """
+    def __init__(self, n_levels=16):
+
+        self.n_levels = n_levels
+        self.levels = [set() for k in range(n_levels)]
+
+    """ ******************************************************************************
+    PUBLIC
+    Mark aggregate cell [i, j] on every level
+    ****************************************************************************** """
+    def add(self, cell):
+
+        i = int(cell[0])
+        j = int(cell[1])
+
+        for k in range(self.n_levels):
+            self.levels[k].add((i >> k, j >> k))
+
+    """ ******************************************************************************
+    PUBLIC
+    Mark all cells of plate equal to value (initial aggregate, attractors)
+    ****************************************************************************** """
+    def add_plate(self, plate, value):
+
+        # dense array of sparse plate starts at its bounds
+        offset = np.zeros(2, dtype=np.int64)
+        if hasattr(plate, "give_bounds"):
+            offset = np.array(plate.give_bounds()[:2])
+
+        for cell in np.argwhere(np.asarray(plate) == value) + offset:
+            self.add(cell)
+
+    """ ******************************************************************************
+    PUBLIC
+    Radius of largest jump which can not reach aggregate or its 4-neigh.
+    0 if walker is too close for jump
+    ****************************************************************************** """
+    def give_safe_radius(self, cell):
+
+        i = int(cell[0])
+        j = int(cell[1])
+
+        safe_level = 0
+
+        # if level k is occupied around cell, all coarser levels are too
+        for k in range(1, self.n_levels):
+
+            bi = i >> k
+            bj = j >> k
+            blocks = self.levels[k]
+
+            if ((bi-1, bj-1) in blocks or (bi-1, bj) in blocks or (bi-1, bj+1) in blocks or
+                (bi, bj-1) in blocks or (bi, bj) in blocks or (bi, bj+1) in blocks or
+                (bi+1, bj-1) in blocks or (bi+1, bj) in blocks or (bi+1, bj+1) in blocks):
+                break
+
+            safe_level = k
+
+        if safe_level < 2:
+            return 0
+
+        return (1 << safe_level) - 2
@@ -0,0 +1,107 @@
+""" **********************************************************************************
+IMPORTS
+*********************************************************************************** """
+################################ STANDARD LIBRARIES ###################################
+import numpy as np
+
+""" ***********************************************************************************
+CLASS
+Many lattice DLA walkers advanced at once
+Walker positions are kept in (n_walkers, 2) int32 array. Every step all walkers
+move one site (4-neigh), sticking is tested with fancy indexed plate lookups and
+stuck walkers are replaced by new walkers spawned on circle.
+Same step collisions are resolved by walker index: if several walkers stick on
+same site, walker with lowest index wins, others are respawned. So for fixed seed
+result does not depend on anything but walker order.
+NOTE: walkers do not see each other while walking, only aggregate. With many
+walkers aggregate is fed from all sides at once (multi-particle DLA).
+************************************************************************************* """
+class WalkerBatch:
+
+    """ ******************************************************************************
+    CONSTRUCTOR
+    plate: dense np.array, aggregate sites are marked with cell_color
+    starter: [x, y], center of spawn and kill circles
+    radius_spawn, radius_kill: scalars
+    n_walkers: scalar, number of walkers moving at once
+    NOTE: plate must be larger than kill circle
+    ******************************************************************************* """
+    def __init__(self, plate, starter, cell_color, radius_spawn, radius_kill, n_walkers):
+
+        self.plate = plate
+        self.starter = np.array(starter, dtype=np.int32)
+        self.cell_color = cell_color
+        self.radius_spawn = radius_spawn
+        self.radius_kill_squared = np.power(radius_kill, 2)
+        self.n_walkers = n_walkers
+
+        # 1: x++, 2: x--, 3: y++, 4: y--
+        self.moves = np.array([[1, 0], [-1, 0], [0, 1], [0, -1]], dtype=np.int32)
+
+        self.positions = self.spawn(n_walkers)
+
+    """ ******************************************************************************
+    PRIVATE
+    n random positions on spawn circle
+    ****************************************************************************** """
+    def spawn(self, n):
+
+        t = np.random.uniform(size=n) * 2 * np.pi
+
+        positions = np.empty((n, 2), dtype=np.int32)
+        positions[:, 0] = self.starter[0] + (self.radius_spawn * np.sin(t)).astype(np.int32)
+        positions[:, 1] = self.starter[1] + (self.radius_spawn * np.cos(t)).astype(np.int32)
+
+        return positions
+
+    """ ******************************************************************************
+    PRIVATE
+    Boolean mask of free walkers with aggregate cell in 4-neigh
+    ****************************************************************************** """
+    def touching(self):
+
+        x = self.positions[:, 0]
+        y = self.positions[:, 1]
+        plate = self.plate
+        color = self.cell_color
+
+        touching = (plate[x+1, y] == color) | (plate[x-1, y] == color) | \
+                   (plate[x, y+1] == color) | (plate[x, y-1] == color)
+
+        # walker spawned inside grown aggregate can not stick on occupied site
+        return touching & (plate[x, y] != color)
+
+    """ ******************************************************************************
+    PUBLIC
+    Move all walkers one site and stick ones touching aggregate
+    max_stuck: scalar, at most this many walkers stick (lowest indices)
+    Returns (k, 2) array of sites added to aggregate in this step
+    ****************************************************************************** """
+    def step(self, max_stuck):
+
+        # random movement of all walkers
+        directions = np.random.randint(0, 4, size=self.n_walkers)
+        self.positions += self.moves[directions]
+
+        # walkers outside kill circle are respawned
+        relative = self.positions - self.starter
+        radius = np.sum(np.power(relative, 2), axis=1)
+        killed = np.flatnonzero(radius > self.radius_kill_squared)
+        if len(killed) > 0:
+            self.positions[killed] = self.spawn(len(killed))
+
+        # walkers touching aggregate, one winner per site (lowest index)
+        touching = np.flatnonzero(self.touching())
+        sites = self.positions[touching, 0].astype(np.int64) * self.plate.shape[1] + self.positions[touching, 1]
+        sites, first = np.unique(sites, return_index=True)
+        winners = touching[np.sort(first)][:max_stuck]
+
+        stuck = self.positions[winners].copy()
+        self.plate[stuck[:, 0], stuck[:, 1]] = self.cell_color
+
+        # stuck walkers and walkers left on aggregate are replaced by new ones
+        on_aggregate = np.flatnonzero(self.plate[self.positions[:, 0], self.positions[:, 1]] == self.cell_color)
+        if len(on_aggregate) > 0:
+            self.positions[on_aggregate] = self.spawn(len(on_aggregate))
+
+        return stuck
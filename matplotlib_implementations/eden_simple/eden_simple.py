@@ -7,11 +7,16 @@ import time
 import matplotlib.pyplot as plt
 import time 
 import argparse
-import copy
 import os
+import sys
 
 ################################ USER LIBRARIES #######################################
-from img_to_video import images_to_video
+# frame writer lives in matplotlib_implementations/common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from frame_writer import FrameWriter, FRAME_SIZE
+from site_set import SiteSet
+from cluster_stats import give_perimeter, give_border, give_drift
+from plate import new_plate
 
 """ **********************************************************************************
 IMPROVE:
@@ -32,7 +37,7 @@ class EDEN:
 
     """ ******************************************************************************
     CONSTRUCTOR
-    plate_size: [x_max, y_max]
+    plate_size: [x_max, y_max] or None for sparse unbounded plate
     n_iter: scalar
     starters: [[x01, y01], [x02, y02], ....]
     ******************************************************************************* """
@@ -47,13 +52,13 @@ class EDEN:
         self.checkpoint = checkpoint
 
         "Additional variables"
-        self.plate = np.zeros(self.plate_size)
+        self.plate = new_plate(self.plate_size)
         self.populated = []
         for starter in self.starters:
-            self.plate[starter[0]][starter[1]] = 1
+            self.plate[starter[0], starter[1]] = 1
             self.populated.append([starter[0], starter[1]])
 
-        self.plates_through_iteration = []
+        self.frames = None
 
         
     """ ***************************************************************************
@@ -127,47 +132,256 @@ class EDEN:
     ******************************************************************************** """
     def plot_populated(self):
 
-        back = np.zeros(self.plate_size)
+        back = new_plate(self.plate_size)
 
         for cell in self.populated:
 
-            back[cell[0]][cell[1]] = 1
+            back[cell[0], cell[1]] = 1
 
         plt.imshow(back)
         plt.show()
 
     """ ********************************************************************************
     PRIVATE
-    Helper function: saves plates matrices to folder 
+    Helper function: opens video in out folder, checkpoint plates are streamed into it
     ******************************************************************************** """
-    def create_plots(self):
+    def open_frames(self):
 
         PATH = os.path.join('.', self.out_folder)
         if not os.path.exists(PATH):
             os.mkdir(PATH)
 
-        cnt = 1
-        for plate in self.plates_through_iteration:
+        frame_size = None if self.plate_size is not None else FRAME_SIZE
+        self.frames = FrameWriter(os.path.join(PATH, "result.avi"), frame_size=frame_size)
 
-            fig = plt.figure()
-            ax = plt.subplot(111)
-            ax.imshow(plate)
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: 4-neigh of given cell which lie on the plate
+    **************************************************************************** """
+    def give_neighbours(self, cell):
+
+        i = cell[0]
+        j = cell[1]
+
+        # sparse plate has no border
+        if self.plate_size is None:
+            return [(i, j+1), (i, j-1), (i-1, j), (i+1, j)]
 
-            out_file = os.path.join(PATH, str(cnt))
-            fig.savefig(out_file)
+        neighbours = []
 
-            cnt += 1
+        if j + 1 < self.plate_size[1]:
+            neighbours.append((i, j+1))
 
-        # create video from images
-        img_path = os.path.join('.', self.out_folder)
-        video_path = os.path.join('.', self.out_folder)
-        images_to_video(img_path, video_path)
+        if j - 1 >= 0:
+            neighbours.append((i, j-1))
+
+        if i - 1 >= 0:
+            neighbours.append((i-1, j))
+
+        if i + 1 < self.plate_size[0]:
+            neighbours.append((i+1, j))
+
+        return neighbours
+
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: builds frontier (free sites around cells) and
+    populated (cells with free neighbours) sets from current plate
+    **************************************************************************** """
+    def init_frontier(self):
+
+        self.frontier = SiteSet()
+        populated = SiteSet()
+
+        for cell in self.populated:
+
+            for neighbour in self.give_neighbours(cell):
+
+                if self.plate[neighbour[0], neighbour[1]] == 0:
+                    self.frontier.add(neighbour)
+                    populated.add(cell)
+
+        self.populated = populated
+
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: occupies cell and updates frontier and populated sets.
+    Only 4-neigh of occupied cell is visited
+    **************************************************************************** """
+    def occupy(self, cell):
+
+        self.plate[cell[0], cell[1]] = 1
+        self.frontier.remove(cell)
+
+        for neighbour in self.give_neighbours(cell):
+
+            if self.plate[neighbour[0], neighbour[1]] == 0:
+                self.frontier.add(neighbour)
+                self.populated.add(cell)
+
+            # occupied neighbour may have lost its last free slot
+            elif neighbour in self.populated:
+
+                free = False
+                for second in self.give_neighbours(neighbour):
+                    if self.plate[second[0], second[1]] == 0:
+                        free = True
+                        break
+
+                if not free:
+                    self.populated.remove(neighbour)
+
+    """ ****************************************************************************
+    PRIVATE
+    Helper function: stores and shows plate on checkpoint
+    **************************************************************************** """
+    def store_checkpoint(self, sample):
+
+        if sample % self.checkpoint == 0:
+            print("Cells:", sample, len(self.populated))
+
+            if self.frames is not None:
+                self.frames.write(self.plate)
+
+            if self.talk == 'y':
+
+                # plot all populated
+                plt.imshow(self.plate)
+                plt.show()
+
+                # plot only populated (with free slots)
+                self.plot_populated()
 
     """ ****************************************************************************
     PUBLIC
     call to grow eden pattern
+    mode: 'exact' grows one cell per iteration from incrementally updated frontier
+          'legacy' rescans populated cells every iteration (reproduces runs of
+          earlier versions for a fixed seed)
+          'batch' occupies batch_size frontier sites per iteration using
+          plate masks (approximate Eden)
+    batch_size: scalar, used only in 'batch' mode
+    drift: (y/n) after 'batch' mode grow reference colony in 'exact' mode and
+           print drift of cluster statistics (doubles runtime)
+    drift_seed: seed of reference colony random generator, global numpy
+                random state is not used by reference
+    **************************************************************************** """
+    def grow_pattern(self, mode="exact", batch_size=1, drift='n', drift_seed=None):
+
+        if mode not in ("exact", "legacy", "batch"):
+            raise ValueError("unknown mode " + str(mode) + ", use exact, legacy or batch")
+
+        self.open_frames()
+
+        if mode == "exact":
+            self.grow_exact()
+
+        if mode == "legacy":
+            self.grow_legacy()
+
+        if mode == "batch":
+            self.grow_batch(batch_size)
+
+            if drift == 'y':
+                self.report_drift(drift_seed)
+
+        self.frames.release()
+
+        if self.talk == 'y':    
+            plt.imshow(self.plate)
+            plt.show()
+
+    """ ****************************************************************************
+    PRIVATE
+    Eden growth on frontier set. O(1) work per occupied cell
+    rng: np.random.Generator or None for global numpy random state
     **************************************************************************** """
-    def grow_pattern(self):
+    def grow_exact(self, rng=None):
+
+        self.init_frontier()
+
+        for sample in range(self.n_iter):
+
+            "plate is full"
+            if len(self.frontier) == 0:
+                break
+
+            "among frontier sites choose randomly one"
+            if rng is None:
+                next_grow_site_idx = np.random.randint(low=0, high=len(self.frontier), size=1)[0]
+            else:
+                next_grow_site_idx = rng.integers(len(self.frontier))
+            next_grow_site_coord = self.frontier.give_site(next_grow_site_idx)
+
+            "occupy chosen cell, update frontier around it"
+            self.occupy(next_grow_site_coord)
+
+            self.store_checkpoint(sample)
+
+    """ ****************************************************************************
+    PRIVATE
+    Approximate Eden growth: every iteration batch_size sites are chosen
+    at once among perimeter sites found with plate masks
+    **************************************************************************** """
+    def grow_batch(self, batch_size):
+
+        if self.plate_size is None:
+            raise ValueError("batch mode needs dense plate, plate_size must be given")
+
+        occupied = self.plate != 0
+        sample = 0
+
+        while sample < self.n_iter:
+
+            "find all perimeter sites at once"
+            grow_sites = np.flatnonzero(give_perimeter(occupied))
+
+            "plate is full"
+            if len(grow_sites) == 0:
+                break
+
+            "choose batch of distinct sites and occupy them"
+            n_chosen = min(batch_size, self.n_iter - sample, len(grow_sites))
+            chosen = np.random.choice(grow_sites, size=n_chosen, replace=False)
+            occupied.flat[chosen] = True
+            self.plate.flat[chosen] = 1
+
+            "store plate for every checkpoint passed in this batch"
+            first = -(-sample // self.checkpoint) * self.checkpoint
+            if first < sample + n_chosen:
+                self.populated = np.argwhere(give_border(occupied)).tolist()
+
+            for checkpoint_sample in range(first, sample + n_chosen, self.checkpoint):
+                self.store_checkpoint(checkpoint_sample)
+
+            sample += n_chosen
+
+        self.populated = np.argwhere(give_border(occupied)).tolist()
+
+    """ ****************************************************************************
+    PRIVATE
+    Grows reference colony in exact mode and prints how far cluster
+    statistics of current plate drift from it
+    seed: seed of reference random generator
+    **************************************************************************** """
+    def report_drift(self, seed=None):
+
+        reference = EDEN(self.plate_size, self.n_iter, self.starters, 'n', self.out_folder, self.n_iter)
+        reference.grow_exact(np.random.default_rng(seed))
+
+        drift = give_drift(self.plate != 0, reference.plate != 0)
+
+        print("Drift from exact mode:")
+        for name in drift:
+            print("   ", name, drift[name])
+
+        return drift
+
+    """ ****************************************************************************
+    PRIVATE
+    Eden growth rescanning all populated cells every iteration
+    **************************************************************************** """
+    def grow_legacy(self):
 
         for sample in range(self.n_iter):
 
@@ -179,28 +393,13 @@ class EDEN:
             next_grow_site_coord = grow_sites[next_grow_site_idx]
 
             "occupy chosen cell"
-            self.plate[next_grow_site_coord[0]][next_grow_site_coord[1]] = 1
+            self.plate[next_grow_site_coord[0], next_grow_site_coord[1]] = 1
             self.populated.append([next_grow_site_coord[0], next_grow_site_coord[1]])
 
             "filter out cells in populated list with no free slots"
             self.filter_populated()
 
-            if sample % self.checkpoint == 0:
-                print("Cells:", sample, len(self.populated))
-                self.plates_through_iteration.append(copy.copy(self.plate))
-
-                if self.talk == 'y':
-                    
-                    # plot all populated
-                    plt.imshow(self.plate)
-                    plt.show()
-
-                    # plot only populated (with free slots)
-                    self.plot_populated()
-
-        if self.talk == 'y':    
-            plt.imshow(self.plate)
-            plt.show()
+            self.store_checkpoint(sample)
 
 
 """ *************************************************************************************
@@ -214,7 +413,7 @@ def main():
     parser = argparse.ArgumentParser()
 
     parser.add_argument("-plate-size",
-                        help="Tuple x_max, y_max", 
+                        help="Tuple x_max, y_max, omit for sparse unbounded plate", 
                         type=str)
 
     parser.add_argument("-n-iter",
@@ -237,11 +436,32 @@ def main():
                         help="Folder where plots throught iterations will be stored",
                         type=str)
 
+    parser.add_argument("-mode",
+                        help="exact, legacy, batch",
+                        type=str,
+                        default="exact")
+
+    parser.add_argument("-batch-size",
+                        help="Cells occupied per iteration in batch mode",
+                        type=int,
+                        default=1)
+
+    parser.add_argument("-drift",
+                        help="(y/n) in batch mode compare with colony grown in exact mode",
+                        type=str,
+                        default='n')
+
+    parser.add_argument("-seed",
+                        help="Seed for random generator (same seed, same colony)",
+                        type=int,
+                        default=None)
+
     args = parser.parse_args()
 
     plate_size = args.plate_size
-    plate_size = plate_size.split(',')
-    plate_size = [int(x) for x in plate_size]
+    if plate_size is not None:
+        plate_size = plate_size.split(',')
+        plate_size = [int(x) for x in plate_size]
 
     n_iter = args.n_iter
 
@@ -253,6 +473,13 @@ def main():
     talk = args.talk
     out_folder = args.out_folder
     checkpoint = args.checkpoint
+    mode = args.mode
+    batch_size = args.batch_size
+    drift = args.drift
+    seed = args.seed
+
+    if seed is not None:
+        np.random.seed(seed)
 
     print("INPUT:")
     print("Plate size:", plate_size)
@@ -261,11 +488,14 @@ def main():
     print("Talk?", talk)
     print("Out folder", out_folder)
     print("Checkpoint:", checkpoint)
+    print("Mode:", mode)
+    print("Batch size:", batch_size)
+    print("Drift report:", drift)
+    print("Seed:", seed)
 
     eden = EDEN(plate_size, n_iter, starters, talk, out_folder, checkpoint)
     start = time.time()
-    eden.grow_pattern()
-    eden.create_plots()
+    eden.grow_pattern(mode, batch_size, drift, seed)
     end = time.time()
     print("time:", end-start, "s")
 
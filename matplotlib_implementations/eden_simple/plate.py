@@ -0,0 +1,142 @@
+""" **********************************************************************************
+IMPORTS
+*********************************************************************************** """
+################################ STANDARD LIBRARIES ###################################
+import numpy as np
+
+""" **********************************************************************************
+Plate stores only small labels (plate: 0, cells: 1, 2, test: 3), so one byte
+per site is enough. 10k x 10k plate takes 100 MB instead of 800 MB as float64.
+*********************************************************************************** """
+PLATE_DTYPE = np.uint8
+
+""" **********************************************************************************
+PUBLIC
+Empty plate of given size
+plate_size: [x_max, y_max] or None for sparse unbounded plate
+*********************************************************************************** """
+def new_plate(plate_size):
+
+    if plate_size is None:
+        return SparsePlate()
+
+    return np.zeros(plate_size, dtype=PLATE_DTYPE)
+
+""" ***********************************************************************************
+CLASS
+Sparse unbounded plate
+Plate is split into square tiles of tile_size x tile_size sites. Tiles are stored in
+dict by tile coordinates and allocated on first write, so memory follows populated
+area and cells can have any (also negative) coordinates.
+Indexed as dense plate with tuple: plate[i, j]. Unwritten sites read as 0.
+************************************************************************************* """
+class SparsePlate:
+
+    """ ******************************************************************************
+    CONSTRUCTOR
+    tile_size: scalar, tile side in sites
+    ******************************************************************************* """
+    def __init__(self, tile_size=64):
+
+        self.tile_size = tile_size
+        self.tiles = {}
+
+    def __getitem__(self, cell):
+
+        ti, i = divmod(int(cell[0]), self.tile_size)
+        tj, j = divmod(int(cell[1]), self.tile_size)
+
+        tile = self.tiles.get((ti, tj))
+        if tile is None:
+            return 0
+
+        return tile[i, j]
+
+    def __setitem__(self, cell, value):
+
+        ti, i = divmod(int(cell[0]), self.tile_size)
+        tj, j = divmod(int(cell[1]), self.tile_size)
+
+        tile = self.tiles.get((ti, tj))
+        if tile is None:
+            tile = new_plate([self.tile_size, self.tile_size])
+            self.tiles[(ti, tj)] = tile
+
+        tile[i, j] = value
+
+    """ ******************************************************************************
+    Copy with own tiles (used for checkpoints)
+    ****************************************************************************** """
+    def __copy__(self):
+
+        copied = SparsePlate(self.tile_size)
+        for key in self.tiles:
+            copied.tiles[key] = self.tiles[key].copy()
+
+        return copied
+
+    """ ******************************************************************************
+    Tile-wise sum of two sparse plates with same tile size (used to join plates)
+    ****************************************************************************** """
+    def __add__(self, other):
+
+        joined = self.__copy__()
+        for key in other.tiles:
+            if key in joined.tiles:
+                joined.tiles[key] += other.tiles[key]
+            else:
+                joined.tiles[key] = other.tiles[key].copy()
+
+        return joined
+
+    """ ******************************************************************************
+    Dense array of allocated area (used by plots)
+    ****************************************************************************** """
+    def __array__(self, dtype=None, copy=None):
+
+        dense = self.to_array()
+        if dtype is not None:
+            dense = dense.astype(dtype)
+
+        return dense
+
+    """ ******************************************************************************
+    PUBLIC
+    Bounding box of allocated tiles in sites: [x_min, y_min, x_max, y_max]
+    x_max, y_max excluded
+    ****************************************************************************** """
+    def give_bounds(self):
+
+        if len(self.tiles) == 0:
+            return [0, 0, 1, 1]
+
+        keys = np.array(list(self.tiles.keys()))
+        x_min, y_min = keys.min(axis=0) * self.tile_size
+        x_max, y_max = (keys.max(axis=0) + 1) * self.tile_size
+
+        return [int(x_min), int(y_min), int(x_max), int(y_max)]
+
+    """ ******************************************************************************
+    PUBLIC
+    Dense copy of plate inside bounds [x_min, y_min, x_max, y_max]
+    Bounds must be aligned to tiles, default: all allocated tiles
+    ****************************************************************************** """
+    def to_array(self, bounds=None):
+
+        if bounds is None:
+            bounds = self.give_bounds()
+
+        x_min, y_min, x_max, y_max = bounds
+        dense = new_plate([x_max - x_min, y_max - y_min])
+
+        for (ti, tj), tile in self.tiles.items():
+
+            i = ti * self.tile_size - x_min
+            j = tj * self.tile_size - y_min
+
+            if i < 0 or j < 0 or i >= dense.shape[0] or j >= dense.shape[1]:
+                continue
+
+            dense[i:i+self.tile_size, j:j+self.tile_size] = tile
+
+        return dense
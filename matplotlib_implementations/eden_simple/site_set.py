@@ -0,0 +1,82 @@
+""" **********************************************************************************
+IMPORTS
+*********************************************************************************** """
+################################ STANDARD LIBRARIES ###################################
+import numpy as np
+
+""" ***********************************************************************************
+CLASS
+Indexed set of lattice sites
+Sites are stored as [i, j] rows of a dense array. A dict maps every site in set
+to its row in the dense array, so memory follows set size, not plate size, and
+sites can lie on unbounded (sparse) plates.
+Insert, remove and pick by index are O(1). Remove swaps last element into the hole,
+so the order of sites depends only on the sequence of operations (reproducible
+for a fixed seed).
+************************************************************************************* """
+class SiteSet:
+
+    """ ******************************************************************************
+    CONSTRUCTOR
+    capacity: initial size of dense array, doubled when full
+    ******************************************************************************* """
+    def __init__(self, capacity=1024):
+
+        self.sites = np.zeros((capacity, 2), dtype=np.int64)
+        self.slot = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        return (int(cell[0]), int(cell[1])) in self.slot
+
+    def __iter__(self):
+        for k in range(self.size):
+            yield self.give_site(k)
+
+    """ ******************************************************************************
+    PUBLIC
+    Add site [i, j]. Does nothing if site is already in set
+    ****************************************************************************** """
+    def add(self, cell):
+
+        key = (int(cell[0]), int(cell[1]))
+
+        if key in self.slot:
+            return
+
+        if self.size == len(self.sites):
+            self.sites = np.concatenate((self.sites, np.zeros(self.sites.shape, dtype=np.int64)))
+
+        self.sites[self.size] = key
+        self.slot[key] = self.size
+        self.size += 1
+
+    """ ******************************************************************************
+    PUBLIC
+    Remove site [i, j]. Does nothing if site is not in set
+    ****************************************************************************** """
+    def remove(self, cell):
+
+        key = (int(cell[0]), int(cell[1]))
+        k = self.slot.pop(key, None)
+
+        if k is None:
+            return
+
+        # move last site into the hole
+        self.size -= 1
+        last = self.give_site(self.size)
+        if last != key:
+            self.sites[k] = last
+            self.slot[last] = k
+
+    """ ******************************************************************************
+    PUBLIC
+    Site stored at slot k as (i, j)
+    ****************************************************************************** """
+    def give_site(self, k):
+
+        return (int(self.sites[k, 0]), int(self.sites[k, 1]))